@@ -0,0 +1,212 @@
+import itertools
+import math
+import time
+from collections.abc import Callable
+from contextlib import contextmanager
+from dataclasses import dataclass
+from threading import Condition
+
+# Request priorities: lower values are admitted first.
+PRIORITY_SINGLE = 0
+PRIORITY_ONE_CLICK = 1
+# Texts within the same length class keep their arrival order.
+LENGTH_CLASS_CHARS = 2000
+# Weight of the latest request in the average request duration.
+DURATION_SMOOTHING = 0.2
+
+
+class Overloaded(Exception):
+    """Raised when a request cannot be admitted within the allowed wait."""
+
+
+@dataclass(frozen=True)
+class QueueStatus:
+    # 1 for the next request to be admitted.
+    position: int
+    eta_seconds: float
+
+
+@dataclass(eq=False)
+class Ticket:
+    session_id: str
+    cost: int
+    priority: int
+    chars: int
+    sequence: int
+    enqueued_at: float
+    admitted_at: float | None = None
+
+    @property
+    def wait_seconds(self) -> float | None:
+        if self.admitted_at is None:
+            return None
+        return self.admitted_at - self.enqueued_at
+
+
+class AdmissionController:
+    """Bound the model requests in flight and queue the rest fairly.
+
+    A request costs one slot per model it calls. Waiting requests are admitted
+    in this order: sessions without a running request first, then single-model
+    before one-click requests, then shorter before longer texts, then by
+    arrival. The head of the queue waits until its slots are free, so large
+    requests are not overtaken forever. A full queue, or an estimated wait
+    above `max_wait_seconds`, rejects a request at once.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_model_requests: int,
+        max_queue: int,
+        max_wait_seconds: float,
+        initial_duration_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_model_requests < 1:
+            raise ValueError("admission.max_model_requests must be at least 1")
+        if max_queue < 0:
+            raise ValueError("admission.max_queue must not be negative")
+        if max_wait_seconds <= 0:
+            raise ValueError("admission.max_wait_seconds must be positive")
+        self.max_model_requests = max_model_requests
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self._clock = clock
+        self._condition = Condition()
+        self._queue: list[Ticket] = []
+        self._running: dict[str, int] = {}
+        self._in_use = 0
+        self._sequence = itertools.count()
+        self._duration_seconds = initial_duration_seconds
+
+    def queue_length(self) -> int:
+        with self._condition:
+            return len(self._queue)
+
+    def _order(self, ticket: Ticket) -> tuple:
+        return (
+            self._running.get(ticket.session_id, 0),
+            ticket.priority,
+            ticket.chars // LENGTH_CLASS_CHARS,
+            ticket.sequence,
+        )
+
+    def _admit_waiting(self) -> None:
+        while self._queue:
+            ticket = min(self._queue, key=self._order)
+            if ticket.cost > self.max_model_requests - self._in_use:
+                break
+            self._queue.remove(ticket)
+            ticket.admitted_at = self._clock()
+            self._in_use += ticket.cost
+            self._running[ticket.session_id] = (
+                self._running.get(ticket.session_id, 0) + 1
+            )
+        self._condition.notify_all()
+
+    def _status(self, ticket: Ticket) -> QueueStatus:
+        if ticket.admitted_at is not None:
+            return QueueStatus(0, 0.0)
+        ahead = [
+            other for other in self._queue if self._order(other) < self._order(ticket)
+        ]
+        cost = sum(other.cost for other in ahead) + ticket.cost
+        # Requests are admitted in waves of the capacity.
+        waves = math.ceil(cost / self.max_model_requests)
+        return QueueStatus(len(ahead) + 1, waves * self._duration_seconds)
+
+    def status(self, ticket: Ticket) -> QueueStatus:
+        with self._condition:
+            return self._status(ticket)
+
+    def enqueue(
+        self, session_id: str, *, cost: int, priority: int, chars: int
+    ) -> Ticket:
+        """Queue a request, admitting it at once if there is capacity."""
+        with self._condition:
+            ticket = Ticket(
+                session_id,
+                min(max(cost, 1), self.max_model_requests),
+                priority,
+                chars,
+                next(self._sequence),
+                self._clock(),
+            )
+            self._queue.append(ticket)
+            self._admit_waiting()
+            if ticket.admitted_at is not None:
+                return ticket
+            if len(self._queue) > self.max_queue:
+                reason = "the admission queue is full"
+            elif self._status(ticket).eta_seconds > self.max_wait_seconds:
+                reason = "the estimated wait is too long"
+            else:
+                return ticket
+            self._queue.remove(ticket)
+            self._admit_waiting()
+            raise Overloaded(reason)
+
+    def wait(self, ticket: Ticket, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for the ticket to be admitted."""
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: ticket.admitted_at is not None, timeout
+            )
+
+    def release(self, ticket: Ticket) -> None:
+        """Free the slots of an admitted ticket or withdraw a waiting one."""
+        with self._condition:
+            if ticket.admitted_at is None:
+                if ticket in self._queue:
+                    self._queue.remove(ticket)
+            else:
+                self._in_use -= ticket.cost
+                running = self._running[ticket.session_id] - 1
+                if running:
+                    self._running[ticket.session_id] = running
+                else:
+                    del self._running[ticket.session_id]
+                self._duration_seconds += DURATION_SMOOTHING * (
+                    self._clock() - ticket.admitted_at - self._duration_seconds
+                )
+            self._admit_waiting()
+
+    @contextmanager
+    def slot(
+        self,
+        session_id: str,
+        *,
+        cost: int,
+        priority: int,
+        chars: int,
+        on_wait: Callable[[QueueStatus], None] | None = None,
+        wait_seconds: float = 0.5,
+    ):
+        """Hold the slots of a request while the block runs. Yields its ticket.
+
+        While the request waits, `on_wait` gets its queue status about every
+        `wait_seconds`. Raises `Overloaded` if it is not admitted in time.
+        """
+        ticket = self.enqueue(session_id, cost=cost, priority=priority, chars=chars)
+        try:
+            deadline = ticket.enqueued_at + self.max_wait_seconds
+            while not self.wait(ticket, wait_seconds):
+                if self._clock() >= deadline:
+                    raise Overloaded("the request waited too long")
+                if on_wait is not None:
+                    on_wait(self.status(ticket))
+            yield ticket
+        finally:
+            self.release(ticket)
+
+
+def create_admission_controller(admission_config) -> AdmissionController | None:
+    """Create the controller configured in `admission`, or None if disabled."""
+    if not admission_config.enabled:
+        return None
+    return AdmissionController(
+        max_model_requests=admission_config.max_model_requests,
+        max_queue=admission_config.max_queue,
+        max_wait_seconds=admission_config.max_wait_seconds,
+    )
@@ -0,0 +1,642 @@
+import argparse
+import hmac
+import json
+import logging
+import os
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, replace
+from functools import lru_cache, partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:  # Flat import when run as a script (app dir is on sys.path).
+    from app_config import ConfigWatcher
+    from app_core import (
+        APP_DIR,
+        MODEL_ERROR_MESSAGE,
+        ModelOutput,
+        SimplificationEngine,
+        SimplificationRequest,
+        build_log_payload,
+        classify_understandability,
+        configure_event_logger,
+        get_cefr,
+        get_zix,
+        http2_available,
+        rank_model_results,
+        repo_path,
+        rounded_score,
+        score_model_results,
+        start_understandability_loading,
+        write_event_log,
+    )
+    from circuit_breaker import create_circuit_breaker
+    from metrics import AppMetrics, MetricsRegistry
+    from model_routing import AUTO_MODEL_CHOICE, ModelObservation, create_model_router
+    from shared_state import create_shared_state
+    from tracing import create_tracer
+    from translation_memory import create_translation_memory
+except ImportError:  # Package import (e.g. in tests).
+    from _streamlit_app.app_config import ConfigWatcher
+    from _streamlit_app.app_core import (
+        APP_DIR,
+        MODEL_ERROR_MESSAGE,
+        ModelOutput,
+        SimplificationEngine,
+        SimplificationRequest,
+        build_log_payload,
+        classify_understandability,
+        configure_event_logger,
+        get_cefr,
+        get_zix,
+        http2_available,
+        rank_model_results,
+        repo_path,
+        rounded_score,
+        score_model_results,
+        start_understandability_loading,
+        write_event_log,
+    )
+    from _streamlit_app.circuit_breaker import create_circuit_breaker
+    from _streamlit_app.metrics import AppMetrics, MetricsRegistry
+    from _streamlit_app.model_routing import (
+        AUTO_MODEL_CHOICE,
+        ModelObservation,
+        create_model_router,
+    )
+    from _streamlit_app.shared_state import create_shared_state
+    from _streamlit_app.tracing import create_tracer
+    from _streamlit_app.translation_memory import create_translation_memory
+
+logger = logging.getLogger(__name__)
+
+
+class SimplificationService:
+    """Scoring, routing and event logging around the engine, for the API.
+
+    Every setting arrives with the request, so one service object serves all
+    request threads at once.
+    """
+
+    def __init__(
+        self,
+        engine: SimplificationEngine,
+        *,
+        event_logger: logging.Logger | None = None,
+        score_fn: Callable[[str], float | None] = get_zix,
+        cefr_fn: Callable[[float], str] = get_cefr,
+        shared_state=None,
+        router=None,
+    ):
+        self.engine = engine
+        self.tracer = engine.tracer
+        self.event_logger = event_logger
+        self.cefr_fn = cefr_fn
+        self.shared_state = shared_state
+        self.router = router
+        self._score_fn = score_fn
+        self._cached_score = lru_cache(maxsize=1024)(score_fn)
+
+    @property
+    def config(self):
+        return self.engine.config_source()
+
+    def _score_text(self, text: str) -> float | None:
+        with self.tracer.span("get_zix", chars=len(text)):
+            if self.shared_state is not None:
+                # Replicas share scores with each other and with the app.
+                return self.shared_state.score_cache.get_or_compute(
+                    text, self._score_fn
+                )
+            return self._cached_score(text)
+
+    def score(self, text: str) -> dict[str, object]:
+        score = self._score_text(text)
+        if score is None:
+            return {"score": None, "cefr": None, "classification": None}
+        classification = classify_understandability(
+            score,
+            limit_hard=self.config.understandability.limit_hard,
+            limit_medium=self.config.understandability.limit_medium,
+        )
+        return {
+            "score": round(score, 2),
+            "cefr": self.cefr_fn(rounded_score(score)),
+            "classification": classification.label,
+        }
+
+    def resolve_model(self, name: str | None) -> str:
+        """Return the configured model name. "Auto" asks the router."""
+        names = self.config.model_names
+        if name is None:
+            return names[0]
+        if name == AUTO_MODEL_CHOICE:
+            if self.router is None:
+                return names[0]
+            try:
+                # Models whose provider is down are left out.
+                return self.router.choose(self.engine.available_models(names))
+            except Exception:
+                logger.exception("Routing failed, falling back to the first model")
+                return names[0]
+        if name not in self.config.model_ids:
+            raise ValueError(f"Unknown model: {name}")
+        return name
+
+    def one_click(
+        self,
+        request: SimplificationRequest,
+        *,
+        score_source: float | None = None,
+        on_result: Callable[[dict[str, object]], None] | None = None,
+    ) -> list[dict[str, object]]:
+        """Run all models at once and score each result as soon as it arrives.
+
+        `score_source` is the score of the source text, for the routing stats.
+        """
+        results = {}
+
+        def score_output(output: ModelOutput) -> None:
+            (result,) = score_model_results(
+                {output.model_name: (output.success, output.text)},
+                score_fn=self._score_text,
+                cefr_fn=self.cefr_fn,
+                source_text=request.text,
+            )
+            self.record_observation(output, result.score, score_source)
+            results[output.model_name] = result
+            if on_result is not None:
+                on_result(model_result_payload(result))
+
+        self.engine.run(request, on_output=score_output)
+        ordered = [results[name] for name in request.models]
+        best_result = max(
+            (result for result in ordered if result.success),
+            key=lambda result: result.score,
+            default=None,
+        )
+        if best_result is not None:
+            self.remember_accepted_result(
+                request, best_result.response, best_result.model_name, best_result.score
+            )
+        if self.config.one_click.ranking:
+            ordered = rank_model_results(ordered)
+        return [model_result_payload(result) for result in ordered]
+
+    def remember_accepted_result(self, request, response, model_name, score) -> None:
+        """Keep the paragraphs of a well understandable simplification for reuse."""
+        memory = self.engine.translation_memory
+        if memory is None or score is None:
+            return
+        if score < self.config.understandability.limit_hard:
+            return
+        try:
+            memory.add(request.text, response, mode=request.mode, model=model_name)
+        except Exception:
+            logger.exception("Storing the result in the translation memory failed")
+
+    def record_observation(self, output: ModelOutput, score, score_source) -> None:
+        if self.router is None or not output.measures_model:
+            return
+        gain = None if score is None or score_source is None else score - score_source
+        try:
+            self.router.record(
+                ModelObservation(
+                    output.model_name, output.latency_seconds, output.success, gain
+                )
+            )
+        except Exception:
+            logger.exception("Recording routing stats failed for %s", output.model_name)
+
+    def log_event(
+        self, *, text, response, endpoint, options, model, started_at, success
+    ):
+        if self.event_logger is None:
+            return
+        payload = build_log_payload(
+            text=text,
+            response=response,
+            do_analysis=endpoint == "analyze",
+            do_simplification=endpoint == "simplify",
+            do_one_click=endpoint == "one-click",
+            leichte_sprache=options.leichte_sprache,
+            model_choice=model,
+            time_processed=time.time() - started_at,
+            success=success,
+            datetime_format=self.config.datetime_format,
+        )
+        payload["channel"] = "api"
+        write_event_log(self.event_logger, payload)
+
+
+def model_result_payload(result) -> dict[str, object]:
+    return {
+        "model": result.model_name,
+        "success": result.success,
+        "text": result.response if result.success else MODEL_ERROR_MESSAGE,
+        "score": None if result.score is None else round(result.score, 2),
+        "cefr": result.cefr,
+    }
+
+
+@dataclass(frozen=True)
+class RequestOptions:
+    text: str
+    leichte_sprache: bool
+    condense_text: bool
+    model: str | None
+    stream: bool
+
+    def simplification_request(
+        self, models: tuple[str, ...], *, analysis: bool = False
+    ) -> SimplificationRequest:
+        return SimplificationRequest(
+            text=self.text,
+            models=tuple(models),
+            analysis=analysis,
+            leichte_sprache=self.leichte_sprache,
+            condense_text=self.condense_text,
+        )
+
+
+def _field(body: dict, key: str, expected: type, default):
+    value = body.get(key, default)
+    if value is not default and not isinstance(value, expected):
+        raise ValueError(f"'{key}' must be of type {expected.__name__}")
+    return value
+
+
+def parse_request_options(body: object, *, max_chars: int) -> RequestOptions:
+    """Validate the JSON body of /simplify, /analyze and /one-click."""
+    if not isinstance(body, dict):
+        raise ValueError("Request body must be a JSON object")
+    text = _field(body, "text", str, None)
+    if not text or not text.strip():
+        raise ValueError("'text' must be a non-empty string")
+    if len(text) > max_chars:
+        raise ValueError(f"'text' must not be longer than {max_chars} characters")
+    return RequestOptions(
+        text=text,
+        leichte_sprache=_field(body, "leichte_sprache", bool, False),
+        condense_text=_field(body, "condense_text", bool, True),
+        model=_field(body, "model", str, None),
+        stream=_field(body, "stream", bool, False),
+    )
+
+
+class _ApiRequestHandler(BaseHTTPRequestHandler):
+    service: SimplificationService
+    auth_token: str | None
+    # Keep-alive lets clients reuse one connection for many requests.
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, delayed ACKs
+    # add about 40 ms to every keep-alive response.
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/metrics":
+            # Traffic and failures per model are not for everyone.
+            if not self._authorized():
+                self._reject(401, "Missing or invalid API token")
+                return
+            body = self.service.engine.metrics.registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self) -> None:
+        handlers = {
+            "/simplify": partial(self._handle_model, "simplify"),
+            "/analyze": partial(self._handle_model, "analyze"),
+            "/one-click": self._handle_one_click,
+            "/score": self._handle_score,
+        }
+        handler = handlers.get(self.path)
+        if handler is None:
+            self._reject(404, "Not found")
+            return
+        if not self._authorized():
+            self._reject(401, "Missing or invalid API token")
+            return
+        body = self._read_json()
+        if body is None:
+            return
+        self._streaming = False
+        try:
+            handler(body)
+        except ValueError as error:
+            self._send_error(400, str(error))
+        except Exception:
+            logger.exception("API request to %s failed", self.path)
+            self._send_error(500, "Internal server error")
+
+    def _send_error(self, status: int, message: str) -> None:
+        try:
+            if self._streaming:
+                # The status line went out with the stream, so end it with an event.
+                self._send_event({"event": "error", "error": message})
+                self._end_stream()
+            else:
+                self._send_json(status, {"error": message})
+        except OSError:
+            # The client is gone.
+            self.close_connection = True
+
+    def _authorized(self) -> bool:
+        if not self.auth_token:
+            return True
+        header = self.headers.get("Authorization", "")
+        return hmac.compare_digest(header, f"Bearer {self.auth_token}")
+
+    def _read_json(self):
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self._reject(411, "Content-Length is required")
+            return None
+        if length < 0:
+            # rfile.read(-1) would wait for the client to close the connection.
+            self._reject(400, "Content-Length must not be negative")
+            return None
+        if length > self.service.config.api_server.max_body_bytes:
+            self._reject(413, "Request body is too large")
+            return None
+        try:
+            return json.loads(self.rfile.read(length))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            self._send_json(400, {"error": "Request body must be valid JSON"})
+            return None
+
+    def _options(self, body) -> RequestOptions:
+        return parse_request_options(
+            body, max_chars=self.service.config.ui.max_chars_input
+        )
+
+    def _handle_model(self, endpoint: str, body) -> None:
+        service = self.service
+        options = self._options(body)
+        model = service.resolve_model(options.model)
+        started_at = time.time()
+        with service.tracer.span(
+            "api_request",
+            endpoint=endpoint,
+            model=model,
+            input_chars=len(options.text),
+        ):
+            score_source = service.score(options.text)
+            request = options.simplification_request(
+                (model,), analysis=endpoint == "analyze"
+            )
+            on_text = None
+            if options.stream:
+                self._start_stream()
+                self._send_event({"event": "source", **score_source})
+                on_text = self._send_delta_event
+            output = service.engine.invoke(request, model, on_text=on_text)
+
+            payload = {
+                "model": model,
+                "success": output.success,
+                "text": output.text,
+                "source": score_source,
+            }
+            if endpoint == "simplify":
+                payload["terms"] = [
+                    {"term": term, "explanation": explanation}
+                    for term, explanation in output.terms
+                ]
+                if output.success:
+                    payload["result"] = service.score(output.text)
+                    service.record_observation(
+                        output,
+                        payload["result"]["score"],
+                        score_source["score"],
+                    )
+                    service.remember_accepted_result(
+                        request, output.text, model, payload["result"]["score"]
+                    )
+            payload["time_processed_seconds"] = round(time.time() - started_at, 3)
+
+        service.log_event(
+            text=options.text,
+            response=output.text,
+            endpoint=endpoint,
+            options=options,
+            model=model,
+            started_at=started_at,
+            success=output.success,
+        )
+        if options.stream:
+            self._send_event({"event": "result", **payload})
+            self._end_stream()
+        else:
+            self._send_json(200 if output.success else 502, payload)
+
+    def _handle_one_click(self, body) -> None:
+        service = self.service
+        options = self._options(body)
+        started_at = time.time()
+        on_result = None
+        if options.stream:
+            self._start_stream()
+            on_result = self._send_model_event
+        with service.tracer.span(
+            "api_request", endpoint="one-click", input_chars=len(options.text)
+        ):
+            score_source = service.score(options.text)
+            if options.stream:
+                self._send_event({"event": "source", **score_source})
+            results = service.one_click(
+                options.simplification_request(service.config.model_names),
+                score_source=score_source["score"],
+                on_result=on_result,
+            )
+        success = any(result["success"] for result in results)
+        service.log_event(
+            text=options.text,
+            response="".join(result["text"] for result in results if result["success"]),
+            endpoint="one-click",
+            options=options,
+            model=", ".join(service.config.model_names),
+            started_at=started_at,
+            success=success,
+        )
+        payload = {
+            "success": success,
+            "source": score_source,
+            "results": results,
+            "time_processed_seconds": round(time.time() - started_at, 3),
+        }
+        if options.stream:
+            self._send_event({"event": "done", **payload})
+            self._end_stream()
+        else:
+            self._send_json(200 if success else 502, payload)
+
+    def _send_delta_event(self, text: str) -> None:
+        self._send_event({"event": "delta", "text": text})
+
+    def _send_model_event(self, result: dict[str, object]) -> None:
+        self._send_event({"event": "model_result", **result})
+
+    def _handle_score(self, body) -> None:
+        if not isinstance(body, dict):
+            raise ValueError("Request body must be a JSON object")
+        texts = body.get("texts", [body.get("text")])
+        if not isinstance(texts, list) or not texts:
+            raise ValueError("'texts' must be a non-empty list of strings")
+        if len(texts) > self.service.config.api_server.max_batch_texts:
+            raise ValueError(
+                "'texts' must not contain more than "
+                f"{self.service.config.api_server.max_batch_texts} texts"
+            )
+        max_chars = self.service.config.ui.max_chars_input
+        if not all(isinstance(text, str) and text.strip() for text in texts):
+            raise ValueError("'texts' must be a non-empty list of strings")
+        if any(len(text) > max_chars for text in texts):
+            raise ValueError(f"Texts must not be longer than {max_chars} characters")
+        with self.service.tracer.span(
+            "api_request", endpoint="score", texts=len(texts)
+        ):
+            scores = [self.service.score(text) for text in texts]
+        self._send_json(200, {"scores": scores})
+
+    def _reject(self, status: int, message: str) -> None:
+        # The body was not read, so the connection cannot serve another request.
+        self.close_connection = True
+        self._send_json(status, {"error": message})
+
+    def _send_json(self, status: int, payload: dict[str, object]) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_stream(self) -> None:
+        # Newline-delimited JSON events in HTTP/1.1 chunks.
+        self._streaming = True
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+    def _send_event(self, event: dict[str, object]) -> None:
+        line = json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n"
+        self.wfile.write(f"{len(line):X}\r\n".encode("ascii") + line + b"\r\n")
+        self.wfile.flush()
+
+    def _end_stream(self) -> None:
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def create_api_server(
+    service: SimplificationService,
+    *,
+    host: str,
+    port: int,
+    auth_token: str | None = None,
+) -> ThreadingHTTPServer:
+    """Create the API server. Call `serve_forever()` to start it."""
+    handler = type(
+        "ApiRequestHandler",
+        (_ApiRequestHandler,),
+        {"service": service, "auth_token": auth_token},
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def create_openrouter_client(api, api_key: str):
+    """Create the API client with a connection pool sized like the app's."""
+    import httpx
+    from openai import DefaultHttpxClient, OpenAI
+
+    return OpenAI(
+        base_url=api.base_url,
+        api_key=api_key,
+        timeout=api.timeout_seconds,
+        max_retries=api.max_retries,
+        http_client=DefaultHttpxClient(
+            http2=api.http2 and http2_available(),
+            limits=httpx.Limits(
+                max_connections=api.max_connections,
+                max_keepalive_connections=api.max_connections,
+                keepalive_expiry=api.keepalive_expiry_seconds,
+            ),
+        ),
+    )
+
+
+def main() -> None:
+    from dotenv import load_dotenv
+
+    watcher = ConfigWatcher(repo_path("config.yaml"))
+    config = watcher.current()
+    parser = argparse.ArgumentParser(
+        description="Serve simplification and scoring as an HTTP JSON API."
+    )
+    parser.add_argument("--host", default=config.api_server.host)
+    parser.add_argument("--port", type=int, default=config.api_server.port)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    load_dotenv(APP_DIR / ".env")
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        raise SystemExit("OPENROUTER_API_KEY is not set")
+    auth_token = os.getenv("SIMPLIFY_API_TOKEN")
+    if not auth_token and args.host not in ("127.0.0.1", "localhost", "::1"):
+        logger.warning("SIMPLIFY_API_TOKEN is not set; the API is open to everyone")
+
+    shared_state = create_shared_state(
+        config.shared_state, base_dir=APP_DIR, burst=len(config.models)
+    )
+    router = None
+    if config.routing.enabled:
+        routing = config.routing
+        if shared_state is not None:
+            routing = replace(routing, stats_path=str(shared_state.path))
+        router = create_model_router(routing, base_dir=APP_DIR)
+    memory_config = config.translation_memory
+    if shared_state is not None:
+        memory_config = replace(memory_config, path=str(shared_state.path))
+    engine = SimplificationEngine(
+        # Edits to config.yaml take effect without a restart, as in the app.
+        watcher.current,
+        lru_cache(maxsize=4)(partial(create_openrouter_client, api_key=api_key)),
+        tracer=create_tracer(config.tracing, base_dir=APP_DIR),
+        metrics=AppMetrics(MetricsRegistry()),
+        rate_limiter=None if shared_state is None else shared_state.rate_limiter,
+        translation_memory=create_translation_memory(memory_config, base_dir=APP_DIR),
+        circuit_breaker=create_circuit_breaker(config.circuit_breaker),
+    )
+    service = SimplificationService(
+        engine,
+        event_logger=configure_event_logger(config.logging, base_dir=APP_DIR),
+        shared_state=shared_state,
+        router=router,
+    )
+    # Load the language model before the first request instead of during it.
+    start_understandability_loading(config.scoring).result()
+    server = create_api_server(
+        service, host=args.host, port=args.port, auth_token=auth_token
+    )
+    logger.info("Serving the API on http://%s:%d", args.host, args.port)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,527 @@
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ModelConfig:
+    name: str
+    id: str
+    # The model supports JSON schema responses (see api.structured_output).
+    structured_output: bool = False
+    # Overrides api.min_tokens, e.g. for models that spend tokens on reasoning.
+    min_tokens: int | None = None
+
+
+@dataclass(frozen=True)
+class ApiConfig:
+    base_url: str
+    temperature: str | float
+    max_tokens: int
+    min_tokens: int
+    token_headroom: float
+    max_continuations: int
+    structured_output: bool
+    slim_rules: bool
+    timeout_seconds: float
+    max_retries: int
+    http2: bool
+    expected_concurrent_sessions: int
+    keepalive_expiry_seconds: float
+    prewarm_connections: bool
+    # One connection per model for each concurrent one-click run.
+    max_connections: int
+
+
+@dataclass(frozen=True)
+class UiConfig:
+    text_area_height: int
+    max_chars_input: int
+    user_warning: str
+
+
+@dataclass(frozen=True)
+class DocumentConfig:
+    font_name: str
+    font_size_heading: float
+    font_size_paragraph: float
+    font_size_footer: float
+    page_width_inches: float
+    page_height_inches: float
+    download_mime_type: str
+    default_output_filename: str
+    analysis_filename: str
+
+
+@dataclass(frozen=True)
+class UnderstandabilityConfig:
+    limit_hard: float
+    limit_medium: float
+    metric_label: str
+    metric_help: str
+
+
+@dataclass(frozen=True)
+class ScoringConfig:
+    # spaCy components removed from the ZIX pipeline because the score does not use them.
+    remove_components: tuple[str, ...]
+    # Longer texts are not scored.
+    max_chars: int
+
+
+@dataclass(frozen=True)
+class OneClickConfig:
+    ranking: bool
+    min_good_results: int
+
+
+@dataclass(frozen=True)
+class DraftRefineConfig:
+    enabled: bool
+    draft_model: str
+    # Selected models that refine the draft instead of writing from scratch.
+    refine_models: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class RoutingConfig:
+    enabled: bool
+    window: int
+    min_samples: int
+    stats_path: str
+
+
+@dataclass(frozen=True)
+class SharedStateConfig:
+    enabled: bool
+    path: str
+    score_cache_entries: int
+    # 0 disables the shared rate limit.
+    requests_per_minute: int
+
+
+@dataclass(frozen=True)
+class TranslationMemoryConfig:
+    enabled: bool
+    path: str
+    min_similarity: float
+    max_entries: int
+
+
+@dataclass(frozen=True)
+class CircuitBreakerConfig:
+    enabled: bool
+    failure_threshold: int
+    cooldown_seconds: float
+
+
+@dataclass(frozen=True)
+class AdmissionConfig:
+    enabled: bool
+    # Model requests in flight; a one-click request needs one per model.
+    max_model_requests: int
+    max_queue: int
+    max_wait_seconds: float
+
+
+@dataclass(frozen=True)
+class MetricsConfig:
+    enabled: bool
+    host: str
+    port: int
+
+
+@dataclass(frozen=True)
+class ApiServerConfig:
+    host: str
+    port: int
+    max_body_bytes: int
+    max_batch_texts: int
+
+
+@dataclass(frozen=True)
+class AppConfig:
+    models: tuple[ModelConfig, ...]
+    api: ApiConfig
+    ui: UiConfig
+    document: DocumentConfig
+    understandability: UnderstandabilityConfig
+    scoring: ScoringConfig
+    one_click: OneClickConfig
+    draft_refine: DraftRefineConfig
+    routing: RoutingConfig
+    shared_state: SharedStateConfig
+    translation_memory: TranslationMemoryConfig
+    circuit_breaker: CircuitBreakerConfig
+    admission: AdmissionConfig
+    datetime_format: str
+    profile_reruns: bool
+    rerun_budget_ms: float
+    results: dict
+    logging: dict
+    metrics: MetricsConfig
+    api_server: ApiServerConfig
+    tracing: dict
+    # Derived once per loaded config instead of on every script rerun.
+    model_ids: dict[str, str]
+    model_names: tuple[str, ...]
+    # Models that get JSON schema requests, empty unless api.structured_output is on.
+    structured_model_ids: frozenset[str]
+    # Lower bound of the response budget per model ID.
+    model_min_tokens: dict[str, int]
+    user_warning_markup: str
+
+
+def _section(mapping: dict, name: str) -> dict:
+    section = mapping.get(name)
+    if not isinstance(section, dict):
+        raise ValueError(f"config section '{name}' must be a mapping")
+    return section
+
+
+def _value(section: dict, path: str, expected: type | tuple[type, ...]):
+    key = path.rsplit(".", 1)[-1]
+    if key not in section:
+        raise ValueError(f"{path} is missing")
+    value = section[key]
+    expected_types = expected if isinstance(expected, tuple) else (expected,)
+    # bool is a subclass of int, but never a valid number in this config.
+    is_misused_bool = isinstance(value, bool) and bool not in expected_types
+    if is_misused_bool or not isinstance(value, expected_types):
+        raise ValueError(f"{path} has an invalid value: {value!r}")
+    return value
+
+
+def _positive(section: dict, path: str, expected: type | tuple[type, ...]):
+    value = _value(section, path, expected)
+    if value <= 0:
+        raise ValueError(f"{path} must be positive")
+    return value
+
+
+def _parse_models(entries: object) -> tuple[ModelConfig, ...]:
+    if not isinstance(entries, list) or not entries:
+        raise ValueError("models must be a non-empty list")
+    if not all(isinstance(entry, dict) for entry in entries):
+        raise ValueError("models entries must be mappings with name and id")
+    models = tuple(
+        ModelConfig(
+            name=_value(entry, "models.name", str),
+            id=_value(entry, "models.id", str),
+            structured_output=(
+                _value(entry, "models.structured_output", bool)
+                if "structured_output" in entry
+                else False
+            ),
+            min_tokens=(
+                _positive(entry, "models.min_tokens", int)
+                if "min_tokens" in entry
+                else None
+            ),
+        )
+        for entry in entries
+    )
+    if len({model.name for model in models}) != len(models):
+        raise ValueError("models must have unique names")
+    return models
+
+
+def _parse_api(section: dict, model_count: int) -> ApiConfig:
+    temperature = _value(section, "api.temperature", (str, float))
+    if isinstance(temperature, str) and temperature != "default":
+        raise ValueError("api.temperature must be 'default' or a float")
+    max_retries = _value(section, "api.max_retries", int)
+    if max_retries < 0:
+        raise ValueError("api.max_retries must not be negative")
+    max_tokens = _positive(section, "api.max_tokens", int)
+    min_tokens = _positive(section, "api.min_tokens", int)
+    if min_tokens > max_tokens:
+        raise ValueError("api.min_tokens must not exceed api.max_tokens")
+    token_headroom = _value(section, "api.token_headroom", (int, float))
+    if token_headroom < 1:
+        raise ValueError("api.token_headroom must be at least 1")
+    max_continuations = _value(section, "api.max_continuations", int)
+    if max_continuations < 0:
+        raise ValueError("api.max_continuations must not be negative")
+    expected_concurrent_sessions = _positive(
+        section, "api.expected_concurrent_sessions", int
+    )
+    return ApiConfig(
+        base_url=_value(section, "api.base_url", str),
+        temperature=temperature,
+        max_tokens=max_tokens,
+        min_tokens=min_tokens,
+        token_headroom=token_headroom,
+        max_continuations=max_continuations,
+        structured_output=_value(section, "api.structured_output", bool),
+        slim_rules=_value(section, "api.slim_rules", bool),
+        timeout_seconds=_positive(section, "api.timeout_seconds", (int, float)),
+        max_retries=max_retries,
+        http2=_value(section, "api.http2", bool),
+        expected_concurrent_sessions=expected_concurrent_sessions,
+        keepalive_expiry_seconds=_positive(
+            section, "api.keepalive_expiry_seconds", (int, float)
+        ),
+        prewarm_connections=_value(section, "api.prewarm_connections", bool),
+        max_connections=model_count * expected_concurrent_sessions,
+    )
+
+
+def _parse_understandability(section: dict) -> UnderstandabilityConfig:
+    understandability = UnderstandabilityConfig(
+        limit_hard=_value(section, "understandability.limit_hard", (int, float)),
+        limit_medium=_value(section, "understandability.limit_medium", (int, float)),
+        metric_label=_value(section, "understandability.metric_label", str),
+        metric_help=_value(section, "understandability.metric_help", str),
+    )
+    if understandability.limit_medium >= understandability.limit_hard:
+        raise ValueError("limit_medium must be lower than limit_hard")
+    return understandability
+
+
+def _parse_scoring(section: dict) -> ScoringConfig:
+    components = _value(section, "scoring.remove_components", list)
+    if not all(isinstance(component, str) for component in components):
+        raise ValueError("scoring.remove_components must be a list of strings")
+    return ScoringConfig(
+        remove_components=tuple(components),
+        max_chars=_positive(section, "scoring.max_chars", int),
+    )
+
+
+def _parse_one_click(section: dict, model_count: int) -> OneClickConfig:
+    min_good_results = _value(section, "one_click.min_good_results", int)
+    if not 0 <= min_good_results <= model_count:
+        raise ValueError(
+            "one_click.min_good_results must be between 0 and the number of models"
+        )
+    return OneClickConfig(
+        ranking=_value(section, "one_click.ranking", bool),
+        min_good_results=min_good_results,
+    )
+
+
+def _parse_draft_refine(
+    section: dict, model_names: tuple[str, ...]
+) -> DraftRefineConfig:
+    draft_model = _value(section, "draft_refine.draft_model", str)
+    if draft_model not in model_names:
+        raise ValueError("draft_refine.draft_model must be one of the models")
+    refine_models = _value(section, "draft_refine.refine_models", list)
+    if not all(model in model_names for model in refine_models):
+        raise ValueError("draft_refine.refine_models must list names of the models")
+    if draft_model in refine_models:
+        raise ValueError("draft_refine.refine_models must not contain the draft_model")
+    return DraftRefineConfig(
+        enabled=_value(section, "draft_refine.enabled", bool),
+        draft_model=draft_model,
+        refine_models=tuple(refine_models),
+    )
+
+
+def _parse_routing(section: dict) -> RoutingConfig:
+    min_samples = _value(section, "routing.min_samples", int)
+    if min_samples < 0:
+        raise ValueError("routing.min_samples must not be negative")
+    return RoutingConfig(
+        enabled=_value(section, "routing.enabled", bool),
+        window=_positive(section, "routing.window", int),
+        min_samples=min_samples,
+        stats_path=_value(section, "routing.stats_path", str),
+    )
+
+
+def _parse_shared_state(section: dict) -> SharedStateConfig:
+    requests_per_minute = _value(section, "shared_state.requests_per_minute", int)
+    if requests_per_minute < 0:
+        raise ValueError("shared_state.requests_per_minute must not be negative")
+    return SharedStateConfig(
+        enabled=_value(section, "shared_state.enabled", bool),
+        path=_value(section, "shared_state.path", str),
+        score_cache_entries=_positive(section, "shared_state.score_cache_entries", int),
+        requests_per_minute=requests_per_minute,
+    )
+
+
+def _parse_translation_memory(section: dict) -> TranslationMemoryConfig:
+    min_similarity = _value(section, "translation_memory.min_similarity", (int, float))
+    if not 0 < min_similarity <= 1:
+        raise ValueError("translation_memory.min_similarity must be between 0 and 1")
+    return TranslationMemoryConfig(
+        enabled=_value(section, "translation_memory.enabled", bool),
+        path=_value(section, "translation_memory.path", str),
+        min_similarity=float(min_similarity),
+        max_entries=_positive(section, "translation_memory.max_entries", int),
+    )
+
+
+def _parse_circuit_breaker(section: dict) -> CircuitBreakerConfig:
+    return CircuitBreakerConfig(
+        enabled=_value(section, "circuit_breaker.enabled", bool),
+        failure_threshold=_positive(section, "circuit_breaker.failure_threshold", int),
+        cooldown_seconds=float(
+            _positive(section, "circuit_breaker.cooldown_seconds", (int, float))
+        ),
+    )
+
+
+def _parse_admission(section: dict) -> AdmissionConfig:
+    max_queue = _value(section, "admission.max_queue", int)
+    if max_queue < 0:
+        raise ValueError("admission.max_queue must not be negative")
+    return AdmissionConfig(
+        enabled=_value(section, "admission.enabled", bool),
+        max_model_requests=_positive(section, "admission.max_model_requests", int),
+        max_queue=max_queue,
+        max_wait_seconds=float(
+            _positive(section, "admission.max_wait_seconds", (int, float))
+        ),
+    )
+
+
+def _parse_metrics(section: dict) -> MetricsConfig:
+    port = _value(section, "metrics.port", int)
+    if not 0 < port < 65536:
+        raise ValueError("metrics.port must be between 1 and 65535")
+    return MetricsConfig(
+        enabled=_value(section, "metrics.enabled", bool),
+        host=_value(section, "metrics.host", str),
+        port=port,
+    )
+
+
+def _parse_api_server(section: dict) -> ApiServerConfig:
+    port = _value(section, "api_server.port", int)
+    if not 0 < port < 65536:
+        raise ValueError("api_server.port must be between 1 and 65535")
+    return ApiServerConfig(
+        host=_value(section, "api_server.host", str),
+        port=port,
+        max_body_bytes=_positive(section, "api_server.max_body_bytes", int),
+        max_batch_texts=_positive(section, "api_server.max_batch_texts", int),
+    )
+
+
+def parse_app_config(mapping: dict) -> AppConfig:
+    """Validate the raw YAML mapping and build the typed app configuration."""
+    if not isinstance(mapping, dict):
+        raise ValueError("config must be a mapping")
+
+    models = _parse_models(mapping.get("models"))
+    api = _parse_api(_section(mapping, "api"), len(models))
+    if any((model.min_tokens or 0) > api.max_tokens for model in models):
+        raise ValueError("models.min_tokens must not exceed api.max_tokens")
+    ui = _section(mapping, "ui")
+    document = _section(mapping, "document")
+    app = _section(mapping, "app")
+    number = (int, float)
+
+    return AppConfig(
+        models=models,
+        api=api,
+        ui=UiConfig(
+            text_area_height=_positive(ui, "ui.text_area_height", int),
+            max_chars_input=_positive(ui, "ui.max_chars_input", int),
+            user_warning=_value(ui, "ui.user_warning", str),
+        ),
+        document=DocumentConfig(
+            font_name=_value(document, "document.font_name", str),
+            font_size_heading=_positive(document, "document.font_size_heading", number),
+            font_size_paragraph=_positive(
+                document, "document.font_size_paragraph", number
+            ),
+            font_size_footer=_positive(document, "document.font_size_footer", number),
+            page_width_inches=_positive(document, "document.page_width_inches", number),
+            page_height_inches=_positive(
+                document, "document.page_height_inches", number
+            ),
+            download_mime_type=_value(document, "document.download_mime_type", str),
+            default_output_filename=_value(
+                document, "document.default_output_filename", str
+            ),
+            analysis_filename=_value(document, "document.analysis_filename", str),
+        ),
+        understandability=_parse_understandability(
+            _section(mapping, "understandability")
+        ),
+        scoring=_parse_scoring(_section(mapping, "scoring")),
+        one_click=_parse_one_click(_section(mapping, "one_click"), len(models)),
+        draft_refine=_parse_draft_refine(
+            _section(mapping, "draft_refine"), tuple(model.name for model in models)
+        ),
+        routing=_parse_routing(_section(mapping, "routing")),
+        shared_state=_parse_shared_state(_section(mapping, "shared_state")),
+        translation_memory=_parse_translation_memory(
+            _section(mapping, "translation_memory")
+        ),
+        circuit_breaker=_parse_circuit_breaker(_section(mapping, "circuit_breaker")),
+        admission=_parse_admission(_section(mapping, "admission")),
+        datetime_format=_value(app, "app.datetime_format", str),
+        profile_reruns=_value(app, "app.profile_reruns", bool),
+        rerun_budget_ms=_positive(app, "app.rerun_budget_ms", number),
+        results=_section(mapping, "results"),
+        logging=_section(mapping, "logging"),
+        metrics=_parse_metrics(_section(mapping, "metrics")),
+        api_server=_parse_api_server(_section(mapping, "api_server")),
+        tracing=_section(mapping, "tracing"),
+        model_ids={model.name: model.id for model in models},
+        model_names=tuple(model.name for model in models),
+        structured_model_ids=frozenset(
+            model.id
+            for model in models
+            if api.structured_output and model.structured_output
+        ),
+        model_min_tokens={
+            model.id: model.min_tokens or api.min_tokens for model in models
+        },
+        user_warning_markup=f"<sub>{ui['user_warning']}</sub>",
+    )
+
+
+def load_app_config(path: Path) -> AppConfig:
+    with path.open("r", encoding="utf-8") as file:
+        return parse_app_config(yaml.safe_load(file))
+
+
+class ConfigWatcher:
+    """Serve the current config and reload it when the file changes.
+
+    The file is checked at most every `check_interval` seconds. A valid new
+    config replaces the old one in a single reference swap, so running script
+    runs keep the config they started with. An invalid file is logged and the
+    last valid config stays active.
+    """
+
+    def __init__(self, path: Path, *, check_interval: float = 2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = Lock()
+        self._mtime = path.stat().st_mtime_ns
+        self._config = load_app_config(path)
+        self._checked_at = time.monotonic()
+
+    def current(self) -> AppConfig:
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            with self._lock:
+                if now - self._checked_at >= self.check_interval:
+                    self._checked_at = now
+                    self._reload_if_changed()
+        return self._config
+
+    def _reload_if_changed(self) -> None:
+        try:
+            mtime = self.path.stat().st_mtime_ns
+            if mtime == self._mtime:
+                return
+            self._mtime = mtime
+            self._config = load_app_config(self.path)
+            logger.info("Reloaded configuration from %s", self.path)
+        except (OSError, ValueError, yaml.YAMLError):
+            logger.exception("Keeping previous configuration; reload failed")
@@ -1,22 +1,48 @@
+import hashlib
+import importlib.util
 import json
 import logging
+import queue
 import re
-from collections.abc import Callable
-from concurrent.futures import Future
-from dataclasses import dataclass
+import time
+from collections.abc import Callable, Hashable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import ExitStack, contextmanager, nullcontext
+from contextvars import copy_context
+from dataclasses import asdict, dataclass, replace
 from datetime import datetime
+from functools import partial
+from logging.handlers import QueueHandler, RotatingFileHandler
 from pathlib import Path
-from threading import Lock, Thread
+from threading import Event, Lock, Thread
+from typing import TypeVar
 
 import yaml
 
 try:  # Flat import when run by Streamlit (app dir is on sys.path).
+    from circuit_breaker import CLOSED, OPEN, STATE_VALUES
+    from response_parser import ResultPreview, TaggedResponseParser
+    from scoring_pipeline import configure_scoring
+    from structured_output import parse_structured_response, response_format
+    from token_budget import OutputRatioTracker, max_tokens_for, request_mode
     from utils_prompts import (
+        CONTINUE_RESPONSE,
+        OUTPUT_JSON,
+        OUTPUT_JSON_ANALYSIS,
+        OUTPUT_TAGS_ANALYSIS_ES,
+        OUTPUT_TAGS_ANALYSIS_LS,
+        OUTPUT_TAGS_ES,
+        OUTPUT_TAGS_LS,
+        REFINE_DRAFT,
         REWRITE_COMPLETE,
         REWRITE_CONDENSED,
         RULES_ES,
+        RULES_ES_SLIM,
         RULES_LS,
+        RULES_LS_SLIM,
         SYSTEM_MESSAGE_ES,
+        SYSTEM_MESSAGE_JSON_ES,
+        SYSTEM_MESSAGE_JSON_LS,
         SYSTEM_MESSAGE_LS,
         TEMPLATE_ANALYSIS_ES,
         TEMPLATE_ANALYSIS_LS,
@@ -24,12 +50,36 @@ try:  # Flat import when run by Streamlit (app dir is on sys.path).
         TEMPLATE_LS,
     )
 except ImportError:  # Package import (e.g. in tests).
+    from _streamlit_app.circuit_breaker import CLOSED, OPEN, STATE_VALUES
+    from _streamlit_app.response_parser import ResultPreview, TaggedResponseParser
+    from _streamlit_app.scoring_pipeline import configure_scoring
+    from _streamlit_app.structured_output import (
+        parse_structured_response,
+        response_format,
+    )
+    from _streamlit_app.token_budget import (
+        OutputRatioTracker,
+        max_tokens_for,
+        request_mode,
+    )
     from _streamlit_app.utils_prompts import (
+        CONTINUE_RESPONSE,
+        OUTPUT_JSON,
+        OUTPUT_JSON_ANALYSIS,
+        OUTPUT_TAGS_ANALYSIS_ES,
+        OUTPUT_TAGS_ANALYSIS_LS,
+        OUTPUT_TAGS_ES,
+        OUTPUT_TAGS_LS,
+        REFINE_DRAFT,
         REWRITE_COMPLETE,
         REWRITE_CONDENSED,
         RULES_ES,
+        RULES_ES_SLIM,
         RULES_LS,
+        RULES_LS_SLIM,
         SYSTEM_MESSAGE_ES,
+        SYSTEM_MESSAGE_JSON_ES,
+        SYSTEM_MESSAGE_JSON_LS,
         SYSTEM_MESSAGE_LS,
         TEMPLATE_ANALYSIS_ES,
         TEMPLATE_ANALYSIS_LS,
@@ -37,6 +87,10 @@ except ImportError:  # Package import (e.g. in tests).
         TEMPLATE_LS,
     )
 
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
 APP_DIR = Path(__file__).resolve().parent
 REPO_ROOT = APP_DIR.parent
 UnderstandabilityFunctions = tuple[Callable, Callable]
@@ -51,16 +105,26 @@ def _import_understandability_functions() -> UnderstandabilityFunctions:
 
 
 def _complete_understandability_load(
-    future: Future[UnderstandabilityFunctions],
+    future: Future[UnderstandabilityFunctions], scoring_config=None
 ) -> None:
     try:
-        future.set_result(_import_understandability_functions())
+        functions = _import_understandability_functions()
+        if scoring_config is not None:
+            score_fn, cefr_fn = functions
+            functions = configure_scoring(score_fn, scoring_config), cefr_fn
+        future.set_result(functions)
     except Exception as error:
         future.set_exception(error)
 
 
-def start_understandability_loading() -> Future[UnderstandabilityFunctions]:
-    """Start one shared background load of the expensive ZIX stack."""
+def start_understandability_loading(
+    scoring_config=None,
+) -> Future[UnderstandabilityFunctions]:
+    """Start one shared background load of the expensive ZIX stack.
+
+    The first call decides the `scoring` settings; without them, the ZIX
+    pipeline is used as shipped.
+    """
     global _understandability_future
 
     with _understandability_lock:
@@ -68,7 +132,7 @@ def start_understandability_loading() -> Future[UnderstandabilityFunctions]:
             _understandability_future = Future()
             Thread(
                 target=_complete_understandability_load,
-                args=(_understandability_future,),
+                args=(_understandability_future, scoring_config),
                 name="zix-loader",
                 daemon=True,
             ).start()
@@ -98,6 +162,20 @@ class ScoreClassification:
     color: str
 
 
+@dataclass(frozen=True)
+class ModelResult:
+    """Outcome of one model in a one-click run, scored once for ranking and display."""
+
+    model_name: str
+    success: bool
+    response: str
+    score: float | None = None
+    cefr: str | None = None
+    length_ratio: float | None = None
+    coverage: float | None = None
+    cancelled: bool = False
+
+
 @dataclass(frozen=True)
 class ResultState:
     source_text: str
@@ -109,14 +187,65 @@ class ResultState:
     model_names: tuple[str, ...]
     time_processed: float
     score_source: float
+    leichte_sprache: bool = False
+    condense_text: bool = False
+    result_id: str = ""
+    model_results: tuple[ModelResult, ...] = ()
+    # Terms explained in a structured simplification, as (term, explanation).
+    terms: tuple[tuple[str, str], ...] = ()
+    # The model whose draft `model_choice` refined, if any.
+    draft_model: str = ""
 
 
 def result_models_used(result: ResultState) -> str:
     if result.one_click:
         return ", ".join(result.model_names)
+    if result.draft_model:
+        return f"{result.model_choice} (Entwurf: {result.draft_model})"
     return result.model_choice
 
 
+def compute_result_id(
+    *,
+    final_prompt: str,
+    system: str,
+    model_ids: tuple[str, ...],
+    analysis: bool,
+    one_click: bool,
+) -> str:
+    """Hash everything that determines a result, so identical work maps to one ID."""
+    key = json.dumps(
+        {
+            "prompt": final_prompt,
+            "system": system,
+            "model_ids": list(model_ids),
+            "analysis": analysis,
+            "one_click": one_click,
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def result_to_payload(result: ResultState) -> dict[str, object]:
+    return asdict(result)
+
+
+def result_from_payload(payload: dict[str, object]) -> ResultState:
+    return ResultState(
+        **{
+            **payload,
+            "model_names": tuple(payload["model_names"]),
+            "model_results": tuple(
+                ModelResult(**model_result)
+                for model_result in payload.get("model_results", ())
+            ),
+            "terms": tuple(tuple(term) for term in payload.get("terms", ())),
+        }
+    )
+
+
 def app_path(*parts: str) -> Path:
     """Resolve a path relative to the Streamlit app directory."""
     return APP_DIR.joinpath(*parts)
@@ -146,6 +275,202 @@ def temperature_request_parameters(temperature: str | float) -> dict[str, float]
     raise ValueError("api.temperature must be 'default' or a float")
 
 
+def http2_available() -> bool:
+    """HTTP/2 in httpx needs the optional «h2» package."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def prewarm_connections(open_connection: Callable[[], object], count: int) -> int:
+    """Open `count` pooled connections at once and return how many succeeded.
+
+    Concurrent requests make the pool open parallel connections, so a later
+    one-click fan-out finds them ready instead of paying TCP and TLS setup.
+    Failures are not errors: the affected request just connects later.
+    """
+
+    def attempt() -> bool:
+        try:
+            open_connection()
+        except Exception:
+            return False
+        return True
+
+    with ThreadPoolExecutor(max_workers=count, thread_name_prefix="prewarm") as pool:
+        return sum(pool.map(lambda _: attempt(), range(count)))
+
+
+def model_request_key(
+    model_id: str,
+    final_prompt: str,
+    system: str,
+    settings: dict[str, object],
+) -> tuple:
+    """Identify a model call by everything that is sent to the provider.
+
+    The response budget is left out: it follows the recent output ratios, so
+    identical requests a moment apart may get different budgets, and they
+    should still share one call. A cut-off response is continued anyway.
+    """
+    shared = {key: value for key, value in settings.items() if key != "max_tokens"}
+    # Settings may contain nested values such as a response format schema.
+    return (model_id, system, final_prompt, json.dumps(shared, sort_keys=True))
+
+
+class SingleFlight:
+    """Let concurrent callers with the same key share one in-flight call.
+
+    This complements the result store: it deduplicates requests that are still
+    running, e.g. when a whole training group submits the sample text at once.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, Future] = {}
+        self._followers = 0
+        self._lock = Lock()
+
+    def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], T],
+        cancel: "CancellationToken | None" = None,
+    ) -> T:
+        """Run `fn`, or wait for the running call with the same key.
+
+        A waiting caller whose `cancel` is cancelled stops waiting at once and
+        raises `RequestCancelled`; the running call is not affected.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._calls[key] = future
+            else:
+                self._followers += 1
+
+        if not is_leader:
+            try:
+                return self._follow(future, cancel)
+            finally:
+                with self._lock:
+                    self._followers -= 1
+
+        try:
+            future.set_result(fn())
+        except BaseException as error:
+            future.set_exception(error)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return future.result()
+
+    @staticmethod
+    def _follow(future: Future, cancel: "CancellationToken | None"):
+        if cancel is None:
+            return future.result()
+        finished = Event()
+        future.add_done_callback(lambda _: finished.set())
+        with cancel.on_cancel(finished.set):
+            finished.wait()
+        if not future.done():
+            raise RequestCancelled
+        return future.result()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def followers(self) -> int:
+        """Return the number of callers waiting for another caller's call."""
+        with self._lock:
+            return self._followers
+
+
+class RequestCancelled(Exception):
+    """Raised inside a model call whose `CancellationToken` was cancelled."""
+
+
+class RateLimitTimeout(TimeoutError):
+    """Raised when the shared rate limit grants no model request in time."""
+
+
+class CancellationToken:
+    """Cooperative cancellation of the model calls that share this token.
+
+    Calls check the token between stream chunks and register callbacks that
+    close their HTTP response, so `cancel()` from any thread aborts requests
+    that are still waiting for the provider.
+    """
+
+    def __init__(self):
+        self._cancelled = Event()
+        self._callbacks: dict[int, Callable[[], object]] = {}
+        self._lock = Lock()
+        self._next_id = 0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._cancelled.is_set():
+                return
+            self._cancelled.set()
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.exception("Cancellation callback failed")
+
+    def raise_if_cancelled(self) -> None:
+        if self._cancelled.is_set():
+            raise RequestCancelled
+
+    @contextmanager
+    def on_cancel(self, callback: Callable[[], object]):
+        """Call `callback` if the token is cancelled while the block runs."""
+        with self._lock:
+            callback_id = self._next_id
+            self._next_id += 1
+            already_cancelled = self._cancelled.is_set()
+            if not already_cancelled:
+                self._callbacks[callback_id] = callback
+        if already_cancelled:
+            callback()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._callbacks.pop(callback_id, None)
+
+
+def iter_until_cancelled(stream, cancel: CancellationToken | None):
+    """Yield the chunks of a response stream until `cancel` is cancelled.
+
+    Cancelling closes the stream, which aborts the HTTP request even while the
+    provider has not sent the next chunk yet.
+    """
+    if cancel is None:
+        yield from stream
+        return
+    close = getattr(stream, "close", None)
+    with cancel.on_cancel(close) if close is not None else nullcontext():
+        try:
+            for chunk in stream:
+                cancel.raise_if_cancelled()
+                yield chunk
+        except RequestCancelled:
+            raise
+        except Exception:
+            # Closing the stream from another thread fails the pending read.
+            cancel.raise_if_cancelled()
+            raise
+    cancel.raise_if_cancelled()
+
+
 def classify_understandability(
     score: float,
     *,
@@ -187,32 +512,75 @@ def extract_tagged_response(response: str, tag: str) -> str:
     return extracted
 
 
+def is_truncated_response(response: str, tag: str) -> bool:
+    """Return True if the last result tag was opened but never closed."""
+    return response.rfind(f"<{tag}>") > response.rfind(f"</{tag}>")
+
+
+def join_continuation(partial: str, continuation: str, tag: str) -> str:
+    """Append a continued response, dropping a repeated opening tag."""
+    if continuation.lstrip().startswith(f"<{tag}>"):
+        continuation = continuation.lstrip()[len(f"<{tag}>") :]
+    return partial + continuation
+
+
 def create_prompt(
     text: str,
     *,
     analysis: bool,
     leichte_sprache: bool,
     condense_text: bool,
+    structured: bool = False,
+    slim_rules: bool = False,
+    draft: str = "",
 ) -> tuple[str, str]:
-    """Create the user prompt and system message according to the app settings."""
+    """Create the user prompt and system message according to the app settings.
+
+    With `structured`, the model is asked for JSON that follows the schema in
+    structured_output.py instead of text between result tags. With
+    `slim_rules`, simplifications leave out the formatting rules that
+    formatting_rules.py enforces on the result. With a `draft`, the model
+    revises that draft of a simplification instead of starting from scratch.
+    """
+    if structured:
+        system = SYSTEM_MESSAGE_JSON_LS if leichte_sprache else SYSTEM_MESSAGE_JSON_ES
+    else:
+        system = SYSTEM_MESSAGE_LS if leichte_sprache else SYSTEM_MESSAGE_ES
+
     if analysis:
         if leichte_sprache:
-            final_prompt = TEMPLATE_ANALYSIS_LS.format(rules=RULES_LS, prompt=text)
-            system = SYSTEM_MESSAGE_LS
+            final_prompt = TEMPLATE_ANALYSIS_LS.format(
+                rules=RULES_LS,
+                output_format=OUTPUT_JSON_ANALYSIS
+                if structured
+                else OUTPUT_TAGS_ANALYSIS_LS,
+                prompt=text,
+            )
         else:
-            final_prompt = TEMPLATE_ANALYSIS_ES.format(rules=RULES_ES, prompt=text)
-            system = SYSTEM_MESSAGE_ES
+            final_prompt = TEMPLATE_ANALYSIS_ES.format(
+                rules=RULES_ES,
+                output_format=OUTPUT_JSON_ANALYSIS
+                if structured
+                else OUTPUT_TAGS_ANALYSIS_ES,
+                prompt=text,
+            )
     elif leichte_sprache:
         completeness = REWRITE_CONDENSED if condense_text else REWRITE_COMPLETE
         final_prompt = TEMPLATE_LS.format(
-            rules=RULES_LS, completeness=completeness, prompt=text
+            rules=RULES_LS_SLIM if slim_rules else RULES_LS,
+            completeness=completeness,
+            output_format=OUTPUT_JSON if structured else OUTPUT_TAGS_LS,
+            prompt=text,
         )
-        system = SYSTEM_MESSAGE_LS
     else:
         final_prompt = TEMPLATE_ES.format(
-            rules=RULES_ES, completeness=REWRITE_COMPLETE, prompt=text
+            rules=RULES_ES_SLIM if slim_rules else RULES_ES,
+            completeness=REWRITE_COMPLETE,
+            output_format=OUTPUT_JSON if structured else OUTPUT_TAGS_ES,
+            prompt=text,
         )
-        system = SYSTEM_MESSAGE_ES
+    if draft and not analysis:
+        final_prompt += "\n\n" + REFINE_DRAFT.format(draft=draft)
     return final_prompt, system
 
 
@@ -230,25 +598,155 @@ def rounded_score(score: float) -> int:
     return int(round(score, 0) + 0)
 
 
-def format_one_click_results(
+_KEY_TOKEN_PATTERN = re.compile(r"\w*\d\w*|\w{6,}")
+
+
+def _key_tokens(text: str) -> set[str]:
+    return {token.lower() for token in _KEY_TOKEN_PATTERN.findall(text)}
+
+
+def source_length_ratio(source_text: str, response: str) -> float | None:
+    """Compare the word count of a response with the source text."""
+    source_words = len(source_text.split())
+    if source_words == 0:
+        return None
+    return len(response.split()) / source_words
+
+
+def source_coverage(source_text: str, response: str) -> float | None:
+    """Share of the source's numbers and long words that reappear in a response.
+
+    A cheap hint at dropped facts such as dates, amounts or key terms. Simplified
+    texts rephrase a lot, so this is a relative signal between models.
+    """
+    source_tokens = _key_tokens(source_text)
+    if not source_tokens:
+        return None
+    return len(source_tokens & _key_tokens(response)) / len(source_tokens)
+
+
+def score_model_results(
     responses: dict[str, tuple[bool, str]],
     *,
     score_fn: Callable[[str], float],
     cefr_fn: Callable[[float], str],
-) -> tuple[bool, str]:
-    response_texts = []
-    failed_models = []
-
+    source_text: str | None = None,
+) -> list[ModelResult]:
+    """Score every successful response once, keeping the order of `responses`."""
+    results = []
     for name, (success, response) in responses.items():
-        if success and response.strip():
-            zix = rounded_score(score_fn(response))
-            cefr = cefr_fn(zix)
-            response_texts.append(
-                f"\n----- Ergebnis von {name} "
-                f"(Verständlichkeit: {zix}, Niveau etwa {cefr}) -----\n\n{response}"
+        if not (success and response.strip()):
+            results.append(ModelResult(name, False, response))
+            continue
+        score = score_fn(response)
+        results.append(
+            ModelResult(
+                name,
+                True,
+                response,
+                score=score,
+                cefr=cefr_fn(rounded_score(score)),
+                length_ratio=(
+                    None
+                    if source_text is None
+                    else source_length_ratio(source_text, response)
+                ),
+                coverage=(
+                    None
+                    if source_text is None
+                    else source_coverage(source_text, response)
+                ),
             )
-        else:
-            failed_models.append(name)
+        )
+    return results
+
+
+def memoize_scores(score_fn: Callable[[str], float]) -> Callable[[str], float]:
+    """Wrap a score function so each distinct text is scored only once."""
+    scores: dict[str, float] = {}
+
+    def score(text: str) -> float:
+        if text not in scores:
+            scores[text] = score_fn(text)
+        return scores[text]
+
+    return score
+
+
+def collect_until_enough_good(
+    futures: dict[str, Future],
+    *,
+    is_good: Callable[[str], bool],
+    min_good: int,
+    on_complete: Callable[[str], None] | None = None,
+    on_wait: Callable[[], None] | None = None,
+    wait_seconds: float = 0.5,
+) -> tuple[dict[str, tuple[bool, str]], list[str]]:
+    """Collect model responses as they complete, stopping early once enough are good.
+
+    With `min_good` 0 all futures are awaited. Otherwise the remaining futures
+    are cancelled as soon as `min_good` successful responses pass `is_good`.
+    `on_complete` is called with each model name as its response arrives and
+    `on_wait` every `wait_seconds` without one, both in the calling thread.
+    Returns the completed responses in the order of `futures` and the names of
+    the models that were not awaited.
+    """
+    pending = {future: name for name, future in futures.items()}
+    completed: dict[str, tuple[bool, str]] = {}
+    good = 0
+
+    while pending and (min_good == 0 or good < min_good):
+        done, _ = wait(
+            pending,
+            timeout=None if on_wait is None else wait_seconds,
+            return_when=FIRST_COMPLETED,
+        )
+        if not done:
+            on_wait()
+        for future in done:
+            name = pending.pop(future)
+            success, response = future.result()
+            completed[name] = (success, response)
+            if on_complete is not None:
+                on_complete(name)
+            if success and response.strip() and is_good(response):
+                good += 1
+
+    for future in pending:
+        future.cancel()
+    responses = {name: completed[name] for name in futures if name in completed}
+    return responses, [name for name in futures if name not in completed]
+
+
+def rank_model_results(results: list[ModelResult]) -> list[ModelResult]:
+    """Order successful results by understandability, best first, failures last."""
+    return sorted(
+        results,
+        key=lambda result: (not result.success, -(result.score or 0)),
+    )
+
+
+def _format_model_result(result: ModelResult) -> str:
+    details = (
+        f"Verständlichkeit: {rounded_score(result.score)}, Niveau etwa {result.cefr}"
+    )
+    if result.length_ratio is not None:
+        details += f", Länge {result.length_ratio:.0%} des Ausgangstexts"
+    if result.coverage is not None:
+        details += f", Abdeckung {result.coverage:.0%}"
+    return f"\n----- Ergebnis von {result.model_name} ({details}) -----\n\n{result.response}"
+
+
+def format_model_results(results: list[ModelResult]) -> tuple[bool, str]:
+    response_texts = [
+        _format_model_result(result) for result in results if result.success
+    ]
+    failed_models = [
+        result.model_name
+        for result in results
+        if not result.success and not result.cancelled
+    ]
+    cancelled_models = [result.model_name for result in results if result.cancelled]
 
     if failed_models:
         response_texts.append(
@@ -256,15 +754,559 @@ def format_one_click_results(
             f"{', '.join(failed_models)} -----\n\n"
             "Für diese Modelle konnte kein Ergebnis erstellt werden."
         )
+    if cancelled_models:
+        response_texts.append(
+            "\n----- Nicht abgewartet: "
+            f"{', '.join(cancelled_models)} -----\n\n"
+            "Es lagen bereits genügend gut verständliche Ergebnisse vor."
+        )
 
-    if not any(
-        success and response.strip() for success, response in responses.values()
-    ):
+    if not any(result.success for result in results):
         return False, "\n\n\n".join(response_texts) or "Es ist ein Fehler aufgetreten."
 
     return True, "\n\n\n".join(response_texts)
 
 
+def format_one_click_results(
+    responses: dict[str, tuple[bool, str]],
+    *,
+    score_fn: Callable[[str], float],
+    cefr_fn: Callable[[float], str],
+) -> tuple[bool, str]:
+    return format_model_results(
+        score_model_results(responses, score_fn=score_fn, cefr_fn=cefr_fn)
+    )
+
+
+MODEL_ERROR_MESSAGE = "Model response could not be created."
+
+
+@dataclass(frozen=True)
+class SimplificationRequest:
+    """Everything one simplification or analysis needs, independent of the UI."""
+
+    text: str
+    models: tuple[str, ...]
+    analysis: bool = False
+    leichte_sprache: bool = False
+    condense_text: bool = False
+    # A faster model's simplification for the models to revise (draft then refine).
+    draft: str = ""
+
+    @property
+    def tag(self) -> str:
+        return "leichtesprache" if self.leichte_sprache else "einfachesprache"
+
+    @property
+    def mode(self) -> str:
+        return request_mode(
+            analysis=self.analysis,
+            leichte_sprache=self.leichte_sprache,
+            condense_text=self.condense_text,
+        )
+
+
+@dataclass(frozen=True)
+class ModelOutput:
+    """Unscored outcome of one model for a `SimplificationRequest`."""
+
+    model_name: str
+    success: bool
+    text: str
+    # Terms explained in a structured simplification, as (term, explanation).
+    terms: tuple[tuple[str, str], ...] = ()
+    latency_seconds: float = 0.0
+    cancelled: bool = False
+    # Paragraphs filled in from the translation memory instead of the model.
+    memory_paragraphs: int = 0
+    # Not sent, because the circuit breaker of the model was open.
+    rejected: bool = False
+    # Not sent, because the shared rate limit of the app was exhausted.
+    rate_limited: bool = False
+
+    @property
+    def measures_model(self) -> bool:
+        """Whether latency and result show how the model performs, for routing.
+
+        Not when the request was not sent or the memory filled in paragraphs.
+        """
+        return not (self.rejected or self.rate_limited or self.memory_paragraphs)
+
+
+class SimplificationEngine:
+    """Run simplification requests against the configured models.
+
+    The engine keeps no per-request state. Each call reads one config snapshot
+    from `config_source` and all settings from its request, and the shared
+    parts (client pool, request coalescing, output ratios, circuit breaker) are
+    thread-safe. So one engine serves the UI, the API and batch jobs from any
+    number of threads. `client_for(api_config)` returns the API client for a
+    config snapshot.
+    """
+
+    def __init__(
+        self,
+        config_source: Callable[[], object],
+        client_for: Callable[[object], object],
+        *,
+        tracer,
+        metrics,
+        rate_limiter=None,
+        translation_memory=None,
+        circuit_breaker=None,
+    ):
+        self.config_source = config_source
+        self.client_for = client_for
+        self.tracer = tracer
+        self.metrics = metrics
+        self.rate_limiter = rate_limiter
+        self.translation_memory = translation_memory
+        self.circuit_breaker = circuit_breaker
+        self.output_ratios = OutputRatioTracker()
+        self.coalescer = SingleFlight()
+        if circuit_breaker is not None:
+            metrics.registry.add_collector(self._collect_circuit_states)
+
+    def invoke(
+        self,
+        request: SimplificationRequest,
+        model_name: str,
+        *,
+        on_text: Callable[[str], None] | None = None,
+        cancel: CancellationToken | None = None,
+    ) -> ModelOutput:
+        """Run one model and never raise: failures return an unsuccessful output.
+
+        With `on_text`, the result text is streamed as it arrives. Streamed
+        requests always use result tags, so text shows before the response ends.
+        Cancelling `cancel` aborts the request and returns a cancelled output.
+        """
+        config = self.config_source()
+        model_id = config.model_ids[model_name]
+        started_at = time.perf_counter()
+        with self.tracer.span("invoke_model", model=model_id):
+            prefill = self._prefill(request)
+            # A text the memory knows completely needs no model.
+            breaker = (
+                self.circuit_breaker if prefill is None or prefill.remainder else None
+            )
+            if breaker is not None and not breaker.acquire(model_id):
+                self.metrics.model_rejections.inc(model=model_id)
+                return ModelOutput(
+                    model_name, False, MODEL_ERROR_MESSAGE, rejected=True
+                )
+            try:
+                with self._call_cancellation(model_id, cancel) as call_cancel:
+                    if prefill is None:
+                        text, terms = self._invoke(
+                            config, request, model_id, on_text, call_cancel
+                        )
+                    else:
+                        text, terms = self._invoke_remainder(
+                            config, request, prefill, model_id, on_text, call_cancel
+                        )
+            except RequestCancelled:
+                latency_seconds = time.perf_counter() - started_at
+                if cancel is not None and cancel.cancelled:
+                    if breaker is not None:
+                        breaker.release(model_id)
+                    self.metrics.model_cancellations.inc(model=model_id)
+                    return ModelOutput(
+                        model_name,
+                        False,
+                        "",
+                        latency_seconds=latency_seconds,
+                        cancelled=True,
+                    )
+                # Other requests to the model failed meanwhile and opened its
+                # circuit, so this one is not awaited either.
+                logger.warning("Circuit opened during the call to %s", model_id)
+                self.metrics.model_failures.inc(model=model_id)
+                return ModelOutput(
+                    model_name,
+                    False,
+                    MODEL_ERROR_MESSAGE,
+                    latency_seconds=latency_seconds,
+                )
+            except RateLimitTimeout:
+                # The app is saturated, not the provider, so the circuit stays
+                # as it is.
+                logger.warning("Shared rate limit exceeded for model_id=%s", model_id)
+                if breaker is not None:
+                    breaker.release(model_id)
+                self.metrics.model_failures.inc(model=model_id)
+                return ModelOutput(
+                    model_name,
+                    False,
+                    MODEL_ERROR_MESSAGE,
+                    latency_seconds=time.perf_counter() - started_at,
+                    rate_limited=True,
+                )
+            except Exception:
+                logger.exception("Model invocation failed for model_id=%s", model_id)
+                self.metrics.model_failures.inc(model=model_id)
+                if breaker is not None:
+                    breaker.record_failure(model_id)
+                return ModelOutput(
+                    model_name,
+                    False,
+                    MODEL_ERROR_MESSAGE,
+                    latency_seconds=time.perf_counter() - started_at,
+                )
+        if breaker is not None:
+            breaker.record_success(model_id)
+        return ModelOutput(
+            model_name,
+            True,
+            text,
+            terms,
+            latency_seconds=time.perf_counter() - started_at,
+            memory_paragraphs=0 if prefill is None else prefill.matched,
+        )
+
+    @contextmanager
+    def _call_cancellation(self, model_id, cancel):
+        """Yield the token of one call: cancelled with `cancel` or when the circuit opens."""
+        if self.circuit_breaker is None:
+            yield cancel
+            return
+        call_cancel = CancellationToken()
+        with ExitStack() as stack:
+            if cancel is not None:
+                stack.enter_context(cancel.on_cancel(call_cancel.cancel))
+            stack.enter_context(
+                self.circuit_breaker.on_open(model_id, call_cancel.cancel)
+            )
+            yield call_cancel
+
+    def circuit_state(self, model_name: str) -> str:
+        """Return the circuit breaker state of a model, closed if there is none."""
+        if self.circuit_breaker is None:
+            return CLOSED
+        return self.circuit_breaker.state(self.config_source().model_ids[model_name])
+
+    def available_models(self, model_names) -> tuple[str, ...]:
+        """Return the models whose circuit is not open, or all if every one is."""
+        available = tuple(
+            name for name in model_names if self.circuit_state(name) != OPEN
+        )
+        return available or tuple(model_names)
+
+    def _collect_circuit_states(self) -> None:
+        model_ids = self.config_source().model_ids.values()
+        for model_id, state in self.circuit_breaker.states(model_ids).items():
+            self.metrics.model_circuit_state.set(STATE_VALUES[state], model=model_id)
+
+    def _prefill(self, request: SimplificationRequest):
+        """Look up remembered paragraphs. None if memory is off or nothing matched."""
+        # A draft covers the whole text, so the memory has nothing to add.
+        if self.translation_memory is None or request.analysis or request.draft:
+            return None
+        try:
+            with self.tracer.span("translation_memory"):
+                prefill = self.translation_memory.prefill(request.text, request.mode)
+        except Exception:
+            # The memory only saves tokens; the request works without it.
+            logger.exception("Translation memory lookup failed")
+            return None
+        self.metrics.translation_memory_paragraphs.inc(prefill.matched, result="hit")
+        self.metrics.translation_memory_paragraphs.inc(prefill.unmatched, result="miss")
+        if not prefill.matched:
+            return None
+        self.metrics.translation_memory_saved_chars.inc(
+            max(len(request.text) - len(prefill.remainder), 0)
+        )
+        return prefill
+
+    def _invoke_remainder(self, config, request, prefill, model_id, on_text, cancel):
+        """Send only the paragraphs the memory did not know and fill in the rest."""
+        if not prefill.remainder:
+            text = prefill.join("")
+            if on_text is not None:
+                on_text(text)
+            return text, ()
+        if on_text is not None and prefill.prefix:
+            on_text("\n\n".join(prefill.prefix) + "\n\n")
+        text, terms = self._invoke(
+            config, replace(request, text=prefill.remainder), model_id, on_text, cancel
+        )
+        if on_text is not None and prefill.suffix:
+            on_text("\n\n" + "\n\n".join(prefill.suffix))
+        return prefill.join(text), terms
+
+    def run(
+        self,
+        request: SimplificationRequest,
+        *,
+        is_good: Callable[[str], bool] = lambda text: True,
+        min_good: int = 0,
+        on_output: Callable[[ModelOutput], None] | None = None,
+        on_wait: Callable[[], None] | None = None,
+        cancel: CancellationToken | None = None,
+    ) -> tuple[ModelOutput, ...]:
+        """Run all models of the request at once, in the order of `request.models`.
+
+        With `min_good`, models that are still running once enough responses
+        pass `is_good` are not awaited and come back as cancelled. `on_output`
+        receives each output as it arrives and `on_wait` is called about twice a
+        second while none does, both in the calling thread. If either raises,
+        or `cancel` is cancelled, the requests still running are aborted.
+        """
+        executor = ThreadPoolExecutor(max_workers=len(request.models))
+        outputs: dict[str, ModelOutput] = {}
+        # The requests of this run, so leaving it aborts them.
+        run_cancel = CancellationToken()
+        # Each worker runs in a copy of this context, so its spans become
+        # children of the caller's span.
+        futures = {
+            name: executor.submit(
+                copy_context().run,
+                self._invoke_in_worker,
+                request,
+                name,
+                outputs,
+                run_cancel,
+            )
+            for name in request.models
+        }
+        try:
+            with (
+                nullcontext() if cancel is None else cancel.on_cancel(run_cancel.cancel)
+            ):
+                completed, _ = collect_until_enough_good(
+                    futures,
+                    is_good=is_good,
+                    min_good=min_good,
+                    on_complete=(
+                        None
+                        if on_output is None
+                        else lambda name: on_output(outputs[name])
+                    ),
+                    on_wait=on_wait,
+                )
+        finally:
+            # Abort and do not wait for models whose results are no longer
+            # needed, which frees their connections and worker threads.
+            run_cancel.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+        return tuple(
+            outputs[name]
+            if name in completed
+            else ModelOutput(name, False, "", cancelled=True)
+            for name in request.models
+        )
+
+    def _invoke_in_worker(
+        self, request, model_name, outputs, cancel
+    ) -> tuple[bool, str]:
+        with self.metrics.worker_threads_busy.track_in_progress():
+            output = self.invoke(request, model_name, cancel=cancel)
+        outputs[model_name] = output
+        return output.success, output.text
+
+    def _invoke(self, config, request, model_id, on_text, cancel):
+        structured = on_text is None and model_id in config.structured_model_ids
+        # Analyses repeat the source sentences, which must stay as they are.
+        format_rules = not request.analysis
+        with self.tracer.span("create_prompt"):
+            final_prompt, system = create_prompt(
+                request.text,
+                analysis=request.analysis,
+                leichte_sprache=request.leichte_sprache,
+                condense_text=request.condense_text,
+                structured=structured,
+                slim_rules=config.api.slim_rules,
+                draft=request.draft,
+            )
+        api = config.api
+        # A budget sized to the request instead of the flat maximum.
+        settings = {
+            **temperature_request_parameters(api.temperature),
+            "max_tokens": max_tokens_for(
+                request.text,
+                ratio=self.output_ratios.ratio(request.mode),
+                headroom=api.token_headroom,
+                min_tokens=config.model_min_tokens.get(model_id, api.min_tokens),
+                max_tokens=api.max_tokens,
+            ),
+        }
+        if structured:
+            settings["response_format"] = response_format(analysis=request.analysis)
+        call = partial(
+            self._request, config, model_id, final_prompt, system, cancel=cancel
+        )
+
+        with self.tracer.span("model_request", model=model_id):
+            if on_text is None:
+                content = self._coalesced(
+                    model_request_key(model_id, final_prompt, system, settings),
+                    partial(call, settings),
+                    cancel,
+                )
+            else:
+                preview = ResultPreview(request.tag, format_rules=format_rules)
+                content = self._stream(call, settings, preview, on_text, cancel)
+        if content is None:
+            raise ValueError("No content received from API")
+        if not structured and is_truncated_response(content, request.tag):
+            with self.tracer.span("continue_response", model=model_id):
+                continued = self._continue(
+                    call, settings, content, request.tag, api.max_continuations
+                )
+            if on_text is not None:
+                # Replay the cut-off response, so only the new text is sent.
+                preview = ResultPreview(request.tag, format_rules=format_rules)
+                preview.feed(content)
+                text = preview.feed(continued[len(content) :])
+                if text:
+                    on_text(text)
+            content = continued
+        if on_text is not None:
+            # The last words wait for the formatting rules until the end.
+            text = preview.flush()
+            if text:
+                on_text(text)
+
+        response_format_name = "json" if structured else "tags"
+        with self.tracer.span(
+            "parse_response", chars=len(content), format=response_format_name
+        ):
+            try:
+                if structured:
+                    result = parse_structured_response(
+                        content, analysis=request.analysis
+                    )
+                    text, terms = result.text, result.terms
+                else:
+                    # Extracts the tagged text, strips markdown and replaces «ß»
+                    # with the Swiss «ss» in a single pass.
+                    parser = TaggedResponseParser(
+                        request.tag, format_rules=format_rules
+                    )
+                    parser.feed(content)
+                    text, terms = parser.finish(), ()
+            except ValueError:
+                self.metrics.response_parse_failures.inc(
+                    model=model_id, format=response_format_name
+                )
+                raise
+        self.output_ratios.record(request.mode, request.text, text)
+        return text, terms
+
+    def _coalesced(self, key, fn, cancel):
+        """Attach concurrent identical requests to the call that is already running."""
+        while True:
+            try:
+                return self.coalescer.do(key, fn, cancel)
+            except RequestCancelled:
+                # The caller that sent the shared request left. The others
+                # try again, and the first of them sends it anew.
+                if cancel is not None and cancel.cancelled:
+                    raise
+
+    def _request(
+        self,
+        config,
+        model_id,
+        final_prompt,
+        system,
+        settings,
+        continuation=(),
+        *,
+        cancel=None,
+    ):
+        """Send one chat completion request. Streamed requests return the stream.
+
+        With `cancel`, the response is streamed even if the caller waits for it
+        in one piece, as only a stream can be closed while the model is writing.
+        """
+        if self.rate_limiter is not None:
+            with self.tracer.span("rate_limit_wait"):
+                if not self.rate_limiter.acquire(config.api.timeout_seconds):
+                    raise RateLimitTimeout("Shared model request rate limit exceeded")
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        client = self.client_for(config.api)
+        messages = [
+            {"role": "system", "content": system},
+            {"role": "user", "content": final_prompt},
+            *continuation,
+        ]
+        if settings.get("stream"):
+            return client.chat.completions.create(
+                model=model_id, **settings, messages=messages
+            )
+        if cancel is not None:
+            return self._receive(client, model_id, settings, messages, cancel)
+        with (
+            self.metrics.models_in_flight.track_in_progress(),
+            self.metrics.model_latency.time(model=model_id),
+        ):
+            message = client.chat.completions.create(
+                model=model_id, **settings, messages=messages
+            )
+        self._record_usage(message.usage, model_id)
+        return message.choices[0].message.content
+
+    def _receive(self, client, model_id, settings, messages, cancel) -> str:
+        received = []
+        with (
+            self.metrics.models_in_flight.track_in_progress(),
+            self.metrics.model_latency.time(model=model_id),
+        ):
+            stream = client.chat.completions.create(
+                model=model_id,
+                **settings,
+                stream=True,
+                stream_options={"include_usage": True},
+                messages=messages,
+            )
+            for chunk in iter_until_cancelled(stream, cancel):
+                # The last chunk has the usage and no choices.
+                self._record_usage(chunk.usage, model_id)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    received.append(chunk.choices[0].delta.content)
+        return "".join(received)
+
+    def _record_usage(self, usage, model_id) -> None:
+        if usage is not None and usage.completion_tokens:
+            self.metrics.completion_tokens.inc(usage.completion_tokens, model=model_id)
+
+    def _stream(self, call, settings, preview, on_text, cancel) -> str:
+        received = []
+        with self.metrics.models_in_flight.track_in_progress():
+            for chunk in iter_until_cancelled(
+                call({**settings, "stream": True}), cancel
+            ):
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    received.append(delta)
+                    text = preview.feed(delta)
+                    if text:
+                        on_text(text)
+        return "".join(received)
+
+    @staticmethod
+    def _continue(call, settings, content, tag, max_continuations) -> str:
+        """Let the model continue a response that was cut off before its closing tag."""
+        for _ in range(max_continuations):
+            if not is_truncated_response(content, tag):
+                break
+            continuation = call(
+                settings,
+                continuation=[
+                    {"role": "assistant", "content": content},
+                    {"role": "user", "content": CONTINUE_RESPONSE.format(tag=tag)},
+                ],
+            )
+            if not continuation:
+                break
+            content = join_continuation(content, continuation, tag)
+        return content
+
+
 def build_log_payload(
     *,
     text: str,
@@ -277,6 +1319,7 @@ def build_log_payload(
     time_processed: float,
     success: bool,
     datetime_format: str,
+    cancelled_models: int = 0,
 ) -> dict[str, object]:
     return {
         "timestamp": datetime.now().strftime(datetime_format),
@@ -289,6 +1332,8 @@ def build_log_payload(
         "model_choice": model_choice,
         "time_processed_seconds": round(time_processed, 3),
         "success": success,
+        # Model requests aborted because the run was abandoned or stopped early.
+        "cancelled_models": cancelled_models,
     }
 
 
@@ -308,6 +1353,152 @@ class JSONFormatter(logging.Formatter):
         return json.dumps(payload, ensure_ascii=False)
 
 
+class BatchRotatingFileHandler(RotatingFileHandler):
+    """Write batches of records as JSON lines with size and time based rotation."""
+
+    def __init__(
+        self,
+        filename: Path,
+        *,
+        max_bytes: int = 0,
+        backup_count: int = 0,
+        rotate_interval_seconds: float = 0,
+    ):
+        super().__init__(
+            filename,
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding="utf-8",
+            delay=True,
+        )
+        self.rotate_interval_seconds = rotate_interval_seconds
+        self._file_started_at = time.time()
+
+    def _needs_rollover(self, size: int) -> bool:
+        if self.stream is None:
+            self.stream = self._open()
+        position = self.stream.tell()
+        if self.maxBytes > 0 and position > 0 and position + size >= self.maxBytes:
+            return True
+        return bool(self.rotate_interval_seconds) and (
+            time.time() - self._file_started_at >= self.rotate_interval_seconds
+        )
+
+    def doRollover(self) -> None:
+        super().doRollover()
+        self._file_started_at = time.time()
+
+    def emit_batch(self, records: list[logging.LogRecord]) -> None:
+        try:
+            data = "".join(self.format(record) + self.terminator for record in records)
+            with self.lock:
+                if self._needs_rollover(len(data.encode("utf-8"))):
+                    self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+                self.stream.write(data)
+                self.stream.flush()
+        except Exception:
+            self.handleError(records[-1])
+
+
+class BufferedEventHandler(QueueHandler):
+    """Hand records to a background writer without ever blocking the caller.
+
+    Records go into a bounded queue. When the queue is full, the record is
+    dropped and counted; the writer logs the number of dropped records with
+    its next batch.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        target: BatchRotatingFileHandler,
+        *,
+        queue_size: int,
+        batch_size: int,
+        flush_interval_seconds: float,
+    ):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.target = target
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.dropped = 0
+        self._reported_dropped = 0
+        self._drop_lock = Lock()
+        self._writer = Thread(target=self._write_batches, name="event-log", daemon=True)
+        self._writer.start()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Records stay in this process, so formatting is left to the writer thread.
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += 1
+
+    def _next_batch(self) -> list:
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.flush_interval_seconds
+        while len(batch) < self.batch_size and batch[-1] is not self._STOP:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(
+                    self.queue.get(timeout=remaining)
+                    if remaining > 0
+                    else self.queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+        return batch
+
+    def _drop_report(self) -> logging.LogRecord | None:
+        with self._drop_lock:
+            newly_dropped = self.dropped - self._reported_dropped
+            self._reported_dropped = self.dropped
+        if newly_dropped == 0:
+            return None
+        record = logging.LogRecord(
+            name="simply_simplify_language.events",
+            level=logging.WARNING,
+            pathname=__file__,
+            lineno=0,
+            msg="event_log_dropped",
+            args=(),
+            exc_info=None,
+        )
+        record.event = {
+            "dropped_records": newly_dropped,
+            "total": self._reported_dropped,
+        }
+        return record
+
+    def _write_batches(self) -> None:
+        while True:
+            batch = self._next_batch()
+            stop = batch[-1] is self._STOP
+            records = [record for record in batch if record is not self._STOP]
+            drop_report = self._drop_report()
+            if drop_report is not None:
+                records.append(drop_report)
+            if records:
+                self.target.emit_batch(records)
+            if stop:
+                return
+
+    def close(self) -> None:
+        if self._writer.is_alive():
+            # Blocking put: the stop marker must not be dropped on a full queue.
+            self.queue.put(self._STOP)
+            self._writer.join(timeout=5)
+        self.target.close()
+        super().close()
+
+
 def configure_event_logger(
     logging_config: dict, *, base_dir: Path = APP_DIR
 ) -> logging.Logger:
@@ -329,13 +1520,93 @@ def configure_event_logger(
     if not log_path.is_absolute():
         log_path = base_dir / log_path
 
-    handler = logging.FileHandler(log_path, encoding="utf-8")
-    handler.setFormatter(JSONFormatter())
+    mode = logging_config.get("mode", "sync")
+    if mode == "sync":
+        handler = logging.FileHandler(log_path, encoding="utf-8")
+        handler.setFormatter(JSONFormatter())
+    elif mode == "queue":
+        target = BatchRotatingFileHandler(
+            log_path,
+            max_bytes=logging_config.get("max_bytes", 0),
+            backup_count=logging_config.get("backup_count", 0),
+            rotate_interval_seconds=logging_config.get("rotate_interval_seconds", 0),
+        )
+        target.setFormatter(JSONFormatter())
+        handler = BufferedEventHandler(
+            target,
+            queue_size=logging_config.get("queue_size", 10000),
+            batch_size=logging_config.get("batch_size", 100),
+            flush_interval_seconds=logging_config.get("flush_interval_seconds", 1.0),
+        )
+    else:
+        raise ValueError("logging.mode must be 'sync' or 'queue'")
     logger.addHandler(handler)
     return logger
 
 
-def write_event_log(logger: logging.Logger, payload: dict[str, object]) -> None:
+def event_log_dropped_records(logger: logging.Logger) -> int:
+    """Count records dropped by buffered handlers because their queue was full."""
+    return sum(getattr(handler, "dropped", 0) for handler in logger.handlers)
+
+
+def write_event_log(
+    logger: logging.Logger,
+    payload: dict[str, object],
+    *,
+    message: str = "model_request",
+) -> None:
     if logger.disabled:
         return
-    logger.info("model_request", extra={"event": payload})
+    logger.info(message, extra={"event": payload})
+
+
+class PhaseProfiler:
+    """Measure consecutive phases of a script run.
+
+    `mark(name)` closes the phase that started at the previous mark (or at
+    `started_at`), either now or at an earlier time `at`. A disabled profiler
+    records nothing.
+    """
+
+    def __init__(
+        self,
+        *,
+        enabled: bool,
+        started_at: float | None = None,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.enabled = enabled
+        self._clock = clock
+        self._started_at = clock() if started_at is None else started_at
+        self._last_mark = self._started_at
+        self.phases_ms: dict[str, float] = {}
+
+    def mark(self, phase: str, *, at: float | None = None) -> None:
+        if not self.enabled:
+            return
+        now = self._clock() if at is None else at
+        self.phases_ms[phase] = round((now - self._last_mark) * 1000, 2)
+        self._last_mark = now
+
+    @property
+    def total_ms(self) -> float:
+        return round((self._last_mark - self._started_at) * 1000, 2)
+
+    def report(self, *, budget_ms: float) -> dict[str, object]:
+        return {
+            "phases_ms": dict(self.phases_ms),
+            "total_ms": self.total_ms,
+            "budget_ms": budget_ms,
+            "over_budget": self.total_ms > budget_ms,
+        }
+
+
+def format_profile_report(report: dict[str, object]) -> str:
+    phases = ", ".join(
+        f"{name} {ms:.1f} ms" for name, ms in report["phases_ms"].items()
+    )
+    status = "über Budget" if report["over_budget"] else "im Budget"
+    return (
+        f"Rerun: {report['total_ms']:.1f} ms ({status}, "
+        f"Budget {report['budget_ms']} ms). {phases}"
+    )
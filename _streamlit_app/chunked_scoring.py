@@ -0,0 +1,128 @@
+import re
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+
+# Texts up to this size are scored in one piece, as in the app (ui.max_chars_input).
+DEFAULT_CHUNK_CHARS = 10000
+
+SENTENCE_END = re.compile(r"(?<=[.!?:])\s+")
+
+
+@dataclass(frozen=True)
+class ChunkScore:
+    index: int
+    # 1-based line of the input where the chunk starts.
+    start_line: int
+    chars: int
+    words: int
+    score: float | None
+
+
+@dataclass(frozen=True)
+class DocumentScore:
+    # Word-weighted mean of the chunk scores, None if no chunk could be scored.
+    score: float | None
+    chunks: tuple[ChunkScore, ...]
+
+
+def _cut(text: str, limit: int) -> int:
+    """Index to cut `text` at: after its last sentence end within `limit`, else at it."""
+    cut = 0
+    for match in SENTENCE_END.finditer(text, 1, limit + 1):
+        cut = min(match.end(), limit)
+    return cut or limit
+
+
+def _pieces(lines: Iterable[str], chunk_chars: int) -> Iterator[tuple[int, str]]:
+    """Yield the paragraphs with their start line, in pieces of at most `chunk_chars`.
+
+    Blank lines end a paragraph. A paragraph that grows beyond `chunk_chars`
+    is cut at its last sentence end while it is read, so text without blank
+    lines is never held in full.
+    """
+    pending = ""
+    start_line = 1
+    for number, line in enumerate(lines, start=1):
+        if not pending:
+            start_line = number
+        pending += line
+        while len(pending) > chunk_chars:
+            cut = _cut(pending, chunk_chars)
+            yield start_line, pending[:cut]
+            start_line += pending.count("\n", 0, cut)
+            pending = pending[cut:]
+        if not line.strip() and pending:
+            yield start_line, pending
+            pending = ""
+    if pending:
+        yield start_line, pending
+
+
+def iter_chunks(
+    lines: Iterable[str], chunk_chars: int = DEFAULT_CHUNK_CHARS
+) -> Iterator[tuple[int, str]]:
+    """Group paragraphs into chunks of at most `chunk_chars` characters.
+
+    Yields each chunk with its start line. A text that fits into one chunk is
+    yielded unchanged. Only one chunk, one piece of a paragraph and one input
+    line are held at a time.
+    """
+    if chunk_chars < 1:
+        raise ValueError("chunk_chars must be at least 1")
+    chunk = ""
+    chunk_start = 1
+    for start_line, piece in _pieces(lines, chunk_chars):
+        if chunk and len(chunk) + len(piece) > chunk_chars:
+            if chunk.strip():
+                yield chunk_start, chunk
+            chunk = ""
+        if not chunk:
+            chunk_start = start_line
+        chunk += piece
+    if chunk.strip():
+        yield chunk_start, chunk
+
+
+def iter_chunk_scores(
+    lines: Iterable[str],
+    score_fn: Callable[[str], float | None],
+    chunk_chars: int = DEFAULT_CHUNK_CHARS,
+) -> Iterator[ChunkScore]:
+    """Score a document chunk by chunk, e.g. a report read line by line from a file."""
+    for index, (start_line, chunk) in enumerate(iter_chunks(lines, chunk_chars)):
+        yield ChunkScore(
+            index=index,
+            start_line=start_line,
+            chars=len(chunk),
+            words=len(chunk.split()),
+            score=score_fn(chunk),
+        )
+
+
+def score_document(
+    lines: Iterable[str],
+    score_fn: Callable[[str], float | None],
+    chunk_chars: int = DEFAULT_CHUNK_CHARS,
+    on_chunk: Callable[[ChunkScore], None] | None = None,
+) -> DocumentScore:
+    """Score a document of any length with the memory of one chunk.
+
+    The document score weights each chunk score by its number of words, so a
+    short last chunk counts less than a full one. A document that fits into
+    one chunk gets exactly the score of `score_fn`.
+    """
+    chunks = []
+    weighted_sum = 0.0
+    scored_words = 0
+    for chunk in iter_chunk_scores(lines, score_fn, chunk_chars):
+        chunks.append(chunk)
+        if on_chunk is not None:
+            on_chunk(chunk)
+        if chunk.score is not None and chunk.words:
+            weighted_sum += chunk.score * chunk.words
+            scored_words += chunk.words
+    if not scored_words:
+        return DocumentScore(None, tuple(chunks))
+    if len(chunks) == 1:
+        return DocumentScore(chunks[0].score, tuple(chunks))
+    return DocumentScore(weighted_sum / scored_words, tuple(chunks))
@@ -0,0 +1,135 @@
+import time
+from collections.abc import Callable, Iterable
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from threading import Lock
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+# Values of the states in the ssl_model_circuit_state gauge.
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+@dataclass
+class _Circuit:
+    state: str = CLOSED
+    failures: int = 0
+    opened_at: float = 0.0
+    probing: bool = False
+    # Callbacks of the calls in flight, run when the circuit opens.
+    on_open: dict[int, Callable[[], object]] = field(default_factory=dict)
+
+
+class CircuitBreaker:
+    """Fail fast on models whose provider keeps failing.
+
+    After `failure_threshold` failures in a row, the circuit of a model opens:
+    its calls are rejected for `cooldown_seconds`, and the calls still waiting
+    for it are aborted. Then one probe call is let through (half open). Its
+    success closes the circuit, its failure opens it for another cool-down.
+    One breaker is shared by all sessions of a process.
+    """
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int,
+        cooldown_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if failure_threshold < 1:
+            raise ValueError("circuit_breaker.failure_threshold must be at least 1")
+        if cooldown_seconds <= 0:
+            raise ValueError("circuit_breaker.cooldown_seconds must be positive")
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._clock = clock
+        self._circuits: dict[str, _Circuit] = {}
+        self._lock = Lock()
+        self._next_id = 0
+
+    def _circuit(self, key: str) -> _Circuit:
+        return self._circuits.setdefault(key, _Circuit())
+
+    def _cooled_down(self, circuit: _Circuit) -> bool:
+        return self._clock() - circuit.opened_at >= self.cooldown_seconds
+
+    def state(self, key: str) -> str:
+        """Return the state, with an open circuit that may be probed as half open."""
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None:
+                return CLOSED
+            if circuit.state == OPEN and self._cooled_down(circuit):
+                return HALF_OPEN
+            return circuit.state
+
+    def states(self, keys: Iterable[str]) -> dict[str, str]:
+        return {key: self.state(key) for key in keys}
+
+    def acquire(self, key: str) -> bool:
+        """Return whether a call may be sent now. A probe must report its outcome."""
+        with self._lock:
+            circuit = self._circuit(key)
+            if circuit.state == CLOSED:
+                return True
+            if circuit.state == OPEN:
+                if not self._cooled_down(circuit):
+                    return False
+                circuit.state = HALF_OPEN
+            if circuit.probing:
+                return False
+            circuit.probing = True
+            return True
+
+    def record_success(self, key: str) -> None:
+        with self._lock:
+            circuit = self._circuit(key)
+            circuit.state = CLOSED
+            circuit.failures = 0
+            circuit.probing = False
+
+    def record_failure(self, key: str) -> None:
+        with self._lock:
+            circuit = self._circuit(key)
+            circuit.failures += 1
+            circuit.probing = False
+            if circuit.state == OPEN or (
+                circuit.state == CLOSED and circuit.failures < self.failure_threshold
+            ):
+                return
+            circuit.state = OPEN
+            circuit.opened_at = self._clock()
+            callbacks = list(circuit.on_open.values())
+            circuit.on_open.clear()
+        for callback in callbacks:
+            callback()
+
+    def release(self, key: str) -> None:
+        """Give up a call without an outcome, e.g. when its caller cancelled it."""
+        with self._lock:
+            self._circuit(key).probing = False
+
+    @contextmanager
+    def on_open(self, key: str, callback: Callable[[], object]):
+        """Call `callback` if the circuit opens while the block runs."""
+        with self._lock:
+            callback_id = self._next_id
+            self._next_id += 1
+            self._circuit(key).on_open[callback_id] = callback
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._circuit(key).on_open.pop(callback_id, None)
+
+
+def create_circuit_breaker(circuit_breaker_config) -> CircuitBreaker | None:
+    """Create the breaker configured in `circuit_breaker`, or None if disabled."""
+    if not circuit_breaker_config.enabled:
+        return None
+    return CircuitBreaker(
+        failure_threshold=circuit_breaker_config.failure_threshold,
+        cooldown_seconds=circuit_breaker_config.cooldown_seconds,
+    )
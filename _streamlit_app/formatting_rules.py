@@ -0,0 +1,237 @@
+import re
+
+# The mechanical formatting rules of RULES_ES and RULES_LS as compiled regexes.
+# No pattern matches across a line break or across the space between two words
+# (letter, space, letter), so `_ResultCleaner` in response_parser.py can format
+# a streamed result at these breaks and gets the same text as for the complete
+# result. The rules only rewrite unambiguous forms: identification numbers
+# (123.456.789, 01-100101-9, 0301234567), ratios (1:10) and abbreviations such
+# as «Mio.» that may end a sentence are left to the model.
+
+MONTHS = (
+    "Januar",
+    "Februar",
+    "März",
+    "April",
+    "Mai",
+    "Juni",
+    "Juli",
+    "August",
+    "September",
+    "Oktober",
+    "November",
+    "Dezember",
+)
+
+_SPACE = r"[^\S\n]"
+# Patterns start with the first character they consume and check what comes
+# before it afterwards, e.g. `\d(?<![\d.]\d)`: a leading lookbehind would keep
+# the regex engine from skipping ahead to the candidate characters, and these
+# rules run over every result.
+_DIGIT = re.compile(r"\d")
+_HOUR = r"(?:[01]?\d|2[0-4])"
+_MINUTE = r"[0-5]\d"
+
+# „Text“, “Text”, "Text" -> «Text». A quote at the start of a line or after a
+# space or bracket opens, any other closes.
+_OPENING_QUOTE = re.compile(r"„|(?<![^\s(\[/])[\"“]")
+_CLOSING_QUOTE = re.compile(r"[\"“”]")
+_ANY_QUOTE = re.compile(r"[„\"“”]")
+
+_PERCENT = re.compile(rf"(\d){_SPACE}?%(?!-)")
+_KILOMETERS_PER_HOUR = re.compile(r"(?<!\w)km/h(?!\w)")
+
+# 8-12 Uhr, 8:00 - 12:30 Uhr -> 8.00-12.30 Uhr
+_TIME_RANGE = re.compile(
+    rf"(\d(?<![\d.,:]\d)\d?)(?:[:.]({_MINUTE}))?{_SPACE}*[-\u2013]{_SPACE}*"
+    rf"({_HOUR})(?:[:.]({_MINUTE}))?{_SPACE}*Uhr(?!\w)"
+)
+# 14 Uhr, 14:30 Uhr -> 14.00 Uhr, 14.30 Uhr
+_TIME = re.compile(
+    rf"(\d(?<![\d.,:\-\u2013]\d)\d?)(?:[:.]({_MINUTE}))?{_SPACE}*Uhr(?!\w)"
+)
+# um 9:30 -> um 9.30 Uhr. Without a preposition, 1:10 may be a ratio.
+_TIME_AFTER_PREPOSITION = re.compile(
+    rf"(?<!\w)(um|ab|bis|gegen){_SPACE}+({_HOUR}):({_MINUTE})(?![\d:])"
+)
+
+# 1.1.2022, 01. 02. 2022 -> 1. Januar 2022, 1. Februar 2022
+_NUMERIC_DATE = re.compile(
+    rf"(\d(?<![\d.]\d)\d?)\.{_SPACE}?(\d\d?)\.{_SPACE}?(\d{{4}})(?!\d|\.\d)"
+)
+# 1. Jan. 2022, 01.Januar -> 1. Januar 2022, 1. Januar
+_MONTH_ABBREVIATIONS = {
+    "Jan": "Januar",
+    "Feb": "Februar",
+    "Mär": "März",
+    "Apr": "April",
+    "Jun": "Juni",
+    "Jul": "Juli",
+    "Aug": "August",
+    "Sep": "September",
+    "Sept": "September",
+    "Okt": "Oktober",
+    "Nov": "November",
+    "Dez": "Dezember",
+}
+_NAMED_DATE = re.compile(
+    rf"(\d(?<![\d.]\d)\d?)\.{_SPACE}*"
+    rf"(?:({'|'.join(MONTHS)})(?!\w)|({'|'.join(_MONTH_ABBREVIATIONS)})\.)"
+)
+
+# +41 (0)44 123 45 67, 044/123 45 67, (044) 1234567 -> 044 123 45 67
+# Ten digits without a separator are only a phone number after «Tel.» and the
+# like; otherwise they may be an account, customer or reference number.
+_PHONE_CONTEXTS = ("Tel. ", "Tel.: ", "Tel: ", "Telefon ", "Telefon: ", "Fax ", "Fax: ")
+_PHONE_CONTEXT = "|".join(f"(?<={re.escape(context)}0)" for context in _PHONE_CONTEXTS)
+_PHONE_TAIL = (
+    rf"{_SPACE}*/?{_SPACE}*(\d{{3}}){_SPACE}?(\d{{2}}){_SPACE}?(\d{{2}})(?!\d)"
+)
+_INTERNATIONAL_PHONE = re.compile(
+    rf"\+41{_SPACE}*(?:\(0\){_SPACE}*)?([1-9]\d)" + _PHONE_TAIL
+)
+_PHONE = re.compile(
+    r"(?:\((0\d{2})\)"
+    rf"|(0(?<![\d+]0)\d{{2}})(?={_SPACE}*/|{_SPACE}+\d)"
+    rf"|(0(?:{_PHONE_CONTEXT})\d{{2}}))" + _PHONE_TAIL
+)
+
+# 1'250'000 -> 1 250 000, 4'500 -> 4500
+_APOSTROPHE_GROUPS = re.compile(
+    r"(?<![\d'\u2019])\d{1,3}(?:['\u2019]\d{3})+(?![\d'\u2019])"
+)
+# Fr. 20, SFr. 20 -> CHF 20. «Fr.» before a name stands for «Frau».
+_FRANC_PREFIX = re.compile(rf"(?<!\w)S?[Ff]r\.{_SPACE}*(?=\d)")
+# Zero rappen dash (20.-, 20.--, or with an en or em dash) -> 20.00
+_ZERO_RAPPEN_DASH = re.compile(r"(\d)\.(?:[\u2013\u2014]|--?)(?![\w\d])")
+# 12.50 Franken, 12.50 Fr., 12.50 CHF -> CHF 12.50
+# Amounts grouped with spaces (1 250.50 CHF) are left alone.
+_RAPPEN_SUFFIX = re.compile(
+    rf"(\d(?<![\d.,]\d)(?<!\d \d)\d*\.\d{{2}}){_SPACE}*(?:Franken|S?[Ff]r\.|CHF)(?!\w)"
+)
+# 20 Fr., 20 CHF -> 20 Franken, CHF 20
+_FRANC_SUFFIX = re.compile(
+    rf"(\d(?<![\d.,]\d)(?<!\d \d)\d*){_SPACE}*(?:(S?[Ff]r\.)|CHF(?!\w))"
+)
+# CHF 12,50 -> CHF 12.50, but CHF 45,2 Millionen stays.
+_RAPPEN_COMMA = re.compile(
+    rf"(CHF{_SPACE}+\d+),(\d{{2}})(?!\d|,\d)(?!{_SPACE}*(?:Mio|Mrd|Milli))"
+)
+# CHF 1250000, 1250000 Franken -> CHF 1 250 000, 1 250 000 Franken
+_LARGE_AMOUNT = re.compile(
+    rf"\d(?:(?<=CHF \d)\d{{4,}}(?!\d|,\d)"
+    rf"|(?<![\d.,]\d)\d{{4,}}(?={_SPACE}+Franken(?!\w)))"
+)
+
+# Abbreviation (letters only, lower case) -> expansion, may end a sentence
+_ABBREVIATIONS = {
+    "zb": ("zum Beispiel", False),
+    "dh": ("das heisst", False),
+    "bzw": ("beziehungsweise", False),
+    "evtl": ("eventuell", False),
+    "ggf": ("gegebenenfalls", False),
+    "inkl": ("inklusive", False),
+    "usw": ("und so weiter", True),
+    "etc": ("etcetera", True),
+}
+# z.B., Z. B., usw. A following line end or capital letter means the period
+# also ends the sentence.
+_ABBREVIATION = re.compile(
+    rf"([zdbegiuZDBEGIU](?<!\w\w)(?:\.{_SPACE}?[bhBH]|zw|vtl|gf|nkl|sw|tc))\."
+    rf"(?P<end>(?={_SPACE}*(?:\n|$)|{_SPACE}+[A-ZÄÖÜ]))?"
+)
+
+
+def _group_thousands(digits: str) -> str:
+    return f"{int(digits):,}".replace(",", " ")
+
+
+def _time(hour: str, minute: str | None) -> str:
+    return f"{int(hour)}.{minute or '00'}"
+
+
+def _time_range(match: re.Match) -> str:
+    if int(match[1]) > 24:
+        return match[0]
+    return f"{_time(match[1], match[2])}-{_time(match[3], match[4])} Uhr"
+
+
+def _clock_time(match: re.Match) -> str:
+    if int(match[1]) > 24:
+        return match[0]
+    return f"{_time(match[1], match[2])} Uhr"
+
+
+def _numeric_date(match: re.Match) -> str:
+    day, month = int(match[1]), int(match[2])
+    if not (1 <= day <= 31 and 1 <= month <= 12):
+        return match[0]
+    return f"{day}. {MONTHS[month - 1]} {match[3]}"
+
+
+def _named_date(match: re.Match) -> str:
+    day = int(match[1])
+    if not 1 <= day <= 31:
+        return match[0]
+    return f"{day}. {match[2] or _MONTH_ABBREVIATIONS[match[3]]}"
+
+
+def _expand(match: re.Match) -> str:
+    abbreviation = match[1]
+    key = abbreviation.replace(".", "").replace(" ", "").lower()
+    if key not in _ABBREVIATIONS:
+        return match[0]
+    expansion, ends_sentence = _ABBREVIATIONS[key]
+    if abbreviation[0].isupper():
+        expansion = expansion[0].upper() + expansion[1:]
+    if ends_sentence and match["end"] is not None:
+        expansion += "."
+    return expansion
+
+
+def _regroup(match: re.Match) -> str:
+    digits = match.group(0).replace("'", "").replace("\u2019", "")
+    return _group_thousands(digits) if len(digits) >= 5 else digits
+
+
+def _normalize_numbers(text: str) -> str:
+    # Cheap substring checks skip the rules that cannot match.
+    if "'" in text or "\u2019" in text:
+        text = _APOSTROPHE_GROUPS.sub(_regroup, text)
+    if "+41" in text:
+        text = _INTERNATIONAL_PHONE.sub(r"+41 \1 \2 \3 \4", text)
+    text = _PHONE.sub(lambda m: f"{m[1] or m[2] or m[3]} {m[4]} {m[5]} {m[6]}", text)
+    text = _NUMERIC_DATE.sub(_numeric_date, text)
+    text = _NAMED_DATE.sub(_named_date, text)
+    if "Uhr" in text:
+        text = _TIME_RANGE.sub(_time_range, text)
+        text = _TIME.sub(_clock_time, text)
+    if ":" in text:
+        text = _TIME_AFTER_PREPOSITION.sub(
+            lambda m: f"{m[1]} {_time(m[2], m[3])} Uhr", text
+        )
+    if "%" in text:
+        text = _PERCENT.sub(r"\1 Prozent", text)
+    text = _ZERO_RAPPEN_DASH.sub(r"\1.00", text)
+    if "Fr." in text or "Franken" in text or "CHF" in text:
+        text = _FRANC_PREFIX.sub("CHF ", text)
+        text = _RAPPEN_SUFFIX.sub(r"CHF \1", text)
+        text = _FRANC_SUFFIX.sub(
+            lambda m: f"{m[1]} Franken" if m[2] else f"CHF {m[1]}", text
+        )
+        text = _RAPPEN_COMMA.sub(r"\1.\2", text)
+        text = _LARGE_AMOUNT.sub(lambda m: _group_thousands(m.group(0)), text)
+    return text
+
+
+def normalize_formatting(text: str) -> str:
+    """Apply the mechanical formatting rules for dates, times, numbers and quotes."""
+    if _DIGIT.search(text):
+        text = _normalize_numbers(text)
+    if "km/h" in text:
+        text = _KILOMETERS_PER_HOUR.sub("Kilometer pro Stunde", text)
+    if "." in text:
+        text = _ABBREVIATION.sub(_expand, text)
+    if _ANY_QUOTE.search(text):
+        text = _CLOSING_QUOTE.sub("»", _OPENING_QUOTE.sub("«", text))
+    return text
@@ -0,0 +1,313 @@
+import bisect
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+
+LabelValues = tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues, **extra: str) -> str:
+    pairs = [*zip(names, values, strict=True), *extra.items()]
+    if not pairs:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = labels
+        self._lock = Lock()
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _header(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, description, labels)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_number(value)}"
+            for key, value in values
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    @contextmanager
+    def track_in_progress(self, **labels: str) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: tuple[str, ...] = (),
+        *,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: bucket counts (non-cumulative), sum and count.
+        self._values: dict[LabelValues, tuple[list[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total, count = self._values.get(
+                key, ([0] * (len(self.buckets) + 1), 0.0, 0)
+            )
+            counts[index] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started_at, **labels)
+
+    def count(self, **labels: str) -> int:
+        return self._values.get(self._key(labels), ([], 0.0, 0))[2]
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = sorted(
+                (key, (counts[:], total, count))
+                for key, (counts, total, count) in self._values.items()
+            )
+        lines = self._header()
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(
+                (*self.buckets, float("inf")), counts, strict=True
+            ):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, le=_format_number(bound))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_number(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """In-process metrics in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[[], None]] = []
+        self._lock = Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric):
+                    raise ValueError(f"metric {metric.name} is already registered")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, description: str, labels=()) -> Counter:
+        return self._register(Counter(name, description, tuple(labels)))
+
+    def gauge(self, name: str, description: str, labels=()) -> Gauge:
+        return self._register(Gauge(name, description, tuple(labels)))
+
+    def histogram(
+        self, name: str, description: str, labels=(), *, buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(
+            Histogram(name, description, tuple(labels), buckets=tuple(buckets))
+        )
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Register a callback that refreshes gauges right before each scrape."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+class AppMetrics:
+    """The metrics recorded by the app, registered on one registry."""
+
+    def __init__(self, registry: MetricsRegistry):
+        self.registry = registry
+        self.model_latency = registry.histogram(
+            "ssl_model_request_duration_seconds",
+            "Duration of model requests through OpenRouter.",
+            ("model",),
+        )
+        self.model_failures = registry.counter(
+            "ssl_model_request_failures_total",
+            "Model requests that failed or returned no usable result.",
+            ("model",),
+        )
+        self.model_cancellations = registry.counter(
+            "ssl_model_request_cancellations_total",
+            "Model requests aborted because their result was no longer needed.",
+            ("model",),
+        )
+        self.model_rejections = registry.counter(
+            "ssl_model_request_rejections_total",
+            "Model requests failed at once because the model's circuit was open.",
+            ("model",),
+        )
+        self.model_circuit_state = registry.gauge(
+            "ssl_model_circuit_state",
+            "Circuit breaker state per model: 0 closed, 1 half open, 2 open.",
+            ("model",),
+        )
+        self.response_parse_failures = registry.counter(
+            "ssl_model_response_parse_failures_total",
+            "Model responses without a usable result, by response format.",
+            ("model", "format"),
+        )
+        self.completion_tokens = registry.counter(
+            "ssl_model_completion_tokens_total",
+            "Completion tokens reported by the provider, including wasted ones.",
+            ("model",),
+        )
+        self.translation_memory_paragraphs = registry.counter(
+            "ssl_translation_memory_paragraphs_total",
+            "Source paragraphs looked up in the translation memory, by result.",
+            ("result",),
+        )
+        self.translation_memory_saved_chars = registry.counter(
+            "ssl_translation_memory_saved_chars_total",
+            "Source characters filled in from memory instead of sent to a model.",
+        )
+        self.models_in_flight = registry.gauge(
+            "ssl_model_requests_in_flight",
+            "Model requests that are currently running.",
+        )
+        self.scoring_duration = registry.histogram(
+            "ssl_zix_scoring_duration_seconds",
+            "Duration of ZIX understandability scoring.",
+            buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+        )
+        self.docx_build_duration = registry.histogram(
+            "ssl_docx_build_duration_seconds",
+            "Duration of building the Word document for download.",
+            buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+        )
+        self.one_click_duration = registry.histogram(
+            "ssl_one_click_duration_seconds",
+            "Wall time of the one-click fan-out to all models.",
+        )
+        self.admission_wait = registry.histogram(
+            "ssl_admission_wait_seconds",
+            "Time requests waited in the admission queue before they started.",
+        )
+        self.admission_rejections = registry.counter(
+            "ssl_admission_rejections_total",
+            "Requests rejected because the app was overloaded.",
+        )
+        self.worker_threads_busy = registry.gauge(
+            "ssl_worker_threads_busy",
+            "Threads of the one-click pools that are running a model request.",
+        )
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry
+
+    def do_GET(self) -> None:
+        if self.path not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        # Scrapes are frequent; keep them out of the app log.
+        pass
+
+
+def start_metrics_server(
+    registry: MetricsRegistry, *, host: str, port: int
+) -> ThreadingHTTPServer:
+    """Serve `/metrics` from a daemon thread."""
+    handler = type(
+        "MetricsRequestHandler", (_MetricsRequestHandler,), {"registry": registry}
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -0,0 +1,186 @@
+import sqlite3
+import statistics
+import time
+from collections.abc import Sequence
+from contextlib import AbstractContextManager
+from dataclasses import dataclass
+from pathlib import Path
+
+try:  # Flat import when run by Streamlit (app dir is on sys.path).
+    from shared_state import sqlite_transaction
+except ImportError:  # Package import (e.g. in tests).
+    from _streamlit_app.shared_state import sqlite_transaction
+
+AUTO_MODEL_CHOICE = "Auto"
+
+
+@dataclass(frozen=True)
+class ModelObservation:
+    model_name: str
+    latency_seconds: float
+    success: bool
+    # Understandability gain of the result over the source text. None for
+    # failed requests and results that could not be scored.
+    zix_gain: float | None = None
+
+
+@dataclass(frozen=True)
+class ModelStats:
+    model_name: str
+    samples: int
+    failure_rate: float
+    latency_p50: float
+    latency_p95: float
+    mean_gain: float | None
+    quality_per_second: float
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(int(fraction * len(ordered)), len(ordered) - 1)
+    return ordered[index]
+
+
+def summarize_observations(
+    model_name: str, observations: Sequence[ModelObservation]
+) -> ModelStats:
+    """Aggregate the observations of one model into routing statistics.
+
+    Quality per second is the expected ZIX gain per request (mean gain times
+    success rate) divided by the median latency. A model without any positive
+    gain is ranked by gain times latency instead, so a slow model that makes
+    texts harder always ranks below a fast one.
+    """
+    if not observations:
+        raise ValueError("observations must not be empty")
+    latencies = [observation.latency_seconds for observation in observations]
+    gains = [
+        observation.zix_gain
+        for observation in observations
+        if observation.success and observation.zix_gain is not None
+    ]
+    failure_rate = sum(not observation.success for observation in observations) / len(
+        observations
+    )
+    mean_gain = statistics.fmean(gains) if gains else None
+    latency_p50 = max(_percentile(latencies, 0.5), 0.001)
+
+    expected_gain = (mean_gain or 0.0) * (1 - failure_rate)
+    if expected_gain > 0:
+        quality_per_second = expected_gain / latency_p50
+    else:
+        quality_per_second = expected_gain * latency_p50 - failure_rate
+
+    return ModelStats(
+        model_name=model_name,
+        samples=len(observations),
+        failure_rate=failure_rate,
+        latency_p50=latency_p50,
+        latency_p95=_percentile(latencies, 0.95),
+        mean_gain=mean_gain,
+        quality_per_second=quality_per_second,
+    )
+
+
+class ModelStatsStore:
+    """Local SQLite file with the latest observations per model."""
+
+    def __init__(self, path: Path, window: int = 50):
+        if window < 1:
+            raise ValueError("routing.window must be at least 1")
+        self.path = path
+        self.window = window
+        with self._transaction() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS model_observations ("
+                "model_name TEXT NOT NULL, latency_seconds REAL NOT NULL, "
+                "success INTEGER NOT NULL, zix_gain REAL, observed_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS model_observations_by_model "
+                "ON model_observations (model_name, observed_at)"
+            )
+
+    def _transaction(self) -> AbstractContextManager[sqlite3.Connection]:
+        return sqlite_transaction(self.path)
+
+    def add(self, observation: ModelObservation) -> None:
+        with self._transaction() as connection:
+            connection.execute(
+                "INSERT INTO model_observations "
+                "(model_name, latency_seconds, success, zix_gain, observed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    observation.model_name,
+                    observation.latency_seconds,
+                    int(observation.success),
+                    observation.zix_gain,
+                    time.time(),
+                ),
+            )
+            # Keep only the sliding window, so the file stays small.
+            connection.execute(
+                "DELETE FROM model_observations WHERE model_name = ? AND rowid NOT IN ("
+                "SELECT rowid FROM model_observations WHERE model_name = ? "
+                "ORDER BY observed_at DESC, rowid DESC LIMIT ?)",
+                (observation.model_name, observation.model_name, self.window),
+            )
+
+    def recent(self, model_name: str) -> list[ModelObservation]:
+        with self._transaction() as connection:
+            rows = connection.execute(
+                "SELECT latency_seconds, success, zix_gain FROM model_observations "
+                "WHERE model_name = ? ORDER BY observed_at DESC, rowid DESC LIMIT ?",
+                (model_name, self.window),
+            ).fetchall()
+        return [
+            ModelObservation(model_name, latency, bool(success), gain)
+            for latency, success, gain in rows
+        ]
+
+
+class ModelRouter:
+    """Route "Auto" requests to the model with the best quality per second.
+
+    Models with fewer than `min_samples` observations in the window are tried
+    first, in config order, so every model gets measured before routing
+    settles. Ties keep the config order.
+    """
+
+    def __init__(self, store: ModelStatsStore, *, min_samples: int = 3):
+        if min_samples < 0:
+            raise ValueError("routing.min_samples must not be negative")
+        self.store = store
+        self.min_samples = min_samples
+
+    def record(self, observation: ModelObservation) -> None:
+        self.store.add(observation)
+
+    def stats(self, model_names: Sequence[str]) -> list[ModelStats]:
+        stats = []
+        for name in model_names:
+            observations = self.store.recent(name)
+            if observations:
+                stats.append(summarize_observations(name, observations))
+        return stats
+
+    def choose(self, model_names: Sequence[str]) -> str:
+        if not model_names:
+            raise ValueError("model_names must not be empty")
+        stats = {item.model_name: item for item in self.stats(model_names)}
+        for name in model_names:
+            item = stats.get(name)
+            if item is None or item.samples < self.min_samples:
+                return name
+        return max(model_names, key=lambda name: stats[name].quality_per_second)
+
+
+def create_model_router(routing_config, *, base_dir: Path) -> ModelRouter:
+    """Create the router with the stats store configured in the `routing` section."""
+    path = Path(routing_config.stats_path)
+    if not path.is_absolute():
+        path = base_dir / path
+    return ModelRouter(
+        ModelStatsStore(path, routing_config.window),
+        min_samples=routing_config.min_samples,
+    )
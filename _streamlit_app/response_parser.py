@@ -0,0 +1,202 @@
+import re
+
+try:  # Flat import when run by Streamlit (app dir is on sys.path).
+    from formatting_rules import normalize_formatting
+except ImportError:  # Package import (e.g. in tests).
+    from _streamlit_app.formatting_rules import normalize_formatting
+
+_HEADER_PATTERN = re.compile(r"#+\s")
+
+
+def _last_break(text: str, start: int) -> int:
+    """Index after the last line break or word break from `start` on, or 0.
+
+    A word break is one space between two letters. No formatting rule matches
+    across a line or word break, so the text before it can be formatted.
+    """
+    line_start = text.rfind("\n", start) + 1
+    space = len(text) - 1
+    while (space := text.rfind(" ", max(start, line_start, 1), space)) != -1:
+        if text[space - 1].isalpha() and text[space + 1].isalpha():
+            return space + 1
+    return line_start
+
+
+def _held_tail_start(text: str) -> int:
+    """Index of the trailing run of '#' and whitespace, which needs more input."""
+    index = len(text)
+    while index and (text[index - 1] == "#" or text[index - 1].isspace()):
+        index -= 1
+    return index
+
+
+class _ResultCleaner:
+    """Strip, remove markdown and normalize ß and formatting while text is appended.
+
+    Gives the same result as `strip()`, then `strip_markdown`, then replacing
+    ß, then `normalize_formatting` over the complete text. A trailing run of
+    '#' and whitespace is held back until the next text shows whether it is a
+    header marker or trailing whitespace. The cleaned text is then held back to
+    the last break between two words or lines, where no formatting rule can
+    match across. Without `format_rules`, `normalize_formatting` is skipped.
+    """
+
+    def __init__(self, *, format_rules: bool = True):
+        self.format_rules = format_rules
+        self.started = False
+        self._held = ""
+        self._unformatted = ""
+
+    def feed(self, text: str) -> str:
+        text = self._held + text
+        if not self.started:
+            text = text.lstrip()
+            if not text:
+                self._held = ""
+                return ""
+            self.started = True
+        cut = _held_tail_start(text)
+        self._held = text[cut:]
+        return self._format(self._clean(text[:cut]))
+
+    def finish(self) -> str:
+        text, self._held = self._held.rstrip(), ""
+        return self._format(self._clean(text), final=True)
+
+    @staticmethod
+    def _clean(text: str) -> str:
+        if "#" in text:
+            text = _HEADER_PATTERN.sub("", text)
+        # Drop bold and italic markers. Models often return the German letter
+        # «ß»; the app uses the Swiss «ss». Plain replaces beat str.translate here,
+        # which falls back to a slow path for multi-character replacements.
+        return text.replace("*", "").replace("_", "").replace("ß", "ss")
+
+    def _format(self, text: str, *, final: bool = False) -> str:
+        if not self.format_rules:
+            return text
+        scan_from = len(self._unformatted)
+        text = self._unformatted + text
+        # Only the new text can add a break; earlier ones were taken already.
+        cut = len(text) if final else _last_break(text, max(scan_from - 1, 0))
+        self._unformatted = text[cut:]
+        return normalize_formatting(text[:cut]) if cut else ""
+
+
+class TaggedResponseParser:
+    """Incrementally extract and clean the text between result tags.
+
+    Feed the response in chunks as they arrive. Each character is looked at a
+    constant number of times, however the response is split. Text in several
+    tag pairs is joined with newlines. A pair that is still open at the end is
+    ignored, as with `extract_tagged_response`. Analyses quote the source and
+    advise on formatting, so they are parsed without `format_rules`.
+    """
+
+    def __init__(self, tag: str, *, format_rules: bool = True):
+        self.tag = tag
+        self._open = f"<{tag}>"
+        self._close = f"</{tag}>"
+        self._inside = False
+        self._buffer = ""
+        self._segment: list[str] = []
+        self._segments = 0
+        self._cleaner = _ResultCleaner(format_rules=format_rules)
+        self._output: list[str] = []
+
+    def feed(self, chunk: str) -> str:
+        """Consume a chunk and return the cleaned text that became final with it."""
+        buffer = self._buffer + chunk
+        start = 0
+        new_output = []
+        while True:
+            if not self._inside:
+                index = buffer.find(self._open, start)
+                if index == -1:
+                    # Keep a possible partial opening tag for the next chunk.
+                    start = max(start, len(buffer) - len(self._open) + 1)
+                    break
+                start = index + len(self._open)
+                self._inside = True
+            else:
+                index = buffer.find(self._close, start)
+                if index == -1:
+                    keep_from = max(start, len(buffer) - len(self._close) + 1)
+                    new_output.append(self._append(buffer[start:keep_from]))
+                    start = keep_from
+                    break
+                new_output.append(self._append(buffer[start:index]))
+                new_output.append(self._commit_segment())
+                start = index + len(self._close)
+                self._inside = False
+        self._buffer = buffer[start:]
+        text = "".join(new_output)
+        if text:
+            self._output.append(text)
+        return text
+
+    def _append(self, text: str) -> str:
+        self._segment.append(text)
+        return ""
+
+    def _commit_segment(self) -> str:
+        segment = "".join(self._segment)
+        self._segment = []
+        if self._segments:
+            segment = "\n" + segment
+        self._segments += 1
+        return self._cleaner.feed(segment)
+
+    def finish(self) -> str:
+        """Return the complete cleaned result. Raise ValueError if there is none."""
+        if not self._segments:
+            raise ValueError(
+                f"Model response did not contain expected <{self.tag}> tags"
+            )
+        if not self._cleaner.started:
+            raise ValueError(f"Model response contained empty <{self.tag}> tags")
+        self._output.append(self._cleaner.finish())
+        return "".join(self._output)
+
+
+class ResultPreview(TaggedResponseParser):
+    """Like `TaggedResponseParser`, but return text as soon as it arrives.
+
+    `feed` does not wait for the closing tag, so a streamed result can be shown
+    while the model writes it. Together with `flush`, the preview equals the
+    final result unless the response ends inside a tag pair, which the final
+    result drops.
+    """
+
+    def __init__(self, tag: str, *, format_rules: bool = True):
+        super().__init__(tag, format_rules=format_rules)
+        self._segment_open = False
+
+    def _append(self, text: str) -> str:
+        if not self._segment_open:
+            self._segment_open = True
+            if self._segments:
+                text = "\n" + text
+        return self._cleaner.feed(text)
+
+    def _commit_segment(self) -> str:
+        self._segment_open = False
+        self._segments += 1
+        return ""
+
+    def flush(self) -> str:
+        """Return the text still held back for formatting once the response ended."""
+        return self._cleaner.finish()
+
+
+def parse_tagged_response(response: str, tag: str, *, format_rules: bool = True) -> str:
+    """Extract, strip and clean the tagged result of a complete response."""
+    parser = TaggedResponseParser(tag, format_rules=format_rules)
+    parser.feed(response)
+    return parser.finish()
+
+
+def clean_result_text(text: str, *, format_rules: bool = True) -> str:
+    """Clean text as the text between result tags: markdown, ß and formatting."""
+    cleaner = _ResultCleaner(format_rules=format_rules)
+    return cleaner.feed(text) + cleaner.finish()
@@ -0,0 +1,115 @@
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from contextlib import AbstractContextManager
+from pathlib import Path
+from threading import Lock
+from typing import Protocol
+
+try:  # Flat import when run by Streamlit (app dir is on sys.path).
+    from shared_state import sqlite_transaction
+except ImportError:  # Package import (e.g. in tests).
+    from _streamlit_app.shared_state import sqlite_transaction
+
+ResultPayload = dict[str, object]
+
+
+class ResultStore(Protocol):
+    def get(self, result_id: str) -> ResultPayload | None: ...
+
+    def put(self, result_id: str, payload: ResultPayload) -> None: ...
+
+
+class InMemoryResultStore:
+    """Process-wide LRU store. Shared by all sessions, lost on restart."""
+
+    def __init__(self, max_entries: int = 500):
+        if max_entries < 1:
+            raise ValueError("results.max_entries must be at least 1")
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, ResultPayload] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, result_id: str) -> ResultPayload | None:
+        with self._lock:
+            payload = self._entries.get(result_id)
+            if payload is not None:
+                self._entries.move_to_end(result_id)
+            return payload
+
+    def put(self, result_id: str, payload: ResultPayload) -> None:
+        with self._lock:
+            self._entries[result_id] = payload
+            self._entries.move_to_end(result_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteResultStore:
+    """Local SQLite store that keeps results across restarts."""
+
+    def __init__(self, path: Path, max_entries: int = 500):
+        if max_entries < 1:
+            raise ValueError("results.max_entries must be at least 1")
+        self.path = path
+        self.max_entries = max_entries
+        with self._transaction() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "result_id TEXT PRIMARY KEY, payload TEXT NOT NULL, "
+                "accessed_at REAL NOT NULL)"
+            )
+
+    def _transaction(self) -> AbstractContextManager[sqlite3.Connection]:
+        # A short-lived connection per call keeps the store safe to use from
+        # Streamlit script threads, model worker threads and other replicas alike.
+        return sqlite_transaction(self.path)
+
+    def get(self, result_id: str) -> ResultPayload | None:
+        with self._transaction() as connection:
+            row = connection.execute(
+                "SELECT payload FROM results WHERE result_id = ?", (result_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE results SET accessed_at = ? WHERE result_id = ?",
+                (time.time(), result_id),
+            )
+        return json.loads(row[0])
+
+    def put(self, result_id: str, payload: ResultPayload) -> None:
+        with self._transaction() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO results (result_id, payload, accessed_at) "
+                "VALUES (?, ?, ?)",
+                (result_id, json.dumps(payload, ensure_ascii=False), time.time()),
+            )
+            connection.execute(
+                "DELETE FROM results WHERE result_id NOT IN ("
+                "SELECT result_id FROM results ORDER BY accessed_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def __len__(self) -> int:
+        with self._transaction() as connection:
+            return connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+def create_result_store(results_config: dict, *, base_dir: Path) -> ResultStore:
+    """Create the result store selected in the `results` config section."""
+    backend = results_config.get("backend", "memory")
+    max_entries = results_config.get("max_entries", 500)
+
+    if backend == "memory":
+        return InMemoryResultStore(max_entries)
+    if backend == "sqlite":
+        path = Path(results_config.get("sqlite_path", "results.sqlite3"))
+        if not path.is_absolute():
+            path = base_dir / path
+        return SQLiteResultStore(path, max_entries)
+    raise ValueError("results.backend must be 'memory' or 'sqlite'")
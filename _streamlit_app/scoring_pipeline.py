@@ -0,0 +1,67 @@
+import logging
+import sys
+from collections.abc import Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+def find_pipelines(package: str = "zix") -> list:
+    """Return the spaCy pipelines held by the loaded modules of `package`."""
+    pipelines = {}
+    for name, module in list(sys.modules.items()):
+        if module is None or (name != package and not name.startswith(f"{package}.")):
+            continue
+        for value in list(vars(module).values()):
+            if hasattr(value, "pipe_names") and hasattr(value, "remove_pipe"):
+                pipelines[id(value)] = value
+    return list(pipelines.values())
+
+
+def slim_pipelines(
+    pipelines: Iterable, components: Iterable[str], max_chars: int
+) -> list[str]:
+    """Remove `components` from each pipeline and cap the text length it accepts.
+
+    Removing rather than disabling also frees the components' weights. Components
+    a pipeline does not have are skipped. Returns the removed component names.
+    """
+    removed = []
+    for nlp in pipelines:
+        for component in components:
+            if component in nlp.pipe_names:
+                nlp.remove_pipe(component)
+                removed.append(component)
+        nlp.max_length = max_chars
+    return removed
+
+
+def capped_score(
+    score_fn: Callable[[str], float | None], max_chars: int
+) -> Callable[[str], float | None]:
+    """Wrap `score_fn` to return None for texts longer than `max_chars`."""
+
+    def score(text: str) -> float | None:
+        if len(text) > max_chars:
+            return None
+        return score_fn(text)
+
+    return score
+
+
+def configure_scoring(
+    score_fn: Callable[[str], float | None], scoring_config
+) -> Callable[[str], float | None]:
+    """Slim the loaded ZIX pipelines as configured in `scoring`.
+
+    Call after importing `zix.understandability`. Returns the score function to
+    use instead of `score_fn`.
+    """
+    pipelines = find_pipelines()
+    if not pipelines:
+        logger.warning("No spaCy pipeline found in zix; scoring is not slimmed")
+    removed = slim_pipelines(
+        pipelines, scoring_config.remove_components, scoring_config.max_chars
+    )
+    if removed:
+        logger.info("Removed spaCy components from the ZIX pipeline: %s", removed)
+    return capped_score(score_fn, scoring_config.max_chars)
@@ -0,0 +1,189 @@
+import hashlib
+import sqlite3
+import time
+from collections.abc import Callable, Iterator
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+
+def connect_sqlite(path: Path) -> sqlite3.Connection:
+    """Open a connection that several processes can use at the same time.
+
+    WAL mode lets readers continue while one process writes, and the busy
+    timeout makes concurrent writers wait instead of failing.
+    """
+    connection = sqlite3.connect(path, timeout=10)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+@contextmanager
+def sqlite_transaction(path: Path) -> Iterator[sqlite3.Connection]:
+    """Run one transaction on a fresh connection and close it afterwards.
+
+    `with connection:` alone commits or rolls back, but leaves the connection
+    open until it is garbage collected.
+    """
+    with closing(connect_sqlite(path)) as connection, connection:
+        yield connection
+
+
+def _text_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class SQLiteScoreCache:
+    """ZIX scores by text hash, shared by all replicas that use the same file."""
+
+    def __init__(self, path: Path, max_entries: int = 5000):
+        if max_entries < 1:
+            raise ValueError("shared_state.score_cache_entries must be at least 1")
+        self.path = path
+        self.max_entries = max_entries
+        with sqlite_transaction(path) as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS scores ("
+                "text_hash TEXT PRIMARY KEY, score REAL, created_at REAL NOT NULL)"
+            )
+
+    def get_or_compute(
+        self, text: str, compute: Callable[[str], float | None]
+    ) -> float | None:
+        key = _text_key(text)
+        with sqlite_transaction(self.path) as connection:
+            row = connection.execute(
+                "SELECT score FROM scores WHERE text_hash = ?", (key,)
+            ).fetchone()
+        if row is not None:
+            return row[0]
+
+        score = compute(text)
+        with sqlite_transaction(self.path) as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO scores (text_hash, score, created_at) "
+                "VALUES (?, ?, ?)",
+                (key, score, time.time()),
+            )
+            # Row IDs grow with every insert, so this drops the oldest entries
+            # without counting the table.
+            connection.execute(
+                "DELETE FROM scores WHERE rowid <= (SELECT MAX(rowid) FROM scores) - ?",
+                (self.max_entries,),
+            )
+        return score
+
+
+class SQLiteRateLimiter:
+    """Token bucket for model requests, shared by all replicas.
+
+    The bucket holds up to `burst` requests and refills at
+    `requests_per_minute`. Each acquisition runs in an immediate transaction,
+    so concurrent processes never hand out the same token.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        requests_per_minute: float,
+        burst: int,
+        name: str = "model_requests",
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if requests_per_minute <= 0:
+            raise ValueError("shared_state.requests_per_minute must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.path = path
+        self.rate_per_second = requests_per_minute / 60
+        self.burst = burst
+        self.name = name
+        self._clock = clock
+        self._sleep = sleep
+        with sqlite_transaction(path) as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits ("
+                "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "INSERT OR IGNORE INTO rate_limits (name, tokens, updated_at) "
+                "VALUES (?, ?, ?)",
+                (name, burst, clock()),
+            )
+
+    def _try_acquire(self) -> float:
+        """Take a token if one is available. Return 0, or the seconds to wait."""
+        connection = connect_sqlite(self.path)
+        connection.isolation_level = None
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            tokens, updated_at = connection.execute(
+                "SELECT tokens, updated_at FROM rate_limits WHERE name = ?",
+                (self.name,),
+            ).fetchone()
+            now = self._clock()
+            tokens = min(
+                self.burst, tokens + max(now - updated_at, 0) * self.rate_per_second
+            )
+            wait_seconds = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait_seconds = (1 - tokens) / self.rate_per_second
+            connection.execute(
+                "UPDATE rate_limits SET tokens = ?, updated_at = ? WHERE name = ?",
+                (tokens, now, self.name),
+            )
+            connection.execute("COMMIT")
+            return wait_seconds
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+
+    def acquire(self, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for a request slot."""
+        deadline = self._clock() + timeout
+        while True:
+            wait_seconds = self._try_acquire()
+            if wait_seconds == 0:
+                return True
+            remaining = deadline - self._clock()
+            if remaining <= 0:
+                return False
+            self._sleep(min(wait_seconds, remaining))
+
+
+@dataclass(frozen=True)
+class SharedState:
+    path: Path
+    score_cache: SQLiteScoreCache
+    rate_limiter: SQLiteRateLimiter | None
+
+
+def create_shared_state(
+    shared_state_config, *, base_dir: Path, burst: int
+) -> SharedState | None:
+    """Open the state shared between replicas, or return None if it is disabled."""
+    if not shared_state_config.enabled:
+        return None
+    path = Path(shared_state_config.path)
+    if not path.is_absolute():
+        path = base_dir / path
+    rate_limiter = None
+    if shared_state_config.requests_per_minute:
+        rate_limiter = SQLiteRateLimiter(
+            path,
+            requests_per_minute=shared_state_config.requests_per_minute,
+            burst=burst,
+        )
+    return SharedState(
+        path=path,
+        score_cache=SQLiteScoreCache(path, shared_state_config.score_cache_entries),
+        rate_limiter=rate_limiter,
+    )
@@ -1,6 +1,12 @@
 # ---------------------------------------------------------------
 # Imports
 
+import time
+
+# Streamlit reruns this whole script on every interaction. Keep the start time so
+# the optional rerun profile covers imports as well.
+RERUN_STARTED_AT = time.perf_counter()
+
 import streamlit as st
 
 st.set_page_config(layout="wide")
@@ -8,95 +14,242 @@ st.set_page_config(layout="wide")
 import io
 import logging
 import os
-import time
-from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
 from datetime import datetime
-
+from threading import Thread
+from uuid import uuid4
+
+from admission import (
+    PRIORITY_ONE_CLICK,
+    PRIORITY_SINGLE,
+    Overloaded,
+    create_admission_controller,
+)
+from app_config import ConfigWatcher
 from app_core import (
     APP_DIR,
+    ModelResult,
+    PhaseProfiler,
     ResultState,
+    SimplificationEngine,
+    SimplificationRequest,
     app_path,
     build_log_payload,
     classify_understandability,
+    compute_result_id,
     configure_event_logger,
     create_prompt,
-    extract_tagged_response,
-    format_one_click_results,
+    event_log_dropped_records,
+    format_model_results,
+    format_profile_report,
     format_understandability_message,
     get_cefr,
     get_zix,
+    http2_available,
     load_project_info,
-    load_yaml_config,
+    memoize_scores,
+    prewarm_connections,
+    rank_model_results,
     repo_path,
+    result_from_payload,
     result_models_used,
+    result_to_payload,
     rounded_score,
+    score_model_results,
     start_understandability_loading,
-    strip_markdown,
-    temperature_request_parameters,
     write_event_log,
 )
+from circuit_breaker import HALF_OPEN, OPEN, create_circuit_breaker
 from dotenv import load_dotenv
+from metrics import AppMetrics, MetricsRegistry, start_metrics_server
+from model_routing import AUTO_MODEL_CHOICE, ModelObservation, create_model_router
+from result_store import SQLiteResultStore, create_result_store
+from shared_state import create_shared_state
+from tracing import create_tracer
+from translation_memory import create_translation_memory
 from utils_prompts import SAMPLE_TEXT
 
 # ---------------------------------------------------------------
 # Constants
 
-load_dotenv(app_path(".env"))
+IMPORTS_DONE_AT = time.perf_counter()
 
 logger = logging.getLogger(__name__)
 
-API_KEYS = {
-    "OPENROUTER": os.getenv("OPENROUTER_API_KEY"),
-}
+
+@st.cache_resource
+def get_api_keys():
+    """Read the .env file once per process instead of on every rerun."""
+    load_dotenv(app_path(".env"))
+    return {
+        "OPENROUTER": os.getenv("OPENROUTER_API_KEY"),
+    }
+
+
+API_KEYS = get_api_keys()
+
+
+@st.cache_resource
+def get_config_watcher():
+    """Load and validate the configuration once per process and watch for changes."""
+    return ConfigWatcher(repo_path("config.yaml"))
+
+
+# Each script run works with one consistent config snapshot. Edits to config.yaml
+# (models, timeouts, limits) take effect on the next rerun without a restart.
+CONFIG = get_config_watcher().current()
+MODEL_IDS = CONFIG.model_ids
+MODEL_NAMES = list(CONFIG.model_names)
+
+PROFILER = PhaseProfiler(enabled=CONFIG.profile_reruns, started_at=RERUN_STARTED_AT)
+PROFILER.mark("imports", at=IMPORTS_DONE_AT)
+
+
+@st.cache_resource
+def get_event_logger(logging_config):
+    """Configure the event log handler once per logging config, not per rerun."""
+    return configure_event_logger(logging_config, base_dir=APP_DIR)
+
+
+EVENT_LOGGER = get_event_logger(CONFIG.logging)
+
+
+@st.cache_resource
+def get_metrics():
+    """Create the process-wide metrics and serve them if enabled in the config."""
+    registry = MetricsRegistry()
+    app_metrics = AppMetrics(registry)
+    event_log_dropped = registry.gauge(
+        "ssl_event_log_dropped_records",
+        "Event log records dropped because the log buffer was full.",
+    )
+    registry.add_collector(
+        lambda: event_log_dropped.set(event_log_dropped_records(EVENT_LOGGER))
+    )
+    if CONFIG.metrics.enabled:
+        start_metrics_server(
+            registry, host=CONFIG.metrics.host, port=CONFIG.metrics.port
+        )
+    return app_metrics
+
+
+METRICS = get_metrics()
 
 
 @st.cache_resource
-def load_config():
-    """Load configuration from YAML file."""
-    return load_yaml_config(repo_path("config.yaml"))
-
-
-# Load configuration
-config = load_config()
-
-# Create model dictionaries from config
-MODEL_IDS = {model["name"]: model["id"] for model in config["models"]}
-MODEL_NAMES = list(MODEL_IDS.keys())
-
-# Get configuration values from config
-TEMPERATURE = config["api"]["temperature"]
-MAX_TOKENS = config["api"]["max_tokens"]
-API_BASE_URL = config["api"]["base_url"]
-API_TIMEOUT_SECONDS = config["api"]["timeout_seconds"]
-API_MAX_RETRIES = config["api"]["max_retries"]
-TEXT_AREA_HEIGHT = config["ui"]["text_area_height"]
-MAX_CHARS_INPUT = config["ui"]["max_chars_input"]
-USER_WARNING = f"<sub>{config['ui']['user_warning']}</sub>"
-
-# Document formatting constants
-FONT_WORDDOC = config["document"]["font_name"]
-FONT_SIZE_HEADING = config["document"]["font_size_heading"]
-FONT_SIZE_PARAGRAPH = config["document"]["font_size_paragraph"]
-FONT_SIZE_FOOTER = config["document"]["font_size_footer"]
-DEFAULT_OUTPUT_FILENAME = config["document"]["default_output_filename"]
-ANALYSIS_FILENAME = config["document"]["analysis_filename"]
-PAGE_WIDTH_INCHES = config["document"]["page_width_inches"]
-PAGE_HEIGHT_INCHES = config["document"]["page_height_inches"]
-DOWNLOAD_MIME_TYPE = config["document"]["download_mime_type"]
-
-# Understandability limits
-LIMIT_HARD = config["understandability"]["limit_hard"]
-LIMIT_MEDIUM = config["understandability"]["limit_medium"]
-METRIC_LABEL = config["understandability"]["metric_label"]
-METRIC_HELP = config["understandability"]["metric_help"]
-
-DATETIME_FORMAT = config["app"]["datetime_format"]
-EVENT_LOGGER = configure_event_logger(config["logging"], base_dir=APP_DIR)
+def get_tracer():
+    """Create the process-wide tracer. Disabled tracing hands out no-op spans."""
+    return create_tracer(CONFIG.tracing, base_dir=APP_DIR)
+
+
+TRACER = get_tracer()
+
+
+@st.cache_resource
+def get_shared_state():
+    """Open the state that several replicas share, or None if it is disabled."""
+    return create_shared_state(
+        CONFIG.shared_state, base_dir=APP_DIR, burst=len(CONFIG.models)
+    )
+
+
+SHARED_STATE = get_shared_state()
+PROFILER.mark("config")
 
 # ---------------------------------------------------------------
 # Functions
 
 
+@st.cache_resource
+def get_result_store():
+    """Create one result store that is shared by all sessions of this process.
+
+    With shared state, all replicas use the same SQLite store instead.
+    """
+    if SHARED_STATE is not None:
+        return SQLiteResultStore(
+            SHARED_STATE.path, CONFIG.results.get("max_entries", 500)
+        )
+    return create_result_store(CONFIG.results, base_dir=APP_DIR)
+
+
+@st.cache_resource
+def get_model_router():
+    """Open the persisted per-model stats behind the "Auto" model choice."""
+    routing = CONFIG.routing
+    if SHARED_STATE is not None:
+        routing = replace(routing, stats_path=str(SHARED_STATE.path))
+    return create_model_router(routing, base_dir=APP_DIR)
+
+
+def record_model_observation(model_name, latency_seconds, success, score, score_source):
+    """Add one finished model call to the routing stats."""
+    if not CONFIG.routing.enabled:
+        return
+    gain = None if score is None or score_source is None else score - score_source
+    try:
+        get_model_router().record(
+            ModelObservation(model_name, latency_seconds, success, gain)
+        )
+    except Exception:
+        # Routing stats are best effort and must never fail a request.
+        logger.exception("Recording routing stats failed for %s", model_name)
+
+
+def format_model_option(name):
+    """Mark models that the circuit breaker keeps from being used."""
+    if name == AUTO_MODEL_CHOICE:
+        return name
+    state = get_simplification_engine().circuit_state(name)
+    if state == OPEN:
+        return f"{name} (gestört)"
+    if state == HALF_OPEN:
+        return f"{name} (wird geprüft)"
+    return name
+
+
+def resolve_model_choice(choice):
+    """Return the model to use. "Auto" picks the best model from the routing stats."""
+    if choice != AUTO_MODEL_CHOICE:
+        return choice
+    try:
+        # Models whose provider is down are left out.
+        return get_model_router().choose(
+            get_simplification_engine().available_models(MODEL_NAMES)
+        )
+    except Exception:
+        logger.exception("Routing failed, falling back to the first model")
+        return MODEL_NAMES[0]
+
+
+def load_stored_result(result_id):
+    """Return a stored result by ID, or None if it is unknown or was evicted."""
+    payload = get_result_store().get(result_id)
+    if payload is None:
+        return None
+    return result_from_payload(payload)
+
+
+def build_result_id(text, analysis, one_click):
+    """Derive the content hash of the requested work from prompt and models."""
+    final_prompt, system = create_prompt(
+        text,
+        analysis=analysis,
+        leichte_sprache=leichte_sprache,
+        condense_text=condense_text,
+        structured=not one_click and model_id in CONFIG.structured_model_ids,
+        slim_rules=CONFIG.api.slim_rules,
+    )
+    model_ids = tuple(MODEL_IDS.values()) if one_click else (model_id,)
+    return compute_result_id(
+        final_prompt=final_prompt,
+        system=system,
+        model_ids=model_ids,
+        analysis=analysis,
+        one_click=one_click,
+    )
+
+
 @st.cache_resource
 def get_project_info():
     """Get markdown for project information that is shown in the expander section at the top of the app."""
@@ -112,92 +265,331 @@ def create_project_info(project_info):
         st.markdown(project_info[1], unsafe_allow_html=True)
 
 
-def get_result_from_response(response):
-    """Extract text between tags from response."""
-    tag = "leichtesprache" if leichte_sprache else "einfachesprache"
-    return extract_tagged_response(response, tag)
+@st.cache_resource
+def get_http_client(max_connections, keepalive_expiry_seconds, http2):
+    """Create the connection pool that all sessions share for model requests."""
+    import httpx
+    from openai import DefaultHttpxClient
+
+    return DefaultHttpxClient(
+        http2=http2 and http2_available(),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry_seconds,
+        ),
+    )
 
 
 @st.cache_resource
-def get_openrouter_client():
-    """Create the API client only when the user submits a model request."""
+def get_openrouter_client(api):
+    """Create the API client on the shared connection pool.
+
+    The client is cached per API config, so a reloaded config with new
+    timeouts or pool limits gets a fresh client while unchanged settings reuse
+    the old one.
+    """
     if not API_KEYS["OPENROUTER"]:
         raise ValueError("OPENROUTER_API_KEY is not set")
 
     from openai import OpenAI
 
     return OpenAI(
-        base_url=API_BASE_URL,
+        base_url=api.base_url,
         api_key=API_KEYS["OPENROUTER"],
-        timeout=API_TIMEOUT_SECONDS,
-        max_retries=API_MAX_RETRIES,
+        timeout=api.timeout_seconds,
+        max_retries=api.max_retries,
+        http_client=get_http_client(
+            api.max_connections, api.keepalive_expiry_seconds, api.http2
+        ),
     )
 
 
-def invoke_model(
-    text,
-    model_id,
-    analysis=False,
-):
-    """Invoke any model through OpenRouter."""
-    openrouter_client = get_openrouter_client()
-    final_prompt, system = create_prompt(
-        text,
+@st.cache_resource
+def start_connection_prewarm(api):
+    """Open one pooled connection per model in the background, once per API config."""
+
+    def prewarm():
+        http_client = get_http_client(
+            api.max_connections, api.keepalive_expiry_seconds, api.http2
+        )
+        opened = prewarm_connections(
+            lambda: http_client.head(api.base_url, timeout=10), len(MODEL_IDS)
+        )
+        logger.info("Prewarmed %d of %d API connections", opened, len(MODEL_IDS))
+
+    thread = Thread(target=prewarm, name="api-prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+@st.cache_resource
+def get_translation_memory():
+    """Open the translation memory, or return None if it is disabled."""
+    memory_config = CONFIG.translation_memory
+    if SHARED_STATE is not None:
+        memory_config = replace(memory_config, path=str(SHARED_STATE.path))
+    return create_translation_memory(memory_config, base_dir=APP_DIR)
+
+
+def remember_accepted_result(request, response, model_name, score):
+    """Keep the paragraphs of a well understandable simplification for reuse."""
+    memory = get_translation_memory()
+    if memory is None or score is None:
+        return
+    if score < CONFIG.understandability.limit_hard:
+        return
+    try:
+        memory.add(request.text, response, mode=request.mode, model=model_name)
+    except Exception:
+        # The memory is best effort and must never fail a request.
+        logger.exception("Storing the result in the translation memory failed")
+
+
+@st.cache_resource
+def get_simplification_engine():
+    """Create the one engine that runs the model requests of all sessions."""
+    return SimplificationEngine(
+        get_config_watcher().current,
+        get_openrouter_client,
+        tracer=TRACER,
+        metrics=METRICS,
+        rate_limiter=None if SHARED_STATE is None else SHARED_STATE.rate_limiter,
+        translation_memory=get_translation_memory(),
+        circuit_breaker=create_circuit_breaker(CONFIG.circuit_breaker),
+    )
+
+
+def build_simplification_request(models, analysis=False):
+    """Capture the current widget values, so workers never read script globals."""
+    return SimplificationRequest(
+        text=st.session_state.key_textinput,
+        models=tuple(models),
         analysis=analysis,
         leichte_sprache=leichte_sprache,
         condense_text=condense_text,
     )
 
-    try:
-        message = openrouter_client.chat.completions.create(
-            model=model_id,
-            **temperature_request_parameters(TEMPERATURE),
-            max_tokens=MAX_TOKENS,
-            messages=[
-                {"role": "system", "content": system},
-                {"role": "user", "content": final_prompt},
-            ],
-        )
-        content = message.choices[0].message.content
-        if content is None:
-            raise ValueError("No content received from API")
-
-        message = content.strip()
-        message = get_result_from_response(message)
-        message = strip_markdown(message)
-        return True, message
-    except Exception:
-        logger.exception("Model invocation failed for model_id=%s", model_id)
-        return False, "Model response could not be created."
-
 
 def enter_sample_text():
     """Enter sample text into the text input in the left column."""
     st.session_state.key_textinput = SAMPLE_TEXT
 
 
-def get_one_click_results():
-    with ThreadPoolExecutor(max_workers=len(MODEL_IDS)) as executor:
-        futures = {
-            name: executor.submit(
-                invoke_model,
-                st.session_state.key_textinput,
-                model_id,
-            )
-            for name, model_id in MODEL_IDS.items()
-        }
+def score_text(text):
+    """Calculate the ZIX score and record how long scoring took."""
+    if SHARED_STATE is not None:
+        # Any replica that scored this text before saves the others the work.
+        return SHARED_STATE.score_cache.get_or_compute(text, _score_text)
+    return _score_text(text)
+
+
+def _score_text(text):
+    with TRACER.span("get_zix", chars=len(text)), METRICS.scoring_duration.time():
+        return get_zix(text)
+
+
+# Rendering reuses the score that routing already computed for the same result.
+score_output = memoize_scores(score_text)
+
 
-    # invoke_model never raises: it returns (False, message) on failure.
-    responses = {name: future.result() for name, future in futures.items()}
+@st.cache_resource
+def get_admission_controller():
+    """Create the one admission queue for the model requests of all sessions."""
+    controller = create_admission_controller(CONFIG.admission)
+    if controller is not None:
+        queue_length = METRICS.registry.gauge(
+            "ssl_admission_queue_length",
+            "Requests waiting in the admission queue.",
+        )
+        METRICS.registry.add_collector(
+            lambda: queue_length.set(controller.queue_length())
+        )
+    return controller
 
-    return format_one_click_results(responses, score_fn=get_zix, cefr_fn=get_cefr)
+
+def format_queue_status(status):
+    minutes, seconds = divmod(round(status.eta_seconds / 10) * 10, 60)
+    eta = f"{minutes} Min. {seconds} Sek." if minutes else f"{seconds} Sekunden"
+    return (
+        f"Viele Anfragen gleichzeitig. Du bist an Position {status.position} "
+        f"der Warteschlange. Geschätzte Wartezeit: etwa {eta}."
+    )
+
+
+def run_models(request, **options):
+    """Wait for admission, then run the models of a request.
+
+    Another click or a closed tab stops the script at its next Streamlit call.
+    The queue position and elapsed time shown while waiting are such calls, so
+    an abandoned run leaves the queue and its model requests are aborted within
+    a second instead of running on. Raises `Overloaded` if the app is too busy.
+    """
+    progress = st.empty()
+    controller = get_admission_controller()
+    if controller is None:
+        return _run_models(request, progress, **options)
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid4().hex
+    try:
+        with controller.slot(
+            st.session_state.session_id,
+            cost=len(request.models),
+            priority=PRIORITY_SINGLE
+            if len(request.models) == 1
+            else PRIORITY_ONE_CLICK,
+            chars=len(request.text),
+            on_wait=lambda status: progress.info(format_queue_status(status)),
+        ) as ticket:
+            METRICS.admission_wait.observe(ticket.wait_seconds)
+            progress.empty()
+            return _run_models(request, progress, **options)
+    except Overloaded:
+        METRICS.admission_rejections.inc()
+        raise
+
+
+def _run_models(request, progress, **options):
+    started_at = time.perf_counter()
+    arrived = []
+    try:
+        outputs = get_simplification_engine().run(
+            request,
+            on_output=arrived.append,
+            on_wait=lambda: progress.caption(
+                f"{time.perf_counter() - started_at:.0f} Sekunden"
+            ),
+            **options,
+        )
+    except BaseException:
+        # Streamlit stops and reruns a script with BaseException subclasses.
+        log_event(
+            request.text,
+            "",
+            do_analysis,
+            do_simplification,
+            do_one_click,
+            leichte_sprache,
+            model_choice,
+            time.perf_counter() - started_at,
+            False,
+            cancelled_models=len(request.models) - len(arrived),
+        )
+        raise
+    progress.empty()
+    return outputs
+
+
+def draft_model_for(model_name):
+    """Return the model that drafts for `model_name`, or None to skip the draft."""
+    draft_refine = CONFIG.draft_refine
+    if not draft_refine.enabled or model_name not in draft_refine.refine_models:
+        return None
+    if get_simplification_engine().circuit_state(draft_refine.draft_model) == OPEN:
+        return None
+    return draft_refine.draft_model
+
+
+def run_draft_then_refine(request, draft_model):
+    """Show the draft of a fast model at once, then let the selected model refine it.
+
+    Returns the output to keep and the model whose draft it refined, if any. If
+    the draft fails, the selected model writes from scratch; if the refinement
+    fails or the app is too busy for it, the draft is kept.
+    """
+    (draft,) = run_models(replace(request, models=(draft_model,)))
+    if not draft.success:
+        (output,) = run_models(request)
+        return output, ""
+    with placeholder_result.container():
+        st.text_area(
+            f"Entwurf von {draft_model}",
+            value=draft.text,
+            height=CONFIG.ui.text_area_height,
+            disabled=True,
+        )
+        st.caption(
+            f"{request.models[0]} überarbeitet den Entwurf. Die überarbeitete Fassung ersetzt ihn, sobald sie fertig ist."
+        )
+    try:
+        (refined,) = run_models(replace(request, draft=draft.text))
+    except Overloaded:
+        # The draft is already shown; keep it rather than failing the request.
+        return draft, ""
+    if not refined.success:
+        return draft, ""
+    return refined, draft_model
+
+
+def get_one_click_results(score_source):
+    score = memoize_scores(score_text)
+    limit_hard = CONFIG.understandability.limit_hard
+    request = build_simplification_request(MODEL_NAMES)
+    with (
+        TRACER.span("one_click", models=len(MODEL_IDS)),
+        METRICS.one_click_duration.time(),
+    ):
+        outputs = run_models(
+            request,
+            is_good=lambda response: score(response) >= limit_hard,
+            min_good=CONFIG.one_click.min_good_results,
+        )
+
+    # Every successful response is scored once; ranking, rendering and the
+    # download reuse these scores.
+    model_results = score_model_results(
+        {
+            output.model_name: (output.success, output.text)
+            for output in outputs
+            if not output.cancelled
+        },
+        score_fn=score,
+        cefr_fn=get_cefr,
+        source_text=request.text,
+    )
+    latencies = {output.model_name: output.latency_seconds for output in outputs}
+    measured = {output.model_name for output in outputs if output.measures_model}
+    for item in model_results:
+        if item.model_name not in measured:
+            continue
+        record_model_observation(
+            item.model_name,
+            latencies[item.model_name],
+            item.success,
+            item.score,
+            score_source,
+        )
+    model_results += [
+        ModelResult(output.model_name, False, "", cancelled=True)
+        for output in outputs
+        if output.cancelled
+    ]
+    best_result = max(
+        (item for item in model_results if item.success),
+        key=lambda item: item.score,
+        default=None,
+    )
+    if best_result is not None:
+        remember_accepted_result(
+            request, best_result.response, best_result.model_name, best_result.score
+        )
+    if CONFIG.one_click.ranking:
+        model_results = rank_model_results(model_results)
+    success, response = format_model_results(model_results)
+    return success, response, tuple(model_results)
 
 
 def create_download_link(result):
     """Create a downloadable Word document and download link of the results."""
+    with TRACER.span("create_download_link"):
+        _create_download_link(result)
+
+
+def _create_download_link(result):
     from docx import Document
     from docx.shared import Inches, Pt
 
+    build_started_at = time.perf_counter()
     document = Document()
 
     h1 = document.add_heading("Ausgangstext")
@@ -212,7 +604,7 @@ def create_download_link(result):
 
     p2 = document.add_paragraph(result.response)
 
-    timestamp = datetime.now().strftime(DATETIME_FORMAT)
+    timestamp = datetime.now().strftime(CONFIG.datetime_format)
     models_used = result_models_used(result)
     footer = document.sections[0].footer
     footer.paragraphs[
@@ -222,31 +614,32 @@ def create_download_link(result):
     # Set font for all paragraphs.
     for paragraph in document.paragraphs:
         for run in paragraph.runs:
-            run.font.name = FONT_WORDDOC
+            run.font.name = CONFIG.document.font_name
 
     # Set font size for all headings.
     for paragraph in [h1, h2]:
         for run in paragraph.runs:
-            run.font.size = Pt(FONT_SIZE_HEADING)
+            run.font.size = Pt(CONFIG.document.font_size_heading)
 
     # Set font size for all paragraphs.
     for paragraph in [p1, p2]:
         for run in paragraph.runs:
-            run.font.size = Pt(FONT_SIZE_PARAGRAPH)
+            run.font.size = Pt(CONFIG.document.font_size_paragraph)
 
     # Set font and font size for footer.
     for run in footer.paragraphs[0].runs:
-        run.font.name = FONT_WORDDOC
-        run.font.size = Pt(FONT_SIZE_FOOTER)
+        run.font.name = CONFIG.document.font_name
+        run.font.size = Pt(CONFIG.document.font_size_footer)
 
     section = document.sections[0]
-    section.page_width = Inches(PAGE_WIDTH_INCHES)
-    section.page_height = Inches(PAGE_HEIGHT_INCHES)
+    section.page_width = Inches(CONFIG.document.page_width_inches)
+    section.page_height = Inches(CONFIG.document.page_height_inches)
 
     io_stream = io.BytesIO()
     document.save(io_stream)
+    METRICS.docx_build_duration.observe(time.perf_counter() - build_started_at)
 
-    file_name = DEFAULT_OUTPUT_FILENAME
+    file_name = CONFIG.document.default_output_filename
 
     if result.one_click:
         caption = "Vereinfachte Texte herunterladen"
@@ -254,13 +647,13 @@ def create_download_link(result):
         caption = "Vereinfachten Text herunterladen"
 
     if result.analysis:
-        file_name = ANALYSIS_FILENAME
+        file_name = CONFIG.document.analysis_filename
         caption = "Analyse herunterladen"
     st.download_button(
         label=caption,
         data=io_stream.getvalue(),
         file_name=file_name,
-        mime=DOWNLOAD_MIME_TYPE,
+        mime=CONFIG.document.download_mime_type,
     )
 
 
@@ -274,6 +667,7 @@ def log_event(
     model_choice,
     time_processed,
     success,
+    cancelled_models=0,
 ):
     """Log event."""
     payload = build_log_payload(
@@ -286,11 +680,30 @@ def log_event(
         model_choice=model_choice,
         time_processed=time_processed,
         success=success,
-        datetime_format=DATETIME_FORMAT,
+        datetime_format=CONFIG.datetime_format,
+        cancelled_models=cancelled_models,
     )
     write_event_log(EVENT_LOGGER, payload)
 
 
+def finish_rerun_profile():
+    """Log the rerun profile and show it below the page when profiling is on."""
+    if not PROFILER.enabled:
+        return
+    report = PROFILER.report(budget_ms=CONFIG.rerun_budget_ms)
+    if report["over_budget"]:
+        logger.warning("Rerun over budget: %s", report)
+    write_event_log(EVENT_LOGGER, report, message="rerun_profile")
+    st.caption(format_profile_report(report))
+
+
+def best_model_result(result):
+    """Return the best scored model result of a ranked one-click run, if any."""
+    if not CONFIG.one_click.ranking:
+        return None
+    return next((item for item in result.model_results if item.success), None)
+
+
 def render_download_and_caption(result):
     """Render the download button and processing-time caption for a result."""
     create_download_link(result)
@@ -306,30 +719,52 @@ def render_result(result):
     with placeholder_result.container():
         st.text_area(
             text,
-            height=TEXT_AREA_HEIGHT,
+            height=CONFIG.ui.text_area_height,
             value=result.response,
         )
+        st.caption(
+            f"Ergebnis-ID: `{result.result_id}`. Über `?ergebnis={result.result_id}` "
+            "kannst du das Ergebnis später wieder abrufen."
+        )
+        if result.terms:
+            with st.expander("Erklärte Begriffe"):
+                st.markdown(
+                    "\n".join(
+                        f"- **{term}**: {explanation}"
+                        for term, explanation in result.terms
+                    )
+                )
 
         # One-click aggregates several models into one text. A single
         # understandability score for the concatenated output is not meaningful
-        # (per-model scores are shown inline instead), so we show the source
-        # score and offer the download.
+        # (per-model scores are shown inline instead), so we show the score of
+        # the best model, or the source score if ranking is off.
         if result.one_click:
+            best_result = best_model_result(result)
             with placeholder_analysis.container():
-                st.metric(
-                    label=METRIC_LABEL,
-                    value=rounded_score(result.score_source),
-                    help=METRIC_HELP,
-                )
+                if best_result is None:
+                    st.metric(
+                        label=CONFIG.understandability.metric_label,
+                        value=rounded_score(result.score_source),
+                        help=CONFIG.understandability.metric_help,
+                    )
+                else:
+                    st.metric(
+                        label=CONFIG.understandability.metric_label,
+                        value=rounded_score(best_result.score),
+                        delta=rounded_score(best_result.score - result.score_source),
+                        help=CONFIG.understandability.metric_help,
+                    )
+                    st.caption(f"Bestes Ergebnis: {best_result.model_name}")
                 render_download_and_caption(result)
         elif result.simplification:
-            score_target = get_zix(result.response)
+            score_target = score_output(result.response)
             score_target_rounded = rounded_score(score_target)
             cefr_target = get_cefr(score_target)
             target_classification = classify_understandability(
                 score_target,
-                limit_hard=LIMIT_HARD,
-                limit_medium=LIMIT_MEDIUM,
+                limit_hard=CONFIG.understandability.limit_hard,
+                limit_medium=CONFIG.understandability.limit_medium,
             )
             st.markdown(
                 format_understandability_message(
@@ -341,22 +776,202 @@ def render_result(result):
             )
             with placeholder_analysis.container():
                 st.metric(
-                    label=METRIC_LABEL,
+                    label=CONFIG.understandability.metric_label,
                     value=score_target_rounded,
                     delta=rounded_score(score_target - result.score_source),
-                    help=METRIC_HELP,
+                    help=CONFIG.understandability.metric_help,
                 )
                 render_download_and_caption(result)
         else:
             with placeholder_analysis.container():
                 st.metric(
-                    label=METRIC_LABEL,
+                    label=CONFIG.understandability.metric_label,
                     value=rounded_score(result.score_source),
-                    help=METRIC_HELP,
+                    help=CONFIG.understandability.metric_help,
                 )
                 render_download_and_caption(result)
 
 
+def process_request():
+    """Score the source text, call the model(s), then store and render the result."""
+    start_time = time.time()
+    if st.session_state.key_textinput == "":
+        st.error("Bitte gib einen Text ein.")
+        return
+
+    result_id = build_result_id(
+        st.session_state.key_textinput, do_analysis, do_one_click
+    )
+    # A new request replaces a result opened from the URL.
+    if "ergebnis" in st.query_params:
+        del st.query_params["ergebnis"]
+    # Reuse identical work from any session. Clicking again on the result that is
+    # already shown asks for a fresh draft instead.
+    stored_result = None
+    if st.session_state.get("last_result_id") != result_id:
+        stored_result = load_stored_result(result_id)
+    if stored_result is not None:
+        st.session_state.last_result_id = result_id
+        render_result(stored_result)
+        log_event(
+            st.session_state.key_textinput,
+            stored_result.response,
+            do_analysis,
+            do_simplification,
+            do_one_click,
+            leichte_sprache,
+            model_choice,
+            time.time() - start_time,
+            True,
+        )
+        return
+
+    score_source = score_text(st.session_state.key_textinput)
+    score_source_rounded = rounded_score(score_source)
+    cefr_source = get_cefr(score_source)
+    source_classification = classify_understandability(
+        score_source,
+        limit_hard=CONFIG.understandability.limit_hard,
+        limit_medium=CONFIG.understandability.limit_medium,
+    )
+
+    # Analyze source text and display results.
+    with source_text:
+        st.markdown(
+            format_understandability_message(
+                "Ausgangstext",
+                score_source_rounded,
+                cefr_source,
+                source_classification,
+            )
+        )
+        with placeholder_analysis.container():
+            st.metric(
+                label=CONFIG.understandability.metric_label,
+                value=score_source_rounded,
+                delta=None,
+                help=CONFIG.understandability.metric_help,
+            )
+
+        with placeholder_analysis.container():
+            with st.spinner("Ich arbeite..."):
+                # One-click simplification.
+                model_results = ()
+                terms = ()
+                model_name = model_choice
+                draft_model = ""
+                rejected = False
+                overloaded = False
+                try:
+                    if do_one_click:
+                        success, response, model_results = get_one_click_results(
+                            score_source
+                        )
+                    # Regular text simplification or analysis
+                    else:
+                        request = build_simplification_request(
+                            (model_choice,), analysis=do_analysis
+                        )
+                        drafting_model = (
+                            draft_model_for(model_choice) if do_simplification else None
+                        )
+                        if drafting_model is None:
+                            (output,) = run_models(request)
+                        else:
+                            output, draft_model = run_draft_then_refine(
+                                request, drafting_model
+                            )
+                        # The draft model if its draft was kept.
+                        model_name = output.model_name
+                        success, response, terms, rejected = (
+                            output.success,
+                            output.text,
+                            output.terms,
+                            output.rejected,
+                        )
+                        if do_simplification and not output.rejected:
+                            score = score_output(response) if success else None
+                            # Refining a draft is faster than writing from
+                            # scratch, so it would skew the routing stats.
+                            if output.measures_model and not draft_model:
+                                record_model_observation(
+                                    model_name,
+                                    output.latency_seconds,
+                                    success,
+                                    score,
+                                    score_source,
+                                )
+                            remember_accepted_result(
+                                request, response, model_name, score
+                            )
+                except Overloaded:
+                    # Rejected at once, so the others are not slowed down.
+                    overloaded, success = True, False
+
+    if success is False:
+        if overloaded:
+            st.warning(
+                "Die App ist gerade stark ausgelastet. Bitte versuche es in ein paar Minuten erneut."
+            )
+        elif rejected:
+            st.error(
+                f"Das Modell {model_choice} antwortet zurzeit nicht. Bitte wähle ein anderes Modell oder versuche es später erneut."
+            )
+        else:
+            st.error(
+                "Es ist ein Fehler bei der Abfrage der APIs aufgetreten. Bitte versuche es erneut. Alternativ überprüfe Code, API-Keys, Verfügbarkeit der Modelle und ggf. Internetverbindung."
+            )
+        time_processed = time.time() - start_time
+        log_event(
+            st.session_state.key_textinput,
+            "Error from model call",
+            do_analysis,
+            do_simplification,
+            do_one_click,
+            leichte_sprache,
+            model_choice,
+            time_processed,
+            success,
+        )
+        return
+
+    time_processed = time.time() - start_time
+
+    result = ResultState(
+        source_text=st.session_state.key_textinput,
+        response=response,
+        analysis=do_analysis,
+        simplification=do_simplification,
+        one_click=do_one_click,
+        model_choice=model_name,
+        model_names=tuple(MODEL_NAMES),
+        time_processed=time_processed,
+        score_source=score_source,
+        leichte_sprache=leichte_sprache,
+        condense_text=condense_text,
+        result_id=result_id,
+        model_results=model_results,
+        terms=terms,
+        draft_model=draft_model,
+    )
+    get_result_store().put(result_id, result_to_payload(result))
+    st.session_state.last_result_id = result_id
+    render_result(result)
+
+    log_event(
+        st.session_state.key_textinput,
+        response,
+        do_analysis,
+        do_simplification,
+        do_one_click,
+        leichte_sprache,
+        model_choice,
+        time_processed,
+        success,
+        cancelled_models=sum(item.cancelled for item in model_results),
+    )
+
+
 # ---------------------------------------------------------------
 # Main
 
@@ -367,6 +982,7 @@ if not API_KEYS["OPENROUTER"]:
     st.stop()
 
 project_info = get_project_info()
+PROFILER.mark("setup")
 
 # Persist text input across sessions in session state.
 # Otherwise, the text input sometimes gets lost when the user clicks on a button.
@@ -375,7 +991,7 @@ if "key_textinput" not in st.session_state:
 
 st.markdown("## 🙋‍♀️ Sprache einfach vereinfachen")
 create_project_info(project_info)
-st.caption(USER_WARNING, unsafe_allow_html=True)
+st.caption(CONFIG.user_warning_markup, unsafe_allow_html=True)
 st.markdown("---")
 
 # Set up first row with all buttons and settings.
@@ -420,9 +1036,17 @@ with button_cols[2]:
 with button_cols[3]:
     model_choice = st.radio(
         label="Sprachmodell",
-        options=MODEL_NAMES,
+        options=(
+            [AUTO_MODEL_CHOICE, *MODEL_NAMES] if CONFIG.routing.enabled else MODEL_NAMES
+        ),
         index=0,
+        format_func=format_model_option,
         horizontal=True,
+        help=(
+            "**Auto** wählt das Modell, das in letzter Zeit am schnellsten gut "
+            "verständliche Texte geliefert hat. **Gestörte** Modelle antworten "
+            "zurzeit nicht und werden übersprungen."
+        ),
     )
 
 # Instantiate empty containers for the text areas.
@@ -440,127 +1064,67 @@ with source_text:
     st.text_area(
         "Ausgangstext, den du vereinfachen möchtest",
         value=None,
-        height=TEXT_AREA_HEIGHT,
-        max_chars=MAX_CHARS_INPUT,
+        height=CONFIG.ui.text_area_height,
+        max_chars=CONFIG.ui.max_chars_input,
         key="key_textinput",
     )
 with placeholder_result:
     st.text_area(
         "Ergebnis",
-        height=TEXT_AREA_HEIGHT,
+        height=CONFIG.ui.text_area_height,
     )
 with placeholder_analysis:
     st.metric(
-        label=METRIC_LABEL,
+        label=CONFIG.understandability.metric_label,
         value=None,
         delta=None,
-        help=METRIC_HELP,
+        help=CONFIG.understandability.metric_help,
     )
 
 # The static UI is now available, so warm the expensive language model while the
 # user reads or enters text. A quick first click waits on this same shared load.
-start_understandability_loading()
-
-
-# Derive model_id from explicit model_choice.
-model_id = MODEL_IDS[model_choice]
+start_understandability_loading(CONFIG.scoring)
+if CONFIG.api.prewarm_connections:
+    start_connection_prewarm(CONFIG.api)
+PROFILER.mark("layout")
 
 # Start processing if one of the processing buttons is clicked.
 if do_simplification or do_analysis or do_one_click:
-    start_time = time.time()
-    if st.session_state.key_textinput == "":
-        st.error("Bitte gib einen Text ein.")
-        st.stop()
-
-    score_source = get_zix(st.session_state.key_textinput)
-    score_source_rounded = rounded_score(score_source)
-    cefr_source = get_cefr(score_source)
-    source_classification = classify_understandability(
-        score_source,
-        limit_hard=LIMIT_HARD,
-        limit_medium=LIMIT_MEDIUM,
-    )
-
-    # Analyze source text and display results.
-    with source_text:
-        st.markdown(
-            format_understandability_message(
-                "Ausgangstext",
-                score_source_rounded,
-                cefr_source,
-                source_classification,
-            )
-        )
-        with placeholder_analysis.container():
-            st.metric(
-                label=METRIC_LABEL,
-                value=score_source_rounded,
-                delta=None,
-                help=METRIC_HELP,
-            )
-
-        with placeholder_analysis.container():
-            with st.spinner("Ich arbeite..."):
-                # One-click simplification.
-                if do_one_click:
-                    success, response = get_one_click_results()
-                # Regular text simplification or analysis
-                else:
-                    success, response = invoke_model(
-                        st.session_state.key_textinput,
-                        model_id=model_id,
-                        analysis=do_analysis,
-                    )
-
-    if success is False:
-        st.error(
-            "Es ist ein Fehler bei der Abfrage der APIs aufgetreten. Bitte versuche es erneut. Alternativ überprüfe Code, API-Keys, Verfügbarkeit der Modelle und ggf. Internetverbindung."
-        )
-        time_processed = time.time() - start_time
-        log_event(
-            st.session_state.key_textinput,
-            "Error from model call",
-            do_analysis,
-            do_simplification,
-            do_one_click,
-            leichte_sprache,
-            model_choice,
-            time_processed,
-            success,
-        )
-
-        st.stop()
-
-    # Often the models return the German letter «ß». Replace it with the Swiss «ss».
-    response = response.replace("ß", "ss")
-    time_processed = time.time() - start_time
-
-    result = ResultState(
-        source_text=st.session_state.key_textinput,
-        response=response,
+    # "Auto" is resolved per request, so routing follows the latest stats.
+    if model_choice == AUTO_MODEL_CHOICE and not do_one_click:
+        model_choice = resolve_model_choice(model_choice)
+        with button_cols[3]:
+            st.caption(f"Automatisch gewählt: {model_choice}")
+    model_id = MODEL_IDS.get(model_choice, "")
+    # Model calls are not part of the rerun overhead, so report before them.
+    finish_rerun_profile()
+    with TRACER.span(
+        "request",
         analysis=do_analysis,
-        simplification=do_simplification,
         one_click=do_one_click,
-        model_choice=model_choice,
-        model_names=tuple(MODEL_NAMES),
-        time_processed=time_processed,
-        score_source=score_source,
-    )
-    st.session_state.last_result = result
-    render_result(result)
-
-    log_event(
-        st.session_state.key_textinput,
-        response,
-        do_analysis,
-        do_simplification,
-        do_one_click,
-        leichte_sprache,
-        model_choice,
-        time_processed,
-        success,
-    )
+        leichte_sprache=leichte_sprache,
+        model=model_id,
+        input_chars=len(st.session_state.key_textinput),
+    ):
+        process_request()
     st.stop()
 
-if "last_result" in st.session_state:
-    render_result(st.session_state.last_result)
+# Sessions only keep the ID of their last result; the result itself lives in the
+# shared store. A result ID in the URL opens that result once and then becomes
+# the last result, so later requests are not hidden behind it.
+requested_result_id = st.query_params.get("ergebnis")
+if requested_result_id:
+    del st.query_params["ergebnis"]
+    requested_result = load_stored_result(requested_result_id)
+    if requested_result is None:
+        st.warning("Zu dieser Ergebnis-ID ist kein Ergebnis mehr gespeichert.")
+    else:
+        st.session_state.last_result_id = requested_result_id
+        render_result(requested_result)
+elif "last_result_id" in st.session_state:
+    last_result = load_stored_result(st.session_state.last_result_id)
+    if last_result is not None:
+        render_result(last_result)
+
+PROFILER.mark("render_result")
+finish_rerun_profile()
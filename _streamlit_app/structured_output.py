@@ -0,0 +1,128 @@
+import json
+from dataclasses import dataclass
+
+try:  # Flat import when run by Streamlit (app dir is on sys.path).
+    from response_parser import clean_result_text
+except ImportError:  # Package import (e.g. in tests).
+    from _streamlit_app.response_parser import clean_result_text
+
+_STRING = {"type": "string"}
+
+SIMPLIFICATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "text": _STRING,
+        "terms": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"term": _STRING, "explanation": _STRING},
+                "required": ["term", "explanation"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["text", "terms"],
+    "additionalProperties": False,
+}
+
+ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "sentences": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "sentence": _STRING,
+                    "analysis": _STRING,
+                    "suggestion": _STRING,
+                },
+                "required": ["sentence", "analysis", "suggestion"],
+                "additionalProperties": False,
+            },
+        }
+    },
+    "required": ["sentences"],
+    "additionalProperties": False,
+}
+
+
+@dataclass(frozen=True)
+class StructuredResult:
+    text: str
+    # Difficult terms the model explains in the text, as (term, explanation).
+    terms: tuple[tuple[str, str], ...] = ()
+
+
+def response_format(*, analysis: bool) -> dict[str, object]:
+    """Build the `response_format` request parameter for the JSON schema."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "analysis" if analysis else "simplification",
+            "strict": True,
+            "schema": ANALYSIS_SCHEMA if analysis else SIMPLIFICATION_SCHEMA,
+        },
+    }
+
+
+def _load_json(content: str) -> object:
+    content = content.strip()
+    # Some providers wrap the JSON in a code fence even in structured mode.
+    if content.startswith("```"):
+        content = content.partition("\n")[2].rsplit("```", 1)[0]
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError as error:
+        raise ValueError("Model response is not valid JSON") from error
+
+
+def _strings(item: object, keys: tuple[str, ...]) -> tuple[str, ...]:
+    if not isinstance(item, dict) or not all(
+        isinstance(item.get(key), str) for key in keys
+    ):
+        raise ValueError("Model response did not match the expected JSON schema")
+    return tuple(item[key] for key in keys)
+
+
+def _list(data: object, key: str) -> list:
+    value = data.get(key) if isinstance(data, dict) else None
+    if not isinstance(value, list):
+        raise ValueError("Model response did not match the expected JSON schema")
+    return value
+
+
+def parse_structured_response(content: str, *, analysis: bool) -> StructuredResult:
+    """Validate a JSON response and turn it into the text shown to the user.
+
+    The text fields get the same cleanup as tagged responses. An analysis is
+    rendered as one block per sentence, without the formatting rules.
+    """
+    data = _load_json(content)
+    if analysis:
+        blocks = [
+            f"Satz {number}: {sentence}\nAnalyse: {comment}\nVorschlag: {suggestion}"
+            for number, (sentence, comment, suggestion) in enumerate(
+                (
+                    _strings(item, ("sentence", "analysis", "suggestion"))
+                    for item in _list(data, "sentences")
+                ),
+                start=1,
+            )
+        ]
+        result = StructuredResult(
+            clean_result_text("\n\n".join(blocks), format_rules=False)
+        )
+    else:
+        (text,) = _strings(data, ("text",))
+        terms = tuple(
+            (clean_result_text(term), clean_result_text(explanation))
+            for term, explanation in (
+                _strings(item, ("term", "explanation")) for item in _list(data, "terms")
+            )
+        )
+        result = StructuredResult(clean_result_text(text), terms)
+    if not result.text:
+        raise ValueError("Model response contained an empty result")
+    return result
@@ -0,0 +1,84 @@
+import math
+from collections import deque
+from threading import Lock
+
+# German prose averages about four characters per token with current tokenizers.
+# Three keeps the estimate on the safe side for long compounds and numbers.
+CHARS_PER_TOKEN = 3
+
+# Output tokens per input token before any history is available. Leichte Sprache
+# explains terms and splits sentences, so it gets longer than the source. The
+# analysis quotes and comments every sentence.
+DEFAULT_OUTPUT_RATIOS = {
+    "einfache_sprache": 1.3,
+    "leichte_sprache": 2.0,
+    "leichte_sprache_condensed": 1.3,
+    "analysis_einfache_sprache": 3.0,
+    "analysis_leichte_sprache": 3.0,
+}
+
+# Room for the result tags and a short closing remark.
+TAG_OVERHEAD_TOKENS = 64
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def request_mode(*, analysis: bool, leichte_sprache: bool, condense_text: bool) -> str:
+    """Name the prompt variant, which determines how long the output gets."""
+    if analysis:
+        return (
+            "analysis_leichte_sprache"
+            if leichte_sprache
+            else "analysis_einfache_sprache"
+        )
+    if leichte_sprache:
+        return "leichte_sprache_condensed" if condense_text else "leichte_sprache"
+    return "einfache_sprache"
+
+
+class OutputRatioTracker:
+    """Recent output/input length ratios per mode, shared by all sessions.
+
+    The budget uses a high percentile of the recent ratios, so most requests
+    fit into one response. Until `min_samples` ratios are known for a mode,
+    the default ratio applies.
+    """
+
+    def __init__(
+        self, *, window: int = 200, min_samples: int = 10, percentile: float = 0.9
+    ):
+        self.window = window
+        self.min_samples = min_samples
+        self.percentile = percentile
+        self._ratios: dict[str, deque[float]] = {}
+        self._lock = Lock()
+
+    def record(self, mode: str, source_text: str, output_text: str) -> None:
+        source_tokens = estimate_tokens(source_text)
+        if source_tokens == 0:
+            return
+        with self._lock:
+            ratios = self._ratios.setdefault(mode, deque(maxlen=self.window))
+            ratios.append(estimate_tokens(output_text) / source_tokens)
+
+    def ratio(self, mode: str) -> float:
+        with self._lock:
+            ratios = sorted(self._ratios.get(mode, ()))
+        if len(ratios) < self.min_samples:
+            return DEFAULT_OUTPUT_RATIOS[mode]
+        return ratios[min(int(self.percentile * len(ratios)), len(ratios) - 1)]
+
+
+def max_tokens_for(
+    source_text: str,
+    *,
+    ratio: float,
+    headroom: float,
+    min_tokens: int,
+    max_tokens: int,
+) -> int:
+    """Size `max_tokens` for one request, within the configured bounds."""
+    budget = math.ceil(estimate_tokens(source_text) * ratio * headroom)
+    return max(min_tokens, min(budget + TAG_OVERHEAD_TOKENS, max_tokens))
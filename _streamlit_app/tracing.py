@@ -0,0 +1,273 @@
+import json
+import logging
+import os
+import queue
+import time
+import urllib.request
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import Lock, Thread
+from typing import Protocol
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "simply-simplify-language"
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start_ns: int
+    end_ns: int | None = None
+    attributes: dict[str, object] = field(default_factory=dict)
+    error: str | None = None
+
+    def set_attribute(self, key: str, value: object) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> float | None:
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1_000_000
+
+
+class _NullSpan:
+    """Stand-in for spans while tracing is disabled. Accepts and ignores data."""
+
+    def set_attribute(self, key: str, value: object) -> None:
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+
+NULL_SPAN = _NullSpan()
+
+
+class SpanExporter(Protocol):
+    def export(self, spans: list[Span]) -> None: ...
+
+
+class JSONLinesSpanExporter:
+    """Append finished spans as JSON lines to a local file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def export(self, spans: list[Span]) -> None:
+        lines = "".join(
+            json.dumps(
+                {
+                    "name": span.name,
+                    "trace_id": span.trace_id,
+                    "span_id": span.span_id,
+                    "parent_id": span.parent_id,
+                    "start_ns": span.start_ns,
+                    "end_ns": span.end_ns,
+                    "duration_ms": span.duration_ms,
+                    "attributes": span.attributes,
+                    "error": span.error,
+                },
+                ensure_ascii=False,
+                default=str,
+            )
+            + "\n"
+            for span in spans
+        )
+        with self.path.open("a", encoding="utf-8") as file:
+            file.write(lines)
+
+
+def _otlp_value(value: object) -> dict[str, object]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_payload(spans: list[Span]) -> dict[str, object]:
+    """Encode spans as an OTLP/HTTP JSON trace export request."""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": _otlp_value(SERVICE_NAME)}
+                    ]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "simply_simplify_language"},
+                        "spans": [
+                            {
+                                "traceId": span.trace_id,
+                                "spanId": span.span_id,
+                                **(
+                                    {"parentSpanId": span.parent_id}
+                                    if span.parent_id
+                                    else {}
+                                ),
+                                "name": span.name,
+                                "kind": 1,
+                                "startTimeUnixNano": str(span.start_ns),
+                                "endTimeUnixNano": str(span.end_ns),
+                                "attributes": [
+                                    {"key": key, "value": _otlp_value(value)}
+                                    for key, value in span.attributes.items()
+                                ],
+                                "status": (
+                                    {"code": 2, "message": span.error}
+                                    if span.error
+                                    else {"code": 1}
+                                ),
+                            }
+                            for span in spans
+                        ],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class OTLPHttpSpanExporter:
+    """Send spans to an OpenTelemetry collector using OTLP/HTTP with JSON."""
+
+    def __init__(self, endpoint: str, *, timeout_seconds: float = 5):
+        self.endpoint = endpoint
+        self.timeout_seconds = timeout_seconds
+
+    def export(self, spans: list[Span]) -> None:
+        # The endpoint is an operator-configured collector URL.
+        request = urllib.request.Request(  # nosec B310
+            self.endpoint,
+            data=json.dumps(otlp_payload(spans)).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout_seconds):  # nosec B310
+            pass
+
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """Create hierarchical timing spans and export them in the background.
+
+    Without an exporter, `span()` returns a shared no-op object, so disabled
+    tracing costs one attribute check per instrumented stage. The current span
+    lives in a context variable; pass work to threads with
+    `contextvars.copy_context().run` to keep child spans under their parent.
+    """
+
+    def __init__(
+        self,
+        exporter: SpanExporter | None = None,
+        *,
+        queue_size: int = 10000,
+        batch_size: int = 100,
+        flush_interval_seconds: float = 1.0,
+    ):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.dropped = 0
+        self._drop_lock = Lock()
+        self._queue: queue.Queue[Span | None] = queue.Queue(maxsize=queue_size)
+        self._export_thread = Thread(
+            target=self._export_batches, name="span-export", daemon=True
+        )
+        if exporter is not None:
+            self._export_thread.start()
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def span(self, name: str, **attributes: object):
+        if self.exporter is None:
+            return NULL_SPAN
+        return self._span(name, attributes)
+
+    @contextmanager
+    def _span(self, name: str, attributes: dict[str, object]) -> Iterator[Span]:
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else os.urandom(16).hex(),
+            span_id=os.urandom(8).hex(),
+            parent_id=parent.span_id if parent else None,
+            start_ns=time.time_ns(),
+            attributes=attributes,
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as error:
+            # Only real errors. Streamlit's rerun and stop signals are
+            # BaseExceptions and end the span normally.
+            span.error = f"{type(error).__name__}: {error}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = time.time_ns()
+            try:
+                self._queue.put_nowait(span)
+            except queue.Full:
+                with self._drop_lock:
+                    self.dropped += 1
+
+    def _export_batches(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval_seconds
+            while len(batch) < self.batch_size and batch[-1] is not None:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=max(remaining, 0)))
+                except queue.Empty:
+                    break
+            spans = [span for span in batch if span is not None]
+            if spans:
+                try:
+                    self.exporter.export(spans)
+                except Exception:
+                    logger.exception("Exporting %d spans failed", len(spans))
+            if batch[-1] is None:
+                return
+
+    def shutdown(self) -> None:
+        """Export all queued spans and stop the export thread."""
+        if self._export_thread.is_alive():
+            self._queue.put(None)
+            self._export_thread.join(timeout=5)
+
+
+def create_tracer(tracing_config: dict, *, base_dir: Path) -> Tracer:
+    """Create the tracer selected in the `tracing` config section."""
+    if not tracing_config.get("enabled", False):
+        return Tracer()
+
+    exporter_name = tracing_config.get("exporter", "file")
+    if exporter_name == "file":
+        path = Path(tracing_config.get("filename", "traces.jsonl"))
+        if not path.is_absolute():
+            path = base_dir / path
+        return Tracer(JSONLinesSpanExporter(path))
+    if exporter_name == "otlp":
+        return Tracer(OTLPHttpSpanExporter(tracing_config["otlp_endpoint"]))
+    raise ValueError("tracing.exporter must be 'file' or 'otlp'")
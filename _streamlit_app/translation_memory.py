@@ -0,0 +1,285 @@
+import hashlib
+import random
+import re
+import sqlite3
+import time
+from contextlib import AbstractContextManager
+from dataclasses import dataclass
+from pathlib import Path
+
+try:  # Flat import when run by Streamlit (app dir is on sys.path).
+    from shared_state import sqlite_transaction
+except ImportError:  # Package import (e.g. in tests).
+    from _streamlit_app.shared_state import sqlite_transaction
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_WORD = re.compile(r"\w+")
+_NUMBER = re.compile(r"\d+")
+# Mersenne prime for the MinHash permutations (a * x + b) mod p.
+_PRIME = (1 << 61) - 1
+
+
+def split_paragraphs(text: str) -> list[str]:
+    """Split a text at blank lines into stripped, non-empty paragraphs."""
+    return [
+        paragraph.strip()
+        for paragraph in _PARAGRAPH_BREAK.split(text)
+        if paragraph.strip()
+    ]
+
+
+def normalize_segment(text: str) -> str:
+    """Lower-case words only, so spacing, punctuation and «ß» do not matter."""
+    return " ".join(_WORD.findall(text.lower().replace("ß", "ss")))
+
+
+def shingles(normalized: str, size: int = 3) -> frozenset[str]:
+    """Overlapping word n-grams of a normalized segment."""
+    words = normalized.split()
+    if len(words) <= size:
+        return frozenset((normalized,))
+    return frozenset(
+        " ".join(words[index : index + size]) for index in range(len(words) - size + 1)
+    )
+
+
+def jaccard(first: frozenset[str], second: frozenset[str]) -> float:
+    return len(first & second) / len(first | second)
+
+
+def _hash64(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest())
+
+
+class MinHasher:
+    """MinHash signatures, cut into bands for locality-sensitive lookup.
+
+    Two segments share at least one band with a probability that rises
+    steeply with their Jaccard similarity: with 16 bands of 4 rows, about 50%
+    at similarity 0.5 and over 99.9% at 0.9.
+    """
+
+    def __init__(self, *, bands: int = 16, rows: int = 4, seed: int = 43):
+        self.bands = bands
+        self.rows = rows
+        # MinHash permutations only need to be fixed, not unpredictable.
+        rng = random.Random(seed)  # nosec B311
+        self._permutations = [
+            (rng.randrange(1, _PRIME), rng.randrange(_PRIME))
+            for _ in range(bands * rows)
+        ]
+
+    def signature(self, segment_shingles: frozenset[str]) -> list[int]:
+        hashes = [_hash64(shingle) for shingle in segment_shingles]
+        return [
+            min((a * value + b) % _PRIME for value in hashes)
+            for a, b in self._permutations
+        ]
+
+    def band_keys(self, segment_shingles: frozenset[str], mode: str) -> list[int]:
+        signature = self.signature(segment_shingles)
+        return [
+            # SQLite integers are signed 64 bit.
+            _hash64(f"{mode}:{band}:{signature[start : start + self.rows]}") >> 1
+            for band, start in enumerate(range(0, len(signature), self.rows))
+        ]
+
+
+@dataclass(frozen=True)
+class Prefill:
+    """A text split into remembered leading and trailing paragraphs and the rest."""
+
+    prefix: tuple[str, ...]
+    remainder: str
+    suffix: tuple[str, ...]
+
+    @property
+    def matched(self) -> int:
+        return len(self.prefix) + len(self.suffix)
+
+    @property
+    def unmatched(self) -> int:
+        return len(split_paragraphs(self.remainder))
+
+    def join(self, simplified_remainder: str) -> str:
+        parts = [*self.prefix, simplified_remainder.strip(), *self.suffix]
+        return "\n\n".join(part for part in parts if part)
+
+
+class TranslationMemory:
+    """Simplified paragraphs of accepted results, by mode, with fuzzy lookup.
+
+    Paragraphs are the stored unit: models often split or merge sentences,
+    but they keep the paragraph structure, so source and result paragraphs
+    can be paired when their counts match. A fuzzy match needs a Jaccard
+    similarity of at least `min_similarity` over word trigrams and the same
+    numbers, so a deadline or amount is never taken from another text.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        min_similarity: float = 0.9,
+        max_entries: int = 20000,
+    ):
+        if not 0 < min_similarity <= 1:
+            raise ValueError(
+                "translation_memory.min_similarity must be between 0 and 1"
+            )
+        if max_entries < 1:
+            raise ValueError("translation_memory.max_entries must be at least 1")
+        self.path = path
+        self.min_similarity = min_similarity
+        self.max_entries = max_entries
+        self.hasher = MinHasher()
+        with self._transaction() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS tm_segments ("
+                "id INTEGER PRIMARY KEY, mode TEXT NOT NULL, source_key TEXT NOT NULL, "
+                "source TEXT NOT NULL, target TEXT NOT NULL, model TEXT NOT NULL, "
+                "created_at REAL NOT NULL, UNIQUE (mode, source_key))"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS tm_bands ("
+                "band_key INTEGER NOT NULL, segment_id INTEGER NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS tm_bands_by_key ON tm_bands (band_key)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS tm_bands_by_segment "
+                "ON tm_bands (segment_id)"
+            )
+
+    def _transaction(self) -> AbstractContextManager[sqlite3.Connection]:
+        return sqlite_transaction(self.path)
+
+    @staticmethod
+    def _source_key(normalized: str) -> str:
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def add(self, source_text: str, result_text: str, *, mode: str, model: str) -> int:
+        """Store the paragraph pairs of an accepted result. Return how many."""
+        sources = split_paragraphs(source_text)
+        targets = split_paragraphs(result_text)
+        if not sources or len(sources) != len(targets):
+            return 0
+        with self._transaction() as connection:
+            for source, target in zip(sources, targets, strict=True):
+                normalized = normalize_segment(source)
+                if not normalized:
+                    continue
+                source_key = self._source_key(normalized)
+                connection.execute(
+                    "DELETE FROM tm_bands WHERE segment_id IN (SELECT id FROM "
+                    "tm_segments WHERE mode = ? AND source_key = ?)",
+                    (mode, source_key),
+                )
+                cursor = connection.execute(
+                    "INSERT OR REPLACE INTO tm_segments "
+                    "(mode, source_key, source, target, model, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        mode,
+                        source_key,
+                        source,
+                        target,
+                        model,
+                        time.time(),
+                    ),
+                )
+                connection.executemany(
+                    "INSERT INTO tm_bands (band_key, segment_id) VALUES (?, ?)",
+                    [
+                        (band_key, cursor.lastrowid)
+                        for band_key in self.hasher.band_keys(
+                            shingles(normalized), mode
+                        )
+                    ],
+                )
+            # Row IDs grow with every insert, so this keeps the newest entries.
+            (cutoff,) = connection.execute(
+                "SELECT MAX(id) - ? FROM tm_segments", (self.max_entries,)
+            ).fetchone()
+            connection.execute("DELETE FROM tm_bands WHERE segment_id <= ?", (cutoff,))
+            connection.execute("DELETE FROM tm_segments WHERE id <= ?", (cutoff,))
+        return len(sources)
+
+    def lookup(self, segment: str, mode: str) -> str | None:
+        """Return the remembered simplification of a paragraph, if any."""
+        with self._transaction() as connection:
+            return self._lookup(connection, segment, mode)
+
+    def _lookup(
+        self, connection: sqlite3.Connection, segment: str, mode: str
+    ) -> str | None:
+        normalized = normalize_segment(segment)
+        if not normalized:
+            return None
+        row = connection.execute(
+            "SELECT target FROM tm_segments WHERE mode = ? AND source_key = ?",
+            (mode, self._source_key(normalized)),
+        ).fetchone()
+        if row is not None:
+            return row[0]
+        segment_shingles = shingles(normalized)
+        band_keys = self.hasher.band_keys(segment_shingles, mode)
+        candidates = connection.execute(
+            "SELECT source, target FROM tm_segments WHERE mode = ? AND id IN ("
+            "SELECT segment_id FROM tm_bands WHERE band_key IN "
+            f"({', '.join('?' * len(band_keys))}))",  # nosec B608
+            (mode, *band_keys),
+        ).fetchall()
+        numbers = _NUMBER.findall(normalized)
+        best_similarity, best_target = 0.0, None
+        for source, target in candidates:
+            candidate = normalize_segment(source)
+            if _NUMBER.findall(candidate) != numbers:
+                continue
+            similarity = jaccard(segment_shingles, shingles(candidate))
+            if similarity >= self.min_similarity and similarity > best_similarity:
+                best_similarity, best_target = similarity, target
+        return best_target
+
+    def prefill(self, text: str, mode: str) -> Prefill:
+        """Take remembered paragraphs from the start and end of a text.
+
+        Only leading and trailing paragraphs are taken, where boilerplate such
+        as salutations, contact blocks and legal notices sits. The remainder
+        stays one contiguous text, so the model sees it in context and its
+        result never has to be spliced between remembered paragraphs.
+        """
+        paragraphs = split_paragraphs(text)
+        prefix: list[str] = []
+        suffix: list[str] = []
+        # One connection for all paragraphs of the text.
+        with self._transaction() as connection:
+            while len(prefix) < len(paragraphs):
+                target = self._lookup(connection, paragraphs[len(prefix)], mode)
+                if target is None:
+                    break
+                prefix.append(target)
+            while len(prefix) + len(suffix) < len(paragraphs):
+                target = self._lookup(connection, paragraphs[-len(suffix) - 1], mode)
+                if target is None:
+                    break
+                suffix.insert(0, target)
+        remainder = paragraphs[len(prefix) : len(paragraphs) - len(suffix)]
+        return Prefill(tuple(prefix), "\n\n".join(remainder), tuple(suffix))
+
+
+def create_translation_memory(
+    translation_memory_config, *, base_dir: Path
+) -> TranslationMemory | None:
+    """Open the memory configured in `translation_memory`, or None if disabled."""
+    if not translation_memory_config.enabled:
+        return None
+    path = Path(translation_memory_config.path)
+    if not path.is_absolute():
+        path = base_dir / path
+    return TranslationMemory(
+        path,
+        min_similarity=translation_memory_config.min_similarity,
+        max_entries=translation_memory_config.max_entries,
+    )
@@ -14,10 +14,31 @@ SAMPLE_TEXT = """Als Vernehmlassungsverfahren wird diejenige Phase innerhalb des
 
 Die Vorlage wird zu diesem Zweck den Kantonen, den in der Bundesversammlung vertretenen Parteien, den Dachverbänden der Gemeinden, Städte und der Berggebiete, den Dachverbänden der Wirtschaft sowie weiteren, im Einzelfall interessierten Kreisen unterbreitet."""
 
-SYSTEM_MESSAGE_ES = """Du bist ein hilfreicher Assistent, der Texte in Einfache Sprache, Sprachniveau B1 bis A2, umschreibt. Sei immer wahrheitsgemäß und objektiv. Schreibe nur das, was du sicher aus dem Text des Benutzers weisst. Arbeite die Texte immer vollständig durch und kürze nicht. Mache keine Annahmen. Schreibe einfach und klar und immer in deutscher Sprache. Gib dein Ergebnis innerhalb von <einfachesprache> Tags aus."""
+SYSTEM_ROLE_ES = """Du bist ein hilfreicher Assistent, der Texte in Einfache Sprache, Sprachniveau B1 bis A2, umschreibt. Sei immer wahrheitsgemäß und objektiv. Schreibe nur das, was du sicher aus dem Text des Benutzers weisst. Arbeite die Texte immer vollständig durch und kürze nicht. Mache keine Annahmen. Schreibe einfach und klar und immer in deutscher Sprache."""
 
 
-SYSTEM_MESSAGE_LS = """Du bist ein hilfreicher Assistent, der Texte in Leichte Sprache, Sprachniveau A2 bis A1, umschreibt. Sei immer wahrheitsgemäß und objektiv. Schreibe nur das, was du sicher aus dem Text des Benutzers weisst. Arbeite die Texte immer vollständig durch und kürze nicht. Mache keine Annahmen. Schreibe einfach und klar und immer in deutscher Sprache. Gib dein Ergebnis innerhalb von <leichtesprache> Tags aus."""
+SYSTEM_ROLE_LS = """Du bist ein hilfreicher Assistent, der Texte in Leichte Sprache, Sprachniveau A2 bis A1, umschreibt. Sei immer wahrheitsgemäß und objektiv. Schreibe nur das, was du sicher aus dem Text des Benutzers weisst. Arbeite die Texte immer vollständig durch und kürze nicht. Mache keine Annahmen. Schreibe einfach und klar und immer in deutscher Sprache."""
+
+
+SYSTEM_MESSAGE_ES = (
+    f"{SYSTEM_ROLE_ES} Gib dein Ergebnis innerhalb von <einfachesprache> Tags aus."
+)
+
+
+SYSTEM_MESSAGE_LS = (
+    f"{SYSTEM_ROLE_LS} Gib dein Ergebnis innerhalb von <leichtesprache> Tags aus."
+)
+
+
+# Structured output: the model returns JSON that follows a schema (see structured_output.py).
+SYSTEM_MESSAGE_JSON_ES = (
+    f"{SYSTEM_ROLE_ES} Gib dein Ergebnis als JSON im vorgegebenen Schema aus."
+)
+
+
+SYSTEM_MESSAGE_JSON_LS = (
+    f"{SYSTEM_ROLE_LS} Gib dein Ergebnis als JSON im vorgegebenen Schema aus."
+)
 
 
 RULES_ES = """
@@ -107,12 +128,46 @@ RULES_LS = """
 """.strip()
 
 
+# Formatting rules that formatting_rules.py enforces on every result. The slim
+# rule sets leave them out of the prompt (api.slim_rules in config.yaml).
+MECHANICAL_RULES = (
+    "- Verwende immer französische Anführungszeichen",
+    "- Gliedere Telefonnummern",
+    "- Formatiere Datumsangaben",
+    "- Formatiere Zeitangaben",
+    "- Vor Franken-Rappen-Beträgen",
+    "- Schreibe die Abkürzungen «usw.», «z.B.», «etc.» aus.",
+)
+
+RULES_ES_SLIM = "\n".join(
+    rule for rule in RULES_ES.splitlines() if not rule.startswith(MECHANICAL_RULES)
+)
+
+RULES_LS_SLIM = "\n".join(
+    rule for rule in RULES_LS.splitlines() if not rule.startswith(MECHANICAL_RULES)
+)
+
+
 REWRITE_COMPLETE = """- Achte immer sehr genau darauf, dass ALLE Informationen aus dem schwer verständlichen Text in deinem verständlicheren Text enthalten sind. Kürze niemals Informationen. Wo sinnvoll kannst du zusätzliche Beispiele hinzufügen, um den Text verständlicher zu machen und relevante Inhalte zu konkretisieren."""
 
 
 REWRITE_CONDENSED = """- Konzentriere dich auf das Wichtigste. Gib die essenziellen Informationen wieder und lass den Rest weg."""
 
 
+# Output instructions for the {output_format} placeholder of the templates below.
+OUTPUT_TAGS_ES = """Schreibe den vereinfachten Text innerhalb von <einfachesprache> Tags. Gib nur Text aus, keine Markdown-Formatierung, kein HTML."""
+
+OUTPUT_TAGS_LS = """Schreibe den vereinfachten Text innerhalb von <leichtesprache> Tags. Gib nur Text aus, keine Markdown-Formatierung, kein HTML."""
+
+OUTPUT_TAGS_ANALYSIS_ES = """Schreibe deine Analyse innerhalb von <einfachesprache> Tags. Gib nur Text aus, keine Markdown-Formatierung, kein HTML."""
+
+OUTPUT_TAGS_ANALYSIS_LS = """Schreibe deine Analyse innerhalb von <leichtesprache> Tags. Gib nur Text aus, keine Markdown-Formatierung, kein HTML."""
+
+OUTPUT_JSON = """Gib dein Ergebnis als JSON im vorgegebenen Schema aus. Schreibe den vereinfachten Text in das Feld «text», ohne Markdown-Formatierung und ohne HTML. Liste im Feld «terms» die schwierigen Begriffe auf, die du im Text erklärst, jeweils mit dem Begriff in «term» und einer kurzen Erklärung in «explanation»."""
+
+OUTPUT_JSON_ANALYSIS = """Gib deine Analyse als JSON im vorgegebenen Schema aus. Lege im Feld «sentences» für jeden Satz einen Eintrag an: «sentence» wiederholt den Satz, «analysis» enthält deine Analyse und «suggestion» deinen Vorschlag für einen vereinfachten Satz. Verwende keine Markdown-Formatierung und kein HTML."""
+
+
 TEMPLATE_ES = """
 Du bekommst einen schwer verständlichen Text, den du vollständig in Einfache Sprache auf Sprachniveau B1 bis A2 umschreiben sollst.
 
@@ -121,7 +176,7 @@ Beachte dabei folgende Regeln:
 {completeness}
 {rules}
 
-Schreibe den vereinfachten Text innerhalb von <einfachesprache> Tags. Gib nur Text aus, keine Markdown-Formatierung, kein HTML.
+{output_format}
 
 Hier ist der schwer verständliche Text:
 
@@ -138,7 +193,7 @@ Beachte dabei folgende Regeln:
 {completeness}
 {rules}
 
-Schreibe den vereinfachten Text innerhalb von <leichtesprache> Tags. Gib nur Text aus, keine Markdown-Formatierung, kein HTML.
+{output_format}
 
 Hier ist der schwer verständliche Text:
 
@@ -147,6 +202,17 @@ Hier ist der schwer verständliche Text:
 {prompt}
 """.strip()
 
+# Appended to a simplification prompt to let a model revise the draft of a faster model.
+REFINE_DRAFT = """
+Ein schnelleres Sprachmodell hat zu diesem Text bereits einen Entwurf geschrieben. Überarbeite den Entwurf: Prüfe ihn Satz für Satz am schwer verständlichen Text oben. Ergänze fehlende Informationen, korrigiere falsch wiedergegebene und wende alle Regeln an. Gute Stellen übernimmst du unverändert. Gib den ganzen überarbeiteten Text aus, nicht nur die Änderungen.
+
+Hier ist der Entwurf:
+
+--------------------------------------------------------------------------------
+
+{draft}
+""".strip()
+
 TEMPLATE_ANALYSIS_ES = """
 Du bekommst einen schwer verständlichen Text, den du genau analysieren sollst.
 
@@ -162,7 +228,7 @@ Die Regeln für Einfache Sprache sind diese hier:
 
 {rules}
 
-Schreibe deine Analyse innerhalb von <einfachesprache> Tags. Gib nur Text aus, keine Markdown-Formatierung, kein HTML.
+{output_format}
 
 Hier ist der schwer verständliche Text:
 
@@ -186,7 +252,7 @@ Die Regeln für Leichte Sprache sind diese hier:
 
 {rules}
 
-Schreibe deine Analyse innerhalb von <leichtesprache> Tags. Gib nur Text aus, keine Markdown-Formatierung, kein HTML.
+{output_format}
 
 Hier ist der schwer verständliche Text:
 
@@ -194,3 +260,6 @@ Hier ist der schwer verständliche Text:
 
 {prompt}
 """.strip()
+
+# Sent when a response was cut off before its closing tag. {tag} is the result tag.
+CONTINUE_RESPONSE = """Deine Antwort wurde abgeschnitten. Fahre genau an der Stelle fort, an der du aufgehört hast. Wiederhole nichts und beginne nicht neu. Schliesse den Text mit </{tag}> ab."""
@@ -0,0 +1,95 @@
+"""Compare the one-pass response parser with the regex post-processing.
+
+Run from the repository root:
+
+    uv run python scripts/benchmark_response_parser.py
+
+"Regex" is the former post-processing: `extract_tagged_response`, then
+`strip_markdown`, the ß replacement and `normalize_formatting`. For streamed
+responses, it has to rerun on the whole text received so far after every chunk
+to show a result.
+"""
+
+import sys
+import timeit
+from functools import partial
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from _streamlit_app.app_core import extract_tagged_response, strip_markdown
+from _streamlit_app.formatting_rules import normalize_formatting
+from _streamlit_app.response_parser import TaggedResponseParser, parse_tagged_response
+
+TAG = "leichtesprache"
+PARAGRAPH = (
+    "## Was ist eine Vernehmlassung?\n\n"
+    "Der **Bund** macht ein neues Gesetz. Vorher fragt er andere _Gruppen_: "
+    "die Kantone, die Parteien und die Verbände. Sie sagen, was sie über das "
+    "Gesetz denken. Das heisst: Vernehmlassung. Die Gruppen schreiben ihre "
+    "Meinung auf. Der Bund liest alles. Dann passt er das Gesetz an, wenn nötig. "
+    "Das ist gross und wichtig.\n\n"
+)
+CHUNK_CHARS = 20
+
+
+def regex_pipeline(response: str) -> str:
+    cleaned = strip_markdown(extract_tagged_response(response, TAG))
+    return normalize_formatting(cleaned.replace("ß", "ss"))
+
+
+def regex_streaming(chunks: list[str]) -> str:
+    received = ""
+    result = ""
+    for chunk in chunks:
+        received += chunk
+        try:
+            result = regex_pipeline(received)
+        except ValueError:
+            pass
+    return result
+
+
+def parser_streaming(chunks: list[str]) -> str:
+    parser = TaggedResponseParser(TAG)
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.finish()
+
+
+def main() -> None:
+    print(f"{'chars':>8} {'mode':>10} {'regex ms':>10} {'parser ms':>10}")
+    for paragraphs in (5, 50, 500):
+        response = f"<{TAG}>\n{PARAGRAPH * paragraphs}</{TAG}>\n"
+        chunks = [
+            response[i : i + CHUNK_CHARS] for i in range(0, len(response), CHUNK_CHARS)
+        ]
+        expected = regex_pipeline(response)
+        if parse_tagged_response(response, TAG) != expected:
+            raise SystemExit(f"Complete parse differs at {paragraphs} paragraphs")
+        if parser_streaming(chunks) != expected:
+            raise SystemExit(f"Streaming parse differs at {paragraphs} paragraphs")
+
+        cases = [
+            ("complete", partial(regex_pipeline, response)),
+            ("complete", partial(parse_tagged_response, response, TAG)),
+        ]
+        # Rescanning the whole text per chunk is quadratic; skip the largest size.
+        if paragraphs <= 50:
+            cases += [
+                ("streamed", partial(regex_streaming, chunks)),
+                ("streamed", partial(parser_streaming, chunks)),
+            ]
+        timings = []
+        for _, function in cases:
+            runs, total = timeit.Timer(function).autorange()
+            timings.append(total / runs * 1000)
+        for index in range(0, len(cases), 2):
+            print(
+                f"{len(response):>8} {cases[index][0]:>10} "
+                f"{timings[index]:>10.3f} {timings[index + 1]:>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Compare ZIX scoring throughput and memory with and without slimming.
+
+Run from the repository root:
+
+    uv run python scripts/benchmark_scoring_pipeline.py --rounds 20
+
+"full" is the spaCy pipeline as zix ships it, "configured" removes the
+components in `scoring.remove_components` of config.yaml. Each `--remove`
+adds a candidate, e.g. `--remove ner,lemmatizer`. Every setting is measured in
+a fresh process, so the peak memory includes loading the language model. The
+script fails if a setting changes any score compared with "full"; only
+components without score changes belong in `scoring.remove_components`.
+"""
+
+import argparse
+import multiprocessing
+import resource
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from _streamlit_app.app_config import load_app_config
+from _streamlit_app.app_core import repo_path
+from _streamlit_app.utils_prompts import SAMPLE_TEXT
+
+
+def make_texts() -> list[str]:
+    paragraphs = [part for part in SAMPLE_TEXT.split("\n") if part.strip()]
+    return [*paragraphs, SAMPLE_TEXT, SAMPLE_TEXT * 5]
+
+
+def run_setting(components, max_chars, rounds, results) -> None:
+    from zix.understandability import get_zix
+
+    from _streamlit_app.scoring_pipeline import find_pipelines, slim_pipelines
+
+    slim_pipelines(find_pipelines(), components, max_chars)
+    texts = make_texts()
+    scores = [get_zix(text) for text in texts]
+    started_at = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            get_zix(text)
+    elapsed = time.perf_counter() - started_at
+    # Kilobytes on Linux.
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    results.put((rounds * len(texts) / elapsed, peak_mb, scores))
+
+
+def measure(components, max_chars, rounds) -> tuple[float, float, list]:
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(
+        target=run_setting, args=(components, max_chars, rounds, results)
+    )
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument(
+        "--remove",
+        action="append",
+        default=[],
+        help="comma-separated spaCy components to remove as a further candidate",
+    )
+    args = parser.parse_args()
+
+    scoring = load_app_config(repo_path("config.yaml")).scoring
+    settings = {"full": (), "configured": scoring.remove_components}
+    for candidate in args.remove:
+        settings[candidate] = tuple(filter(None, candidate.split(",")))
+
+    print(f"{'setting':>24} {'texts/s':>8} {'speedup':>8} {'peak MB':>8} {'scores':>8}")
+    baseline = None
+    changed = []
+    for name, components in settings.items():
+        throughput, peak_mb, scores = measure(
+            components, scoring.max_chars, args.rounds
+        )
+        if baseline is None:
+            baseline = (throughput, scores)
+        parity = "same" if scores == baseline[1] else "CHANGED"
+        if parity == "CHANGED":
+            changed.append(name)
+        print(
+            f"{name:>24} {throughput:>8.1f} {throughput / baseline[0]:>8.2f} "
+            f"{peak_mb:>8.0f} {parity:>8}"
+        )
+    if changed:
+        raise SystemExit(f"Scores changed with: {', '.join(changed)}")
+
+
+if __name__ == "__main__":
+    main()
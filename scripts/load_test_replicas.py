@@ -0,0 +1,128 @@
+"""Measure how request throughput scales with replicas that share state.
+
+Run from the repository root:
+
+    uv run python scripts/load_test_replicas.py --duration 10 --replicas 1 2 4
+
+Each replica is a separate process. It works like one app process: for each
+request it looks up the ZIX score of the source text and of the result in the
+shared score cache and stores the result in the shared result store. All
+replicas use one SQLite file in WAL mode, as with `shared_state.enabled`.
+
+Model calls are not part of the test. They are network-bound and scale with the
+provider. By default, scoring is replaced by CPU work of similar cost, so the
+test runs without the language model; `--zix` scores with the real ZIX stack.
+Scaling can only be near-linear up to the number of CPU cores.
+"""
+
+import argparse
+import hashlib
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from _streamlit_app.result_store import SQLiteResultStore
+from _streamlit_app.shared_state import SQLiteScoreCache
+
+WORDS = (
+    "Gesuch Bewilligung Frist Gemeinde Kanton Gebühr Verfügung Antrag Beschwerde "
+    "Steuer Erklärung Einwohner Kontrolle Ausweis Termin Schalter Formular"
+).split()
+
+
+def cpu_score(text: str) -> float:
+    """Stand-in for ZIX scoring with about 20 ms of CPU work per text."""
+    digest = text.encode("utf-8")
+    for _ in range(40000):
+        digest = hashlib.sha256(digest).digest()
+    return digest[0] / 25.5 - 5
+
+
+def make_texts(count: int, seed: int) -> list[str]:
+    # A seeded load-test workload, not a secret.
+    rng = random.Random(seed)  # nosec B311
+    return [" ".join(rng.choices(WORDS, k=120)) for _ in range(count)]
+
+
+def run_replica(path, duration, score_name, seed, results) -> None:
+    score = cpu_score
+    if score_name == "zix":
+        from _streamlit_app.app_core import get_zix
+
+        score = get_zix
+        score("Aufwärmen.")
+    cache = SQLiteScoreCache(path)
+    store = SQLiteResultStore(path)
+    # A quarter of the requests repeat common texts (sample text, standard
+    # letters) that any replica may have scored; the rest are new texts.
+    common_texts = make_texts(20, seed=0)
+    # A seeded load-test workload, not a secret.
+    rng = random.Random(seed)  # nosec B311
+    handled = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        if rng.random() < 0.25:
+            text = rng.choice(common_texts)
+        else:
+            text = " ".join(rng.choices(WORDS, k=120))
+        result_id = hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+        cache.get_or_compute(text, score)
+        result = store.get(result_id)
+        if result is None:
+            response = text[: len(text) // 2]
+            cache.get_or_compute(response, score)
+            store.put(result_id, {"response": response})
+        handled += 1
+    results.put(handled)
+
+
+def measure(replicas: int, duration: float, score_name: str) -> float:
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "shared_state.sqlite3"
+        # Create the tables before the replicas start.
+        SQLiteScoreCache(path)
+        SQLiteResultStore(path)
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=run_replica, args=(path, duration, score_name, seed, results)
+            )
+            for seed in range(replicas)
+        ]
+        for process in processes:
+            process.start()
+        handled = sum(results.get() for _ in processes)
+        for process in processes:
+            process.join()
+    return handled / duration
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--replicas", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--zix", action="store_true", help="score with real ZIX")
+    args = parser.parse_args()
+
+    print(f"CPU cores: {os.cpu_count()}")
+    print(f"{'replicas':>8} {'requests/s':>11} {'speedup':>8} {'efficiency':>10}")
+    baseline = None
+    for replicas in args.replicas:
+        throughput = measure(replicas, args.duration, "zix" if args.zix else "cpu")
+        baseline = baseline or throughput / replicas
+        speedup = throughput / baseline
+        print(
+            f"{replicas:>8} {throughput:>11.1f} {speedup:>8.2f} "
+            f"{speedup / replicas:>10.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
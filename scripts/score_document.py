@@ -0,0 +1,90 @@
+"""Score the understandability of documents of any length, chunk by chunk.
+
+Run from the repository root:
+
+    uv run python scripts/score_document.py report.txt
+
+The document is read line by line and scored in chunks of whole paragraphs
+(`--chunk-chars`), so memory stays bounded for reports of hundreds of pages.
+Prints the score of each chunk and the word-weighted document score. A
+document that fits into one chunk gets the same score as in the app. With
+`--json`, prints one JSON object per chunk and a last one for the document.
+"""
+
+import argparse
+import json
+import sys
+from dataclasses import asdict
+from functools import partial
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from _streamlit_app.app_config import load_app_config
+from _streamlit_app.app_core import (
+    get_cefr,
+    get_zix,
+    repo_path,
+    start_understandability_loading,
+)
+from _streamlit_app.chunked_scoring import (
+    DEFAULT_CHUNK_CHARS,
+    ChunkScore,
+    score_document,
+)
+
+
+def format_score(score: float | None) -> str:
+    return "-" if score is None else f"{score:.2f}"
+
+
+def print_chunk(chunk: ChunkScore, *, path: Path, as_json: bool) -> None:
+    if as_json:
+        print(json.dumps({"path": str(path), **asdict(chunk)}))
+    else:
+        print(
+            f"{chunk.index:>6} {chunk.start_line:>8} {chunk.words:>7} "
+            f"{format_score(chunk.score):>7}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", type=Path, nargs="+")
+    parser.add_argument("--chunk-chars", type=int, default=DEFAULT_CHUNK_CHARS)
+    parser.add_argument("--json", action="store_true", help="print JSON lines")
+    args = parser.parse_args()
+
+    scoring = load_app_config(repo_path("config.yaml")).scoring
+    if not 0 < args.chunk_chars <= scoring.max_chars:
+        parser.error(f"--chunk-chars must be between 1 and {scoring.max_chars}")
+    start_understandability_loading(scoring)
+
+    for path in args.paths:
+        if not args.json:
+            print(f"{path}\n{'chunk':>6} {'line':>8} {'words':>7} {'score':>7}")
+        with path.open(encoding="utf-8") as lines:
+            result = score_document(
+                lines,
+                get_zix,
+                args.chunk_chars,
+                on_chunk=partial(print_chunk, path=path, as_json=args.json),
+            )
+        cefr = None if result.score is None else get_cefr(result.score)
+        if args.json:
+            print(
+                json.dumps(
+                    {
+                        "path": str(path),
+                        "score": result.score,
+                        "cefr": cefr,
+                        "chunks": len(result.chunks),
+                    }
+                )
+            )
+        else:
+            print(f"document score {format_score(result.score)} ({cefr or '-'})\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+from threading import Thread
+
+import pytest
+
+from _streamlit_app.admission import (
+    PRIORITY_ONE_CLICK,
+    PRIORITY_SINGLE,
+    AdmissionController,
+    Overloaded,
+    QueueStatus,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def _controller(clock, **options):
+    return AdmissionController(
+        **{
+            "max_model_requests": 4,
+            "max_queue": 10,
+            "max_wait_seconds": 600,
+            "initial_duration_seconds": 20,
+            "clock": clock,
+            **options,
+        }
+    )
+
+
+def _enqueue(controller, session_id, cost=1, priority=PRIORITY_SINGLE, chars=100):
+    return controller.enqueue(session_id, cost=cost, priority=priority, chars=chars)
+
+
+def test_requests_within_capacity_are_admitted_at_once(clock):
+    controller = _controller(clock)
+
+    first = _enqueue(controller, "a", cost=3)
+    second = _enqueue(controller, "b")
+    third = _enqueue(controller, "c")
+
+    assert first.admitted_at is not None and second.admitted_at is not None
+    assert third.admitted_at is None
+    assert controller.status(third) == QueueStatus(1, 20)
+
+
+def test_waiting_requests_are_admitted_by_session_kind_and_length(clock):
+    controller = _controller(clock)
+    running = _enqueue(controller, "busy", cost=4)
+    busy = _enqueue(controller, "busy")
+    one_click = _enqueue(controller, "a", cost=4, priority=PRIORITY_ONE_CLICK)
+    long_text = _enqueue(controller, "b", chars=9000)
+    short_text = _enqueue(controller, "c", chars=500)
+
+    assert [
+        controller.status(ticket).position
+        for ticket in (short_text, long_text, one_click, busy)
+    ] == [1, 2, 3, 4]
+
+    controller.release(running)
+
+    assert short_text.admitted_at is not None and long_text.admitted_at is not None
+    assert busy.admitted_at is not None
+    # The one-click request at the head waits for all its slots.
+    assert one_click.admitted_at is None
+
+
+def test_overload_is_rejected_at_once(clock):
+    controller = _controller(clock, max_queue=1, max_wait_seconds=30)
+    _enqueue(controller, "a", cost=4)
+    _enqueue(controller, "b")
+
+    with pytest.raises(Overloaded, match="queue is full"):
+        _enqueue(controller, "c")
+    assert controller.queue_length() == 1
+
+
+def test_requests_with_a_too_long_estimated_wait_are_rejected(clock):
+    controller = _controller(clock, max_wait_seconds=30)
+    _enqueue(controller, "a", cost=4)
+    _enqueue(controller, "b", cost=4, priority=PRIORITY_ONE_CLICK)
+
+    with pytest.raises(Overloaded, match="estimated wait"):
+        _enqueue(controller, "c", cost=4, priority=PRIORITY_ONE_CLICK)
+
+
+def test_estimate_follows_the_measured_request_duration(clock):
+    controller = _controller(clock)
+    running = _enqueue(controller, "a", cost=4)
+    clock.now = 70
+
+    controller.release(running)
+
+    waiting = _enqueue(controller, "b", cost=4)
+    queued = _enqueue(controller, "c")
+    assert waiting.admitted_at is not None
+    assert controller.status(queued).eta_seconds == pytest.approx(30)
+
+
+def test_slot_reports_the_queue_and_releases_when_the_caller_leaves(clock):
+    controller = _controller(clock)
+    running = _enqueue(controller, "a", cost=4)
+    statuses = []
+
+    class Stopped(Exception):
+        pass
+
+    def on_wait(status):
+        statuses.append(status)
+        raise Stopped
+
+    with (
+        pytest.raises(Stopped),
+        controller.slot("b", cost=1, priority=0, chars=10, on_wait=on_wait),
+    ):
+        pass
+
+    assert statuses == [QueueStatus(1, 20)]
+    assert controller.queue_length() == 0
+    controller.release(running)
+    assert _enqueue(controller, "c", cost=4).admitted_at is not None
+
+
+def test_slot_waits_until_capacity_is_released(clock):
+    controller = _controller(clock)
+    running = _enqueue(controller, "a", cost=4)
+    Thread(target=controller.release, args=(running,)).start()
+
+    with controller.slot("b", cost=2, priority=0, chars=10, wait_seconds=5) as ticket:
+        assert ticket.admitted_at is not None
@@ -0,0 +1,242 @@
+import http.client
+import json
+from threading import Thread
+from types import SimpleNamespace
+
+import pytest
+
+from _streamlit_app.api_server import (
+    SimplificationService,
+    create_api_server,
+    parse_request_options,
+)
+from _streamlit_app.app_config import load_app_config
+from _streamlit_app.app_core import ModelOutput, SimplificationEngine, repo_path
+from _streamlit_app.metrics import AppMetrics, MetricsRegistry
+from _streamlit_app.tracing import Tracer
+
+RESPONSE = "Hier ist der Text:\n<einfachesprache>Der **Bund** macht ein Gesetz.</einfachesprache>"
+
+
+def _chunk(content):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(delta=SimpleNamespace(content=content))],
+        usage=None,
+    )
+
+
+class FakeCompletions:
+    def __init__(self, content=RESPONSE, failing_models=()):
+        self.content = content
+        self.failing_models = failing_models
+        self.calls = []
+
+    def create(self, *, model, messages, stream=False, **settings):
+        self.calls.append({"model": model, "stream": stream, **settings})
+        if model in self.failing_models:
+            raise TimeoutError("provider down")
+        if stream:
+            return [
+                _chunk(self.content[i : i + 7]) for i in range(0, len(self.content), 7)
+            ]
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=self.content))],
+            usage=None,
+        )
+
+
+@pytest.fixture
+def completions():
+    return FakeCompletions()
+
+
+@pytest.fixture
+def service(completions):
+    config = load_app_config(repo_path("config.yaml"))
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    engine = SimplificationEngine(
+        lambda: config,
+        lambda api: client,
+        tracer=Tracer(),
+        metrics=AppMetrics(MetricsRegistry()),
+    )
+    return SimplificationService(
+        engine,
+        score_fn=lambda text: len(text) / 10 - 5,
+        cefr_fn=lambda score: "B1",
+    )
+
+
+@pytest.fixture
+def post(service):
+    server = create_api_server(service, host="127.0.0.1", port=0, auth_token="secret")
+    Thread(target=server.serve_forever, daemon=True).start()
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+
+    def send(path, body=None, token="secret", method="POST"):
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        payload = None if body is None else json.dumps(body)
+        connection.request(method, path, payload, headers)
+        response = connection.getresponse()
+        return response.status, response.read().decode("utf-8")
+
+    yield send
+    connection.close()
+    server.shutdown()
+    server.server_close()
+
+
+def test_simplify_returns_cleaned_text_and_scores(post):
+    status, body = post("/simplify", {"text": "Der Bund erlässt ein Gesetz."})
+    payload = json.loads(body)
+
+    assert status == 200
+    assert payload["success"] is True
+    assert payload["text"] == "Der Bund macht ein Gesetz."
+    assert payload["source"]["cefr"] == "B1"
+    assert payload["result"]["score"] == pytest.approx(-2.4)
+
+
+def test_simplify_streams_text_before_the_final_result(post, completions):
+    status, body = post("/simplify", {"text": "Ein Text.", "stream": True})
+    events = [json.loads(line) for line in body.splitlines()]
+
+    assert status == 200
+    assert completions.calls[0]["stream"] is True
+    assert events[0]["event"] == "source"
+    assert events[-1]["event"] == "result"
+    deltas = "".join(event["text"] for event in events if event["event"] == "delta")
+    assert deltas == events[-1]["text"] == "Der Bund macht ein Gesetz."
+
+
+def test_one_click_returns_every_model_and_reports_failures(service, post, completions):
+    completions.failing_models = {service.config.models[0].id}
+
+    status, body = post("/one-click", {"text": "Ein Text."})
+    results = json.loads(body)["results"]
+
+    assert status == 200
+    assert len(results) == len(service.config.models)
+    assert results[-1] == {
+        "model": service.config.models[0].name,
+        "success": False,
+        "text": "Model response could not be created.",
+        "score": None,
+        "cefr": None,
+    }
+
+
+def test_one_click_records_the_gain_over_the_source(service, post):
+    observations = []
+    service.router = SimpleNamespace(record=observations.append)
+
+    post("/one-click", {"text": "Ein Text."})
+
+    # Source "Ein Text." scores -4.1, each result -2.4.
+    assert len(observations) == len(service.config.models)
+    assert all(
+        observation.zix_gain == pytest.approx(1.7) for observation in observations
+    )
+
+
+def test_outputs_that_do_not_measure_the_model_are_not_recorded(service):
+    observations = []
+    service.router = SimpleNamespace(record=observations.append)
+
+    # Filled in from the translation memory, or never sent.
+    service.record_observation(ModelOutput("A", True, "x", memory_paragraphs=2), 1, 0)
+    service.record_observation(ModelOutput("A", False, "", rejected=True), None, 0)
+    service.record_observation(ModelOutput("A", True, "x", latency_seconds=3), 1, 0)
+
+    assert [observation.latency_seconds for observation in observations] == [3]
+
+
+def test_score_handles_batches_without_model_calls(post, completions):
+    status, body = post("/score", {"texts": ["Kurz.", "Ein etwas längerer Text."]})
+
+    assert status == 200
+    assert [item["score"] for item in json.loads(body)["scores"]] == [-4.5, -2.6]
+    assert completions.calls == []
+
+
+def test_requests_need_the_api_token(post):
+    status, body = post("/score", {"text": "Kurz."}, token="wrong")
+
+    assert status == 401
+    assert "token" in json.loads(body)["error"]
+
+
+def test_invalid_requests_get_a_clear_error(post):
+    status, body = post("/simplify", {"text": "Text", "model": "Unbekannt"})
+
+    assert status == 400
+    assert json.loads(body)["error"] == "Unknown model: Unbekannt"
+
+
+def test_negative_content_length_is_rejected(service):
+    server = create_api_server(service, host="127.0.0.1", port=0, auth_token="secret")
+    Thread(target=server.serve_forever, daemon=True).start()
+    connection = http.client.HTTPConnection(
+        "127.0.0.1", server.server_address[1], timeout=5
+    )
+    try:
+        connection.putrequest("POST", "/score")
+        connection.putheader("Authorization", "Bearer secret")
+        connection.putheader("Content-Length", "-1")
+        connection.endheaders()
+        response = connection.getresponse()
+
+        assert response.status == 400
+        assert "negative" in json.loads(response.read())["error"]
+    finally:
+        connection.close()
+        server.shutdown()
+        server.server_close()
+
+
+def _fail_on_results(text):
+    if text == "Der Bund macht ein Gesetz.":
+        raise RuntimeError("scoring failed")
+    return 1.0
+
+
+def test_failures_in_a_stream_end_it_with_an_error_event(post, service, monkeypatch):
+    monkeypatch.setattr(service, "_cached_score", _fail_on_results)
+
+    status, body = post("/simplify", {"text": "Ein Text.", "stream": True})
+    events = [json.loads(line) for line in body.splitlines()]
+
+    assert status == 200
+    assert events[0]["event"] == "source"
+    assert events[-1] == {"event": "error", "error": "Internal server error"}
+    # The stream was ended properly, so the connection serves the next request.
+    status, body = post("/simplify", {"text": "Ein Text."})
+    assert status == 500
+    assert json.loads(body) == {"error": "Internal server error"}
+
+
+@pytest.mark.parametrize(
+    ("body", "message"),
+    [
+        ([], "must be a JSON object"),
+        ({"text": "  "}, "'text' must be a non-empty string"),
+        ({"text": "x" * 11}, "not be longer than 10 characters"),
+        ({"text": "Text", "stream": "yes"}, "'stream' must be of type bool"),
+    ],
+)
+def test_parse_request_options_rejects_invalid_bodies(body, message):
+    with pytest.raises(ValueError, match=message):
+        parse_request_options(body, max_chars=10)
+
+
+def test_metrics_endpoint_reports_model_requests(post, service):
+    post("/simplify", {"text": "Ein Text."})
+
+    status, body = post("/metrics", method="GET")
+
+    assert status == 200
+    model_id = service.config.models[0].id
+    assert f'ssl_model_request_duration_seconds_count{{model="{model_id}"}} 1' in body
+    assert post("/metrics", token=None, method="GET")[0] == 401
@@ -0,0 +1,151 @@
+import os
+
+import pytest
+import yaml
+
+from _streamlit_app.app_config import (
+    ConfigWatcher,
+    load_app_config,
+    parse_app_config,
+)
+from _streamlit_app.app_core import load_yaml_config, repo_path
+
+
+@pytest.fixture
+def raw_config():
+    return load_yaml_config(repo_path("config.yaml"))
+
+
+def test_repository_config_is_valid_and_precomputes_model_lookups():
+    config = load_app_config(repo_path("config.yaml"))
+
+    assert config.model_names == tuple(model.name for model in config.models)
+    assert config.model_ids[config.models[0].name] == config.models[0].id
+    assert config.user_warning_markup.startswith("<sub>")
+
+
+@pytest.mark.parametrize(
+    ("section", "key", "value", "message"),
+    [
+        ("api", "temperature", "warm", "'default' or a float"),
+        ("api", "max_tokens", 0, "api.max_tokens must be positive"),
+        ("api", "max_retries", True, "api.max_retries has an invalid value"),
+        ("ui", "max_chars_input", "many", "ui.max_chars_input has an invalid value"),
+        ("understandability", "limit_medium", 5, "lower than limit_hard"),
+        ("metrics", "port", 70000, "between 1 and 65535"),
+        ("api_server", "port", 0, "between 1 and 65535"),
+        ("translation_memory", "min_similarity", 1.5, "between 0 and 1"),
+        ("api_server", "max_batch_texts", 0, "api_server.max_batch_texts must be"),
+        ("one_click", "min_good_results", 99, "between 0 and the number of models"),
+        ("metrics", "enabled", "yes", "metrics.enabled has an invalid value"),
+        ("api", "min_tokens", 9000, "must not exceed api.max_tokens"),
+        ("api", "token_headroom", 0.5, "at least 1"),
+        ("draft_refine", "draft_model", "Unknown", "must be one of the models"),
+        ("draft_refine", "refine_models", ["Unknown"], "must list names of"),
+        ("draft_refine", "refine_models", ["Gemini 3.6 Flash"], "not contain the"),
+        ("routing", "window", 0, "routing.window must be positive"),
+        ("routing", "min_samples", -1, "routing.min_samples must not be negative"),
+        ("circuit_breaker", "failure_threshold", 0, "failure_threshold must be"),
+        ("circuit_breaker", "cooldown_seconds", "1m", "has an invalid value"),
+        ("scoring", "remove_components", "ner", "has an invalid value"),
+        ("scoring", "remove_components", [1], "must be a list of strings"),
+        ("scoring", "max_chars", 0, "scoring.max_chars must be positive"),
+        ("admission", "max_queue", -1, "admission.max_queue must not be negative"),
+        ("admission", "max_model_requests", 0, "must be positive"),
+    ],
+)
+def test_parse_app_config_rejects_invalid_values(
+    raw_config, section, key, value, message
+):
+    raw_config[section][key] = value
+
+    with pytest.raises(ValueError, match=message):
+        parse_app_config(raw_config)
+
+
+def test_parse_app_config_rejects_missing_sections_and_duplicate_models(raw_config):
+    with pytest.raises(ValueError, match="'document' must be a mapping"):
+        parse_app_config({**raw_config, "document": None})
+
+    duplicated = {**raw_config, "models": raw_config["models"] * 2}
+    with pytest.raises(ValueError, match="unique names"):
+        parse_app_config(duplicated)
+
+
+def _write_config(path, mapping, mtime_ns):
+    path.write_text(yaml.safe_dump(mapping, allow_unicode=True), encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_config_watcher_swaps_valid_changes_and_keeps_last_good_config(
+    tmp_path, raw_config
+):
+    path = tmp_path / "config.yaml"
+    _write_config(path, raw_config, 1_000_000_000)
+    watcher = ConfigWatcher(path, check_interval=0)
+    assert watcher.current().api.timeout_seconds == raw_config["api"]["timeout_seconds"]
+
+    raw_config["api"]["timeout_seconds"] = 30
+    _write_config(path, raw_config, 2_000_000_000)
+    assert watcher.current().api.timeout_seconds == 30
+
+    raw_config["api"]["max_tokens"] = -1
+    _write_config(path, raw_config, 3_000_000_000)
+    assert watcher.current().api.timeout_seconds == 30
+    assert watcher.current().api.max_tokens > 0
+
+
+def test_config_watcher_checks_file_at_most_once_per_interval(tmp_path, raw_config):
+    path = tmp_path / "config.yaml"
+    _write_config(path, raw_config, 1_000_000_000)
+    watcher = ConfigWatcher(path, check_interval=3600)
+
+    raw_config["api"]["timeout_seconds"] = 30
+    _write_config(path, raw_config, 2_000_000_000)
+
+    assert watcher.current().api.timeout_seconds != 30
+
+
+def test_connection_pool_covers_one_click_fan_out_per_session(raw_config):
+    raw_config["api"]["expected_concurrent_sessions"] = 3
+
+    config = parse_app_config(raw_config)
+
+    assert config.api.max_connections == 3 * len(config.models)
+
+
+def test_structured_output_applies_only_to_flagged_models_when_enabled(raw_config):
+    raw_config["models"][0]["structured_output"] = True
+    raw_config["models"][1]["structured_output"] = False
+
+    raw_config["api"]["structured_output"] = False
+    assert parse_app_config(raw_config).structured_model_ids == frozenset()
+
+    raw_config["api"]["structured_output"] = True
+    config = parse_app_config(raw_config)
+    assert raw_config["models"][0]["id"] in config.structured_model_ids
+    assert raw_config["models"][1]["id"] not in config.structured_model_ids
+
+
+def test_models_can_raise_the_minimum_response_budget(raw_config):
+    raw_config["models"][0]["min_tokens"] = 4096
+    raw_config["models"][1].pop("min_tokens", None)
+
+    config = parse_app_config(raw_config)
+
+    assert config.model_min_tokens[raw_config["models"][0]["id"]] == 4096
+    assert (
+        config.model_min_tokens[raw_config["models"][1]["id"]]
+        == raw_config["api"]["min_tokens"]
+    )
+
+    raw_config["models"][0]["min_tokens"] = raw_config["api"]["max_tokens"] + 1
+    with pytest.raises(ValueError, match="min_tokens must not exceed"):
+        parse_app_config(raw_config)
+
+
+def test_shared_state_rejects_negative_rate_limit(raw_config):
+    raw_config["shared_state"]["requests_per_minute"] = -1
+
+    with pytest.raises(ValueError, match="must not be negative"):
+        parse_app_config(raw_config)
@@ -1,46 +1,89 @@
 import json
 import logging
 import sys
-from concurrent.futures import Future
-from threading import Event
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Barrier, Event, Lock, Timer
+from types import SimpleNamespace
 from unittest.mock import Mock
 
 import pytest
 
+from _streamlit_app.app_config import load_app_config
 from _streamlit_app.app_core import (
     APP_DIR,
     REPO_ROOT,
+    BatchRotatingFileHandler,
+    BufferedEventHandler,
+    CancellationToken,
     JSONFormatter,
+    ModelResult,
+    PhaseProfiler,
+    RequestCancelled,
     ResultState,
     ScoreClassification,
+    SimplificationEngine,
+    SimplificationRequest,
+    SingleFlight,
     _complete_understandability_load,
     app_path,
     build_log_payload,
     classify_understandability,
+    collect_until_enough_good,
+    compute_result_id,
     configure_event_logger,
     create_prompt,
+    event_log_dropped_records,
     extract_tagged_response,
+    format_model_results,
     format_one_click_results,
+    format_profile_report,
     format_understandability_message,
     get_cefr,
     get_zix,
+    is_truncated_response,
+    join_continuation,
     load_project_info,
     load_understandability_functions,
     load_yaml_config,
+    memoize_scores,
+    model_request_key,
+    prewarm_connections,
+    rank_model_results,
     repo_path,
+    result_from_payload,
     result_models_used,
+    result_to_payload,
     rounded_score,
+    score_model_results,
+    source_coverage,
+    source_length_ratio,
     start_understandability_loading,
     strip_markdown,
     temperature_request_parameters,
     write_event_log,
 )
+from _streamlit_app.circuit_breaker import CircuitBreaker
+from _streamlit_app.metrics import AppMetrics, MetricsRegistry
+from _streamlit_app.tracing import Tracer
+from _streamlit_app.translation_memory import TranslationMemory
 from _streamlit_app.utils_prompts import (
+    MECHANICAL_RULES,
+    OUTPUT_JSON,
+    OUTPUT_JSON_ANALYSIS,
+    OUTPUT_TAGS_ANALYSIS_ES,
+    OUTPUT_TAGS_ANALYSIS_LS,
+    OUTPUT_TAGS_ES,
+    OUTPUT_TAGS_LS,
+    REFINE_DRAFT,
     REWRITE_COMPLETE,
     REWRITE_CONDENSED,
     RULES_ES,
+    RULES_ES_SLIM,
     RULES_LS,
+    RULES_LS_SLIM,
     SYSTEM_MESSAGE_ES,
+    SYSTEM_MESSAGE_JSON_LS,
     SYSTEM_MESSAGE_LS,
     TEMPLATE_ANALYSIS_ES,
     TEMPLATE_ANALYSIS_LS,
@@ -155,6 +198,7 @@ def test_build_log_payload_omits_raw_text_and_response():
     )
 
     serialized = json.dumps(payload)
+    assert payload["cancelled_models"] == 0
     assert payload["input_chars"] == len("sensitive input")
     assert payload["response_chars"] == len("sensitive response")
     assert "sensitive input" not in serialized
@@ -184,6 +228,63 @@ def test_result_models_used_selects_models_for_processing_mode(one_click, expect
     assert result_models_used(result) == expected
 
 
+def test_result_models_used_names_the_model_of_a_refined_draft():
+    result = ResultState(
+        source_text="original text",
+        response="refined output",
+        analysis=False,
+        simplification=True,
+        one_click=False,
+        model_choice="Model A",
+        model_names=("Model A", "Model B"),
+        time_processed=1.2,
+        score_source=-1.5,
+        draft_model="Model B",
+    )
+
+    assert result_models_used(result) == "Model A (Entwurf: Model B)"
+
+
+def test_compute_result_id_is_stable_and_depends_on_prompt_and_models():
+    arguments = {
+        "final_prompt": "Prompt",
+        "system": "System",
+        "model_ids": ("model/a",),
+        "analysis": False,
+        "one_click": False,
+    }
+
+    result_id = compute_result_id(**arguments)
+
+    assert result_id == compute_result_id(**arguments)
+    assert len(result_id) == 32
+    assert result_id != compute_result_id(**{**arguments, "final_prompt": "Other"})
+    assert result_id != compute_result_id(**{**arguments, "model_ids": ("model/b",)})
+
+
+def test_result_payload_round_trip_restores_result_state():
+    result = ResultState(
+        source_text="original text",
+        response="generated output",
+        analysis=False,
+        simplification=True,
+        one_click=False,
+        model_choice="Model A",
+        model_names=("Model A", "Model B"),
+        time_processed=1.2,
+        score_source=-1.5,
+        leichte_sprache=True,
+        condense_text=True,
+        result_id="abc",
+        terms=(("Vernehmlassung", "Eine Umfrage."),),
+        draft_model="Model B",
+    )
+
+    payload = json.loads(json.dumps(result_to_payload(result)))
+
+    assert result_from_payload(payload) == result
+
+
 def test_create_prompt_einfache_sprache_assembles_es_template_and_complete_rules():
     prompt, system = create_prompt(
         "Quelltext",
@@ -193,7 +294,10 @@ def test_create_prompt_einfache_sprache_assembles_es_template_and_complete_rules
     )
 
     assert prompt == TEMPLATE_ES.format(
-        rules=RULES_ES, completeness=REWRITE_COMPLETE, prompt="Quelltext"
+        rules=RULES_ES,
+        completeness=REWRITE_COMPLETE,
+        output_format=OUTPUT_TAGS_ES,
+        prompt="Quelltext",
     )
     assert system == SYSTEM_MESSAGE_ES
 
@@ -213,10 +317,16 @@ def test_create_prompt_leichte_sprache_condense_flag_selects_completeness_block(
     )
 
     assert condensed == TEMPLATE_LS.format(
-        rules=RULES_LS, completeness=REWRITE_CONDENSED, prompt="Quelltext"
+        rules=RULES_LS,
+        completeness=REWRITE_CONDENSED,
+        output_format=OUTPUT_TAGS_LS,
+        prompt="Quelltext",
     )
     assert complete == TEMPLATE_LS.format(
-        rules=RULES_LS, completeness=REWRITE_COMPLETE, prompt="Quelltext"
+        rules=RULES_LS,
+        completeness=REWRITE_COMPLETE,
+        output_format=OUTPUT_TAGS_LS,
+        prompt="Quelltext",
     )
     assert condensed_system == SYSTEM_MESSAGE_LS
 
@@ -230,7 +340,9 @@ def test_create_prompt_analysis_uses_analysis_template_without_completeness_bloc
     )
 
     # Analysis has no {completeness} slot, so the condense flag must be ignored.
-    assert prompt == TEMPLATE_ANALYSIS_ES.format(rules=RULES_ES, prompt="Quelltext")
+    assert prompt == TEMPLATE_ANALYSIS_ES.format(
+        rules=RULES_ES, output_format=OUTPUT_TAGS_ANALYSIS_ES, prompt="Quelltext"
+    )
     assert system == SYSTEM_MESSAGE_ES
 
 
@@ -242,10 +354,90 @@ def test_create_prompt_analysis_uses_leichte_sprache_rules_and_system_message():
         condense_text=False,
     )
 
-    assert prompt == TEMPLATE_ANALYSIS_LS.format(rules=RULES_LS, prompt="Quelltext")
+    assert prompt == TEMPLATE_ANALYSIS_LS.format(
+        rules=RULES_LS, output_format=OUTPUT_TAGS_ANALYSIS_LS, prompt="Quelltext"
+    )
     assert system == SYSTEM_MESSAGE_LS
 
 
+def test_create_prompt_structured_asks_for_json_instead_of_tags():
+    prompt, system = create_prompt(
+        "Quelltext",
+        analysis=False,
+        leichte_sprache=True,
+        condense_text=False,
+        structured=True,
+    )
+    analysis_prompt, _ = create_prompt(
+        "Quelltext",
+        analysis=True,
+        leichte_sprache=False,
+        condense_text=False,
+        structured=True,
+    )
+
+    assert OUTPUT_JSON in prompt
+    assert OUTPUT_JSON_ANALYSIS in analysis_prompt
+    assert "<leichtesprache>" not in prompt + system
+    assert system == SYSTEM_MESSAGE_JSON_LS
+
+
+@pytest.mark.parametrize("leichte_sprache", [False, True])
+def test_create_prompt_slim_rules_leave_out_the_enforced_formatting_rules(
+    leichte_sprache,
+):
+    full, _ = create_prompt(
+        "Quelltext",
+        analysis=False,
+        leichte_sprache=leichte_sprache,
+        condense_text=False,
+    )
+    slim, _ = create_prompt(
+        "Quelltext",
+        analysis=False,
+        leichte_sprache=leichte_sprache,
+        condense_text=False,
+        slim_rules=True,
+    )
+
+    assert (RULES_LS_SLIM if leichte_sprache else RULES_ES_SLIM) in slim
+    assert len(slim) < len(full)
+    assert not any(rule in slim for rule in MECHANICAL_RULES)
+    assert "Grosse Zahlen ab 5 Stellen" in slim
+
+
+def test_create_prompt_with_draft_asks_to_revise_it_after_the_source():
+    prompt, system = create_prompt(
+        "Quelltext",
+        analysis=False,
+        leichte_sprache=True,
+        condense_text=True,
+        draft="Entwurf",
+    )
+    plain, plain_system = create_prompt(
+        "Quelltext", analysis=False, leichte_sprache=True, condense_text=True
+    )
+    analysis, _ = create_prompt(
+        "Quelltext",
+        analysis=True,
+        leichte_sprache=False,
+        condense_text=False,
+        draft="Entwurf",
+    )
+
+    assert prompt == plain + "\n\n" + REFINE_DRAFT.format(draft="Entwurf")
+    assert system == plain_system
+    assert "Entwurf" not in analysis
+
+
+def test_every_mechanical_rule_is_in_the_full_rules():
+    # A rule edited in the full set would otherwise stay in the slim prompt.
+    for rule in MECHANICAL_RULES:
+        assert any(
+            line.startswith(rule) for line in (RULES_ES + "\n" + RULES_LS).splitlines()
+        ), rule
+
+
 def test_strip_markdown_removes_headers_and_emphasis():
     text = (
         "# Titel\n## Untertitel\nDies ist **fett** und *kursiv* und __auch__ und _so_."
@@ -491,3 +683,732 @@ def test_write_event_log_does_not_emit_for_disabled_logger():
     write_event_log(logger, {"input_chars": 1})
 
     logger.info.assert_not_called()
+
+
+def test_model_request_key_ignores_settings_order():
+    first = model_request_key("model/a", "Prompt", "System", {"a": 1, "b": 2})
+    second = model_request_key("model/a", "Prompt", "System", {"b": 2, "a": 1})
+
+    assert first == second
+    assert first != model_request_key("model/b", "Prompt", "System", {"a": 1})
+    # Nested settings such as a response format schema are supported.
+    assert model_request_key("m", "P", "S", {"response_format": {"type": "x"}})
+
+
+def test_model_request_key_ignores_the_response_budget():
+    first = model_request_key("model/a", "Prompt", "System", {"max_tokens": 512})
+    second = model_request_key("model/a", "Prompt", "System", {"max_tokens": 900})
+
+    assert first == second
+
+
+def test_single_flight_shares_one_call_between_concurrent_callers():
+    single_flight = SingleFlight()
+    call_started = Event()
+    allow_call_to_finish = Event()
+    calls = []
+
+    def slow_call():
+        calls.append("call")
+        call_started.set()
+        allow_call_to_finish.wait(timeout=1)
+        return "Ergebnis"
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        leader = executor.submit(single_flight.do, "key", slow_call)
+        assert call_started.wait(timeout=1)
+        followers = [
+            executor.submit(single_flight.do, "key", slow_call) for _ in range(2)
+        ]
+        # Release the call only once both followers wait for it.
+        deadline = time.monotonic() + 1
+        while single_flight.followers() < 2 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        assert single_flight.followers() == 2
+        assert single_flight.in_flight() == 1
+        allow_call_to_finish.set()
+        results = [leader.result(timeout=1)] + [f.result(timeout=1) for f in followers]
+
+    assert results == ["Ergebnis"] * 3
+    assert calls == ["call"]
+    assert single_flight.in_flight() == 0
+    assert single_flight.followers() == 0
+
+
+def test_single_flight_frees_a_cancelled_follower_while_the_call_runs():
+    single_flight = SingleFlight()
+    call_started = Event()
+    allow_call_to_finish = Event()
+    cancel = CancellationToken()
+
+    def slow_call():
+        call_started.set()
+        allow_call_to_finish.wait(timeout=5)
+        return "Ergebnis"
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(single_flight.do, "key", slow_call)
+        assert call_started.wait(timeout=1)
+        follower = executor.submit(single_flight.do, "key", slow_call, cancel)
+        deadline = time.monotonic() + 1
+        while single_flight.followers() < 1 and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+        cancel.cancel()
+
+        with pytest.raises(RequestCancelled):
+            follower.result(timeout=1)
+        assert not leader.done()
+        allow_call_to_finish.set()
+        assert leader.result(timeout=1) == "Ergebnis"
+    assert single_flight.followers() == 0
+
+
+def test_single_flight_propagates_errors_and_allows_retry():
+    single_flight = SingleFlight()
+
+    def fail():
+        raise RuntimeError("provider down")
+
+    with pytest.raises(RuntimeError, match="provider down"):
+        single_flight.do("key", fail)
+
+    assert single_flight.do("key", lambda: "retry") == "retry"
+
+
+def test_write_event_log_uses_given_message():
+    logger = Mock(spec=logging.Logger)
+    logger.disabled = False
+
+    write_event_log(logger, {"total_ms": 3.0}, message="rerun_profile")
+
+    logger.info.assert_called_once_with(
+        "rerun_profile", extra={"event": {"total_ms": 3.0}}
+    )
+
+
+def test_phase_profiler_records_consecutive_phases_against_budget():
+    ticks = iter([0.010, 0.025])
+    profiler = PhaseProfiler(enabled=True, started_at=0.0, clock=lambda: next(ticks))
+
+    profiler.mark("imports", at=0.004)
+    profiler.mark("config")
+    profiler.mark("layout")
+    report = profiler.report(budget_ms=20)
+
+    assert report["phases_ms"] == {"imports": 4.0, "config": 6.0, "layout": 15.0}
+    assert report["total_ms"] == 25.0
+    assert report["over_budget"] is True
+    assert "Rerun: 25.0 ms (über Budget" in format_profile_report(report)
+
+
+def test_phase_profiler_disabled_records_nothing():
+    profiler = PhaseProfiler(enabled=False, clock=Mock(return_value=0.0))
+
+    profiler.mark("config")
+
+    assert profiler.phases_ms == {}
+
+
+def _close_handlers(logger):
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+        handler.close()
+
+
+def test_configure_event_logger_queue_mode_writes_batches_in_background(tmp_path):
+    logger = configure_event_logger(
+        {
+            "enabled": True,
+            "filename": "events.log",
+            "mode": "queue",
+            "batch_size": 10,
+            "flush_interval_seconds": 0.01,
+        },
+        base_dir=tmp_path,
+    )
+    try:
+        assert isinstance(logger.handlers[0], BufferedEventHandler)
+        for index in range(3):
+            write_event_log(logger, {"index": index})
+    finally:
+        _close_handlers(logger)
+
+    lines = (tmp_path / "events.log").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["event"] for line in lines] == [
+        {"index": 0},
+        {"index": 1},
+        {"index": 2},
+    ]
+
+
+def test_configure_event_logger_rejects_unknown_mode(tmp_path):
+    logger = None
+    try:
+        with pytest.raises(ValueError, match="'sync' or 'queue'"):
+            logger = configure_event_logger(
+                {"enabled": True, "mode": "socket"}, base_dir=tmp_path
+            )
+    finally:
+        if logger is not None:
+            _close_handlers(logger)
+
+
+def test_buffered_event_handler_drops_and_reports_records_when_full(tmp_path):
+    target = BatchRotatingFileHandler(tmp_path / "events.log")
+    target.setFormatter(JSONFormatter())
+    writer_blocked = Event()
+    release_writer = Event()
+    original_emit_batch = target.emit_batch
+
+    def slow_emit_batch(records):
+        writer_blocked.set()
+        release_writer.wait(timeout=1)
+        original_emit_batch(records)
+
+    target.emit_batch = slow_emit_batch
+    handler = BufferedEventHandler(
+        target, queue_size=1, batch_size=1, flush_interval_seconds=0
+    )
+    logger = logging.getLogger("test.buffered_events")
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        logger.warning("first")
+        assert writer_blocked.wait(timeout=1)
+        for message in ["queued", "dropped", "also dropped"]:
+            logger.warning(message)
+
+        assert event_log_dropped_records(logger) == 2
+        release_writer.set()
+    finally:
+        _close_handlers(logger)
+
+    entries = [
+        json.loads(line)
+        for line in (tmp_path / "events.log").read_text(encoding="utf-8").splitlines()
+    ]
+    assert [entry["message"] for entry in entries][:2] == ["first", "queued"]
+    assert entries[-1]["message"] == "event_log_dropped"
+    assert entries[-1]["event"] == {"dropped_records": 2, "total": 2}
+
+
+def test_batch_rotating_file_handler_rotates_by_size(tmp_path):
+    handler = BatchRotatingFileHandler(
+        tmp_path / "events.log", max_bytes=10, backup_count=2
+    )
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "x" * 8, (), None)
+    try:
+        handler.emit_batch([record])
+        handler.emit_batch([record])
+    finally:
+        handler.close()
+
+    assert (tmp_path / "events.log.1").read_text(encoding="utf-8") == "x" * 8 + "\n"
+    assert (tmp_path / "events.log").read_text(encoding="utf-8") == "x" * 8 + "\n"
+
+
+def test_batch_rotating_file_handler_rotates_by_age(tmp_path, monkeypatch):
+    handler = BatchRotatingFileHandler(
+        tmp_path / "events.log", backup_count=1, rotate_interval_seconds=60
+    )
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "entry", (), None)
+    try:
+        handler.emit_batch([record])
+        started_at = handler._file_started_at
+        monkeypatch.setattr(
+            "_streamlit_app.app_core.time.time", lambda: started_at + 61
+        )
+        handler.emit_batch([record])
+    finally:
+        handler.close()
+
+    assert (tmp_path / "events.log.1").exists()
+
+
+def test_score_model_results_scores_each_success_once_and_ranks_best_first():
+    scores = {"Kurz.": 4.0, "Mittel.": 1.0}
+    score_fn = Mock(side_effect=lambda text: scores[text])
+
+    results = score_model_results(
+        {
+            "Model A": (True, "Mittel."),
+            "Model B": (False, "timeout"),
+            "Model C": (True, "Kurz."),
+        },
+        score_fn=score_fn,
+        cefr_fn=lambda score: f"Niveau {score}",
+        source_text="Ein sehr langer Ausgangstext.",
+    )
+    ranked = rank_model_results(results)
+
+    assert score_fn.call_count == 2
+    assert [result.model_name for result in results] == [
+        "Model A",
+        "Model B",
+        "Model C",
+    ]
+    assert [result.model_name for result in ranked] == ["Model C", "Model A", "Model B"]
+    assert ranked[0].cefr == "Niveau 4"
+    assert ranked[0].length_ratio == 0.25
+    assert ranked[2].score is None
+
+
+def test_format_model_results_shows_ranked_order_with_ratios():
+    success, output = format_model_results(
+        [
+            ModelResult("Model C", True, "Bester Text.", 3.6, "A2", 0.8, 0.5),
+            ModelResult("Model A", True, "Guter Text.", 1.2, "B1", 1.25, 1.0),
+            ModelResult("Model B", False, "timeout"),
+        ]
+    )
+
+    assert success is True
+    assert output.index("Model C") < output.index("Model A")
+    assert "(Verständlichkeit: 4, Niveau etwa A2, Länge 80% des Ausgangstexts" in output
+    assert "Abdeckung 100%" in output
+    assert "Fehlgeschlagen: Model B" in output
+
+
+def test_source_length_ratio_and_coverage_compare_with_source():
+    source = "Die Frist endet am 15. März 2025 für alle Gesuchstellenden."
+
+    assert source_length_ratio(source, "Die Frist endet am 15. März 2025.") == 0.7
+    # Key tokens are "15", "2025" and "gesuchstellenden".
+    assert source_coverage(source, "Die Frist endet am 15. März.") == pytest.approx(
+        1 / 3
+    )
+    assert source_length_ratio("", "Text") is None
+    assert source_coverage("Ja.", "Ja.") is None
+
+
+def test_result_payload_round_trip_restores_model_results():
+    result = ResultState(
+        source_text="original text",
+        response="generated output",
+        analysis=False,
+        simplification=False,
+        one_click=True,
+        model_choice="Model A",
+        model_names=("Model A", "Model B"),
+        time_processed=1.2,
+        score_source=-1.5,
+        model_results=(
+            ModelResult("Model A", True, "Text.", 2.0, "B1", 1.0, 0.5),
+            ModelResult("Model B", False, "timeout"),
+        ),
+    )
+
+    payload = json.loads(json.dumps(result_to_payload(result)))
+
+    assert result_from_payload(payload) == result
+
+
+def _done(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def test_collect_until_enough_good_cancels_outstanding_models():
+    slow = Future()
+    responses, cancelled = collect_until_enough_good(
+        {
+            "Model A": _done((True, "gut")),
+            "Model B": slow,
+            "Model C": _done((True, "auch gut")),
+        },
+        is_good=lambda response: "gut" in response,
+        min_good=2,
+    )
+
+    assert responses == {"Model A": (True, "gut"), "Model C": (True, "auch gut")}
+    assert cancelled == ["Model B"]
+    assert slow.cancelled()
+
+
+def test_collect_until_enough_good_waits_for_all_without_threshold():
+    is_good = Mock(return_value=False)
+
+    responses, cancelled = collect_until_enough_good(
+        {"Model A": _done((True, "schwer")), "Model B": _done((False, "timeout"))},
+        is_good=is_good,
+        min_good=0,
+    )
+
+    assert list(responses) == ["Model A", "Model B"]
+    assert cancelled == []
+    is_good.assert_called_once_with("schwer")
+
+
+def test_memoize_scores_scores_each_text_once():
+    score_fn = Mock(return_value=1.0)
+    score = memoize_scores(score_fn)
+
+    assert score("Text") == score("Text") == 1.0
+    score_fn.assert_called_once_with("Text")
+
+
+def test_format_model_results_lists_cancelled_models_separately():
+    success, output = format_model_results(
+        [
+            ModelResult("Model A", True, "Text.", 2.0, "B1"),
+            ModelResult("Model B", False, "timeout"),
+            ModelResult("Model C", False, "", cancelled=True),
+        ]
+    )
+
+    assert success is True
+    assert "Fehlgeschlagen: Model B -----" in output
+    assert "Nicht abgewartet: Model C -----" in output
+
+
+def test_prewarm_connections_opens_connections_concurrently_and_counts_failures():
+    started = Barrier(3, timeout=2)
+    calls = iter([None, None, OSError("unreachable")])
+    lock = Lock()
+
+    def open_connection():
+        # All three attempts must be in flight together to open three connections.
+        started.wait()
+        with lock:
+            outcome = next(calls)
+        if outcome is not None:
+            raise outcome
+
+    assert prewarm_connections(open_connection, 3) == 2
+
+
+def test_is_truncated_response_detects_unclosed_result_tag():
+    assert is_truncated_response("<leichtesprache>Ein Satz", "leichtesprache")
+    assert not is_truncated_response(
+        "<leichtesprache>Ein Satz.</leichtesprache>", "leichtesprache"
+    )
+    assert not is_truncated_response("Kein Tag.", "leichtesprache")
+
+
+def test_join_continuation_yields_a_complete_extractable_response():
+    response = join_continuation(
+        "<einfachesprache>Der erste Satz. Der zw",
+        " <einfachesprache>eite Satz.</einfachesprache>",
+        "einfachesprache",
+    )
+
+    assert not is_truncated_response(response, "einfachesprache")
+    assert extract_tagged_response(response, "einfachesprache") == (
+        "Der erste Satz. Der zweite Satz."
+    )
+    assert join_continuation("<a>Der erste", " Satz.</a>", "a") == (
+        "<a>Der erste Satz.</a>"
+    )
+
+
+def _engine(create, **options):
+    """Engine on the repository config with a fake `chat.completions.create`."""
+    config = load_app_config(repo_path("config.yaml"))
+    client = Mock()
+    client.chat.completions.create.side_effect = create
+    engine = SimplificationEngine(
+        lambda: config,
+        lambda api: client,
+        tracer=Tracer(),
+        metrics=AppMetrics(MetricsRegistry()),
+        **options,
+    )
+    return engine, config
+
+
+def _echo_completion(*, model, messages, stream=False, **settings):
+    """Answer with the source text between the tags the prompt asks for."""
+    prompt = messages[1]["content"]
+    tag = "leichtesprache" if "<leichtesprache>" in prompt else "einfachesprache"
+    source = prompt.rsplit("\n", 1)[-1]
+    content = f"<{tag}>{model}: {source}</{tag}>"
+    if stream:
+        return [_stream_chunk(content[:9]), _stream_chunk(content[9:])]
+    return Mock(choices=[Mock(message=Mock(content=content))], usage=None)
+
+
+def _stream_chunk(content):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(delta=SimpleNamespace(content=content))],
+        usage=None,
+    )
+
+
+def test_simplification_engine_keeps_concurrent_requests_apart():
+    engine, config = _engine(_echo_completion)
+    model = config.model_names[0]
+    requests = [
+        SimplificationRequest(
+            text=f"Text {index}", models=(model,), leichte_sprache=index % 2 == 0
+        )
+        for index in range(40)
+    ]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        outputs = list(
+            executor.map(lambda request: engine.invoke(request, model), requests)
+        )
+
+    for index, output in enumerate(outputs):
+        assert output.success
+        assert output.text.endswith(f"Text {index}")
+
+
+def test_simplification_engine_run_returns_outputs_in_request_order():
+    release = Event()
+
+    def create(*, model, messages, **settings):
+        if model == config.models[0].id:
+            release.wait(5)
+        return _echo_completion(model=model, messages=messages, **settings)
+
+    engine, config = _engine(create)
+    request = SimplificationRequest(text="Ein Text.", models=config.model_names)
+    arrived = []
+
+    try:
+        outputs = engine.run(
+            request, min_good=1, on_output=lambda output: arrived.append(output)
+        )
+    finally:
+        release.set()
+
+    assert [output.model_name for output in outputs] == list(config.model_names)
+    assert outputs[0].cancelled and not outputs[0].success
+    assert arrived and all(output.success for output in arrived)
+
+
+def test_simplification_engine_reports_failures_without_raising():
+    def create(**kwargs):
+        raise TimeoutError("provider down")
+
+    engine, config = _engine(create)
+    model = config.model_names[0]
+
+    output = engine.invoke(SimplificationRequest("Ein Text.", (model,)), model)
+
+    assert not output.success
+    assert output.text == "Model response could not be created."
+    assert engine.metrics.model_failures.value(model=config.model_ids[model]) == 1
+
+
+class _HangingStream:
+    """A response stream that gets no chunk until it is closed."""
+
+    def __init__(self):
+        self.closed = Event()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self.closed.wait(5)
+        # httpx fails the pending read of a response closed by another thread.
+        raise ConnectionError("response closed")
+
+    def close(self):
+        self.closed.set()
+
+
+def test_cancellation_token_calls_back_once_and_only_while_registered():
+    token = CancellationToken()
+    calls = []
+
+    with token.on_cancel(lambda: calls.append("left")):
+        pass
+    with token.on_cancel(lambda: calls.append("running")):
+        token.cancel()
+        token.cancel()
+    with token.on_cancel(lambda: calls.append("late")):
+        pass
+
+    assert token.cancelled
+    assert calls == ["running", "late"]
+
+
+def test_simplification_engine_aborts_a_cancelled_request():
+    stream = _HangingStream()
+    engine, config = _engine(lambda **kwargs: stream)
+    model = config.model_names[0]
+    cancel = CancellationToken()
+    Timer(0.05, cancel.cancel).start()
+
+    output = engine.invoke(
+        SimplificationRequest("Ein Text.", (model,)), model, cancel=cancel
+    )
+
+    assert output.cancelled and not output.success
+    assert stream.closed.is_set()
+    assert engine.metrics.model_cancellations.value(model=config.model_ids[model]) == 1
+    assert engine.metrics.model_failures.value(model=config.model_ids[model]) == 0
+
+
+def test_simplification_engine_run_aborts_requests_when_the_caller_leaves():
+    streams = []
+
+    def create(**kwargs):
+        streams.append(_HangingStream())
+        return streams[-1]
+
+    class ScriptStopped(BaseException):
+        """Stands in for Streamlit stopping an abandoned script run."""
+
+    engine, config = _engine(create)
+    request = SimplificationRequest(text="Ein Text.", models=config.model_names)
+
+    def on_wait():
+        raise ScriptStopped
+
+    with pytest.raises(ScriptStopped):
+        engine.run(request, on_wait=on_wait)
+
+    for stream in streams:
+        assert stream.closed.wait(1)
+
+
+def test_simplification_engine_retries_a_shared_request_whose_sender_left():
+    stream = _HangingStream()
+    sent = Event()
+
+    def create(**kwargs):
+        if not sent.is_set():
+            sent.set()
+            return stream
+        return _echo_completion(**kwargs)
+
+    engine, config = _engine(create)
+    model = config.model_names[0]
+    request = SimplificationRequest("Ein Text.", (model,))
+    cancel = CancellationToken()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leaving = executor.submit(engine.invoke, request, model, cancel=cancel)
+        sent.wait(5)
+        staying = executor.submit(engine.invoke, request, model)
+        Timer(0.05, cancel.cancel).start()
+
+    assert leaving.result().cancelled
+    assert staying.result().success
+
+
+def test_simplification_engine_fails_fast_while_a_circuit_is_open():
+    def create(**kwargs):
+        raise TimeoutError("provider down")
+
+    engine, config = _engine(
+        create, circuit_breaker=CircuitBreaker(failure_threshold=2, cooldown_seconds=60)
+    )
+    first, second = config.model_names[:2]
+    request = SimplificationRequest("Ein Text.", (first,))
+    model_id = config.model_ids[first]
+
+    outputs = [engine.invoke(request, first) for _ in range(3)]
+
+    assert [output.rejected for output in outputs] == [False, False, True]
+    assert engine.client_for(None).chat.completions.create.call_count == 2
+    assert engine.metrics.model_rejections.value(model=model_id) == 1
+    assert engine.circuit_state(first) == "open"
+    assert first not in engine.available_models(config.model_names)
+    assert engine.available_models((first,)) == (first,)
+    assert f'ssl_model_circuit_state{{model="{model_id}"}} 2' in (
+        engine.metrics.registry.render()
+    )
+    assert engine.circuit_state(second) == "closed"
+
+
+def test_rate_limit_timeouts_leave_the_circuit_closed():
+    engine, config = _engine(
+        _echo_completion,
+        circuit_breaker=CircuitBreaker(failure_threshold=1, cooldown_seconds=60),
+        rate_limiter=SimpleNamespace(acquire=lambda timeout: False),
+    )
+    model = config.model_names[0]
+
+    output = engine.invoke(SimplificationRequest("Ein Text.", (model,)), model)
+
+    assert not output.success and output.rate_limited
+    assert not output.measures_model
+    assert engine.client_for(None).chat.completions.create.call_count == 0
+    assert engine.circuit_state(model) == "closed"
+
+
+def test_simplification_engine_stops_waiting_when_the_circuit_opens():
+    stream = _HangingStream()
+    engine, config = _engine(
+        lambda **kwargs: stream,
+        circuit_breaker=CircuitBreaker(failure_threshold=1, cooldown_seconds=60),
+    )
+    model = config.model_names[0]
+    # Another session's request to the same model fails meanwhile.
+    Timer(
+        0.05, engine.circuit_breaker.record_failure, [config.model_ids[model]]
+    ).start()
+
+    output = engine.invoke(SimplificationRequest("Ein Text.", (model,)), model)
+
+    assert not output.success and not output.cancelled
+    assert stream.closed.is_set()
+
+
+def test_simplification_engine_applies_the_minimum_budget_of_each_model():
+    engine, config = _engine(_echo_completion)
+    create = engine.client_for(None).chat.completions.create
+    reasoning = next(model for model in config.models if model.min_tokens)
+    other = next(model for model in config.models if not model.min_tokens)
+
+    for model in (reasoning, other):
+        engine.invoke(SimplificationRequest("Ein Text.", (model.name,)), model.name)
+        assert (
+            create.call_args.kwargs["max_tokens"] == config.model_min_tokens[model.id]
+        )
+
+    assert config.model_min_tokens[other.id] == config.api.min_tokens
+
+
+def test_simplification_engine_sends_only_paragraphs_the_memory_does_not_know(
+    tmp_path,
+):
+    engine, config = _engine(_echo_completion)
+    model = config.model_names[0]
+    engine.translation_memory = TranslationMemory(tmp_path / "memory.sqlite3")
+    engine.translation_memory.add(
+        "Freundliche Grüsse", "Viele Grüsse", mode="einfache_sprache", model=model
+    )
+
+    output = engine.invoke(
+        SimplificationRequest("Ein Text.\n\nFreundliche Grüsse", (model,)), model
+    )
+
+    prompt = engine.client_for(None).chat.completions.create.call_args.kwargs[
+        "messages"
+    ][1]["content"]
+    assert output.success and output.memory_paragraphs == 1
+    assert "Freundliche Grüsse" not in prompt
+    assert output.text == f"{config.model_ids[model]}: Ein Text.\n\nViele Grüsse"
+
+
+def test_simplification_engine_refines_a_draft_of_the_whole_text(tmp_path):
+    engine, config = _engine(_echo_completion)
+    model = config.model_names[0]
+    engine.translation_memory = TranslationMemory(tmp_path / "memory.sqlite3")
+    engine.translation_memory.add(
+        "Freundliche Grüsse", "Viele Grüsse", mode="einfache_sprache", model=model
+    )
+
+    output = engine.invoke(
+        SimplificationRequest(
+            "Ein Text.\n\nFreundliche Grüsse",
+            (model,),
+            draft="Ein Entwurf.\n\nViele Grüsse",
+        ),
+        model,
+    )
+
+    prompt = engine.client_for(None).chat.completions.create.call_args.kwargs[
+        "messages"
+    ][1]["content"]
+    assert output.success and output.memory_paragraphs == 0
+    assert "Ein Text.\n\nFreundliche Grüsse" in prompt
+    assert prompt.endswith("Ein Entwurf.\n\nViele Grüsse")
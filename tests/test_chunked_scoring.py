@@ -0,0 +1,79 @@
+import pytest
+
+from _streamlit_app.chunked_scoring import (
+    ChunkScore,
+    iter_chunks,
+    score_document,
+)
+
+
+def _lines(text):
+    return iter(text.splitlines(keepends=True))
+
+
+def test_text_within_one_chunk_is_scored_unchanged():
+    text = "First paragraph.\n\nSecond paragraph.\n"
+    scored = []
+
+    result = score_document(_lines(text), lambda chunk: scored.append(chunk) or 1.3)
+
+    assert scored == [text]
+    assert result.score == 1.3
+    assert result.chunks == (ChunkScore(0, 1, len(text), 4, 1.3),)
+
+
+def test_chunks_keep_paragraphs_together_and_report_their_start_line():
+    text = "aaa aaa\n\nbbb bbb\n\nccc ccc\n"
+
+    chunks = list(iter_chunks(_lines(text), chunk_chars=18))
+
+    assert chunks == [(1, "aaa aaa\n\nbbb bbb\n\n"), (5, "ccc ccc\n")]
+
+
+def test_long_paragraphs_are_split_at_sentence_ends_then_anywhere():
+    text = "One two. Three four. " + "x" * 25
+
+    chunks = [chunk for _, chunk in iter_chunks([text], chunk_chars=20)]
+
+    assert chunks == ["One two. Three four.", " " + "x" * 19, "x" * 6]
+    assert all(len(chunk) <= 20 for chunk in chunks)
+
+
+def test_text_without_blank_lines_is_chunked_while_it_is_read():
+    read = []
+
+    def lines():
+        for number in range(1000):
+            read.append(number)
+            yield f"Satz {number} steht hier.\n"
+
+    chunks = iter_chunks(lines(), chunk_chars=200)
+    start_line, first = next(chunks)
+
+    assert start_line == 1 and len(first) <= 200
+    assert first.endswith("steht hier.\n")
+    # Only the lines of the first chunk and the next piece have been read.
+    assert len(read) < 30
+    rest = list(chunks)
+    assert all(len(chunk) <= 200 for _, chunk in rest)
+    assert first + "".join(chunk for _, chunk in rest) == "".join(
+        f"Satz {number} steht hier.\n" for number in range(1000)
+    )
+
+
+def test_document_score_weights_chunks_by_words_and_skips_unscored_ones():
+    text = "a b c\n\nd\n\n\n\ne f g h\n"
+    scores = {"a b c\n\n": 2.0, "d\n\n\n\n": 6.0, "e f g h\n": None}
+    reported = []
+
+    result = score_document(
+        _lines(text), scores.get, chunk_chars=8, on_chunk=reported.append
+    )
+
+    assert [chunk.score for chunk in result.chunks] == [2.0, 6.0, None]
+    assert reported == list(result.chunks)
+    assert result.score == pytest.approx(3.0)
+
+
+def test_document_without_scorable_chunks_has_no_score():
+    assert score_document(_lines("\n\n"), lambda chunk: 1.0).score is None
@@ -0,0 +1,95 @@
+import pytest
+
+from _streamlit_app.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(failure_threshold=2, cooldown_seconds=30, clock=clock)
+
+
+def test_circuit_opens_after_failures_in_a_row(breaker):
+    breaker.record_failure("a")
+    breaker.record_success("a")
+    breaker.record_failure("a")
+    assert breaker.state("a") == CLOSED
+
+    breaker.record_failure("a")
+
+    assert breaker.state("a") == OPEN
+    assert not breaker.acquire("a")
+    assert breaker.acquire("b")
+
+
+def test_half_open_circuit_lets_one_probe_through(breaker, clock):
+    breaker.record_failure("a")
+    breaker.record_failure("a")
+    clock.now = 30
+
+    assert breaker.state("a") == HALF_OPEN
+    assert breaker.acquire("a")
+    assert not breaker.acquire("a")
+
+    breaker.record_success("a")
+
+    assert breaker.state("a") == CLOSED
+    assert breaker.acquire("a")
+
+
+def test_failed_probe_opens_the_circuit_for_another_cooldown(breaker, clock):
+    breaker.record_failure("a")
+    breaker.record_failure("a")
+    clock.now = 30
+    assert breaker.acquire("a")
+
+    breaker.record_failure("a")
+    clock.now = 59
+
+    assert breaker.state("a") == OPEN
+    assert not breaker.acquire("a")
+
+
+def test_released_probe_frees_the_slot_for_the_next_one(breaker, clock):
+    breaker.record_failure("a")
+    breaker.record_failure("a")
+    clock.now = 30
+    assert breaker.acquire("a")
+
+    breaker.release("a")
+
+    assert breaker.acquire("a")
+
+
+def test_opening_the_circuit_calls_back_the_waiting_calls(breaker):
+    aborted = []
+
+    with breaker.on_open("a", lambda: aborted.append("waiting")):
+        breaker.record_failure("a")
+        breaker.record_failure("a")
+    with breaker.on_open("a", lambda: aborted.append("later")):
+        breaker.record_failure("a")
+
+    assert aborted == ["waiting"]
+
+
+def test_failure_threshold_must_be_at_least_one():
+    with pytest.raises(ValueError, match="at least 1"):
+        CircuitBreaker(failure_threshold=0, cooldown_seconds=30)
@@ -0,0 +1,111 @@
+import pytest
+
+from _streamlit_app.formatting_rules import normalize_formatting
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        # Times
+        ("Wir öffnen um 14 Uhr.", "Wir öffnen um 14.00 Uhr."),
+        ("Beginn: 9:25 Uhr", "Beginn: 9.25 Uhr"),
+        ("Beginn: 09.05 Uhr", "Beginn: 9.05 Uhr"),
+        ("Schluss 24 Uhr", "Schluss 24.00 Uhr"),
+        ("Der Schalter ist um 9:30 offen.", "Der Schalter ist um 9.30 Uhr offen."),
+        ("Offen von 8-12 Uhr", "Offen von 8.00-12.00 Uhr"),
+        ("Offen 8:30 \u2013 12 Uhr", "Offen 8.30-12.00 Uhr"),
+        ("Es gilt 14.00 Uhr und 22.30 Uhr.", "Es gilt 14.00 Uhr und 22.30 Uhr."),
+        # Dates
+        ("Frist: 1.3.2024", "Frist: 1. März 2024"),
+        ("Am 01. 12. 2025 ist Schluss.", "Am 1. Dezember 2025 ist Schluss."),
+        ("Ab 03. Januar 2022", "Ab 3. Januar 2022"),
+        ("Bis 15.Februar", "Bis 15. Februar"),
+        (
+            "Am 1. Sept. 2024 und 2. Jan. 2025",
+            "Am 1. September 2024 und 2. Januar 2025",
+        ),
+        ("Am 1. Mai 2022", "Am 1. Mai 2022"),
+        # Phone numbers
+        ("Tel. 044/123 45 67", "Tel. 044 123 45 67"),
+        ("Tel. 0441234567", "Tel. 044 123 45 67"),
+        ("Tel. (044) 123 45 67", "Tel. 044 123 45 67"),
+        ("Tel. +41 (0)44 123 45 67", "Tel. +41 44 123 45 67"),
+        ("Tel. +41441234567", "Tel. +41 44 123 45 67"),
+        ("Telefon: 0441234567", "Telefon: 044 123 45 67"),
+        ("Konto 0301234567", "Konto 0301234567"),
+        ("Kundennummer 0441234567.", "Kundennummer 0441234567."),
+        # Numbers and money
+        ("Es sind 1'250'000 Franken.", "Es sind 1 250 000 Franken."),
+        ("Es sind 4'500 Franken.", "Es sind 4500 Franken."),
+        ("Es kostet CHF 1250000.", "Es kostet CHF 1 250 000."),
+        ("Es kostet 25000 Franken.", "Es kostet 25 000 Franken."),
+        ("Es kostet Fr. 20.\u2013.", "Es kostet CHF 20.00."),
+        ("Es kostet SFr. 12.50.", "Es kostet CHF 12.50."),
+        ("Es kostet 12.50 Franken.", "Es kostet CHF 12.50."),
+        ("Es kostet 12.50 CHF.", "Es kostet CHF 12.50."),
+        ("Es kostet 20 Fr.", "Es kostet 20 Franken"),
+        ("Es kostet 20 CHF.", "Es kostet CHF 20."),
+        ("Es kostet CHF 12,50.", "Es kostet CHF 12.50."),
+        ("Es kostet CHF 45,2 Millionen.", "Es kostet CHF 45,2 Millionen."),
+        ("Es kostet EUR 14,90.", "Es kostet EUR 14,90."),
+        ("Es sind 30 % mehr.", "Es sind 30 Prozent mehr."),
+        ("Es sind 30% mehr.", "Es sind 30 Prozent mehr."),
+        ("Höchstens 80 km/h.", "Höchstens 80 Kilometer pro Stunde."),
+        # Abbreviations
+        ("Obst, z.B. Äpfel", "Obst, zum Beispiel Äpfel"),
+        ("Z. B. Äpfel", "Zum Beispiel Äpfel"),
+        ("Also d.h. heute", "Also das heisst heute"),
+        ("Äpfel bzw. Birnen", "Äpfel beziehungsweise Birnen"),
+        (
+            "Das kommt evtl. später, ggf. inkl. Zins.",
+            "Das kommt eventuell später, gegebenenfalls inklusive Zins.",
+        ),
+        ("Äpfel, Birnen usw. Die Früchte", "Äpfel, Birnen und so weiter. Die Früchte"),
+        ("Äpfel, Birnen usw. und Nüsse", "Äpfel, Birnen und so weiter und Nüsse"),
+        ("Äpfel, Birnen etc.", "Äpfel, Birnen etcetera."),
+        ("Äpfel etc.\nNeue Zeile", "Äpfel etcetera.\nNeue Zeile"),
+        # Quotes
+        ("Das Wort „Gesetz“ ist wichtig.", "Das Wort «Gesetz» ist wichtig."),
+        ("Das Wort “Gesetz” ist wichtig.", "Das Wort «Gesetz» ist wichtig."),
+        ('Er sagt: "Ja".', "Er sagt: «Ja»."),
+        ('("Ja")', "(«Ja»)"),
+    ],
+)
+def test_normalize_formatting_applies_the_mechanical_rules(text, expected):
+    assert normalize_formatting(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Stammnummer 123.456.789",
+        "AHV-Nummer 756.1234.5678.90",
+        "Konto 01-100101-9",
+        "Im Massstab 1:10 zeichnen.",
+        "Die Jahre 2025-2030.",
+        "Es sind 10 Mio. Franken.",
+        "Fr. Meier kommt am 3. Mai.",
+        "Er kam am 1.\u20133. Mai.",
+        "PLZ 8001 Zürich",
+        "Es sind 3,75 Prozent.",
+        "Gebühr: CHF 1 250.50",
+        "Das gilt für 12 Personen.",
+    ],
+)
+def test_normalize_formatting_leaves_ambiguous_forms_alone(text):
+    assert normalize_formatting(text) == text
+
+
+def test_normalize_formatting_is_idempotent():
+    text = (
+        "Am 1.3.2024 um 14 Uhr, z.B. „hier“. Tel. 044/123 45 67, "
+        "Fr. 20.\u2013 oder 1'250'000 Franken usw. Danke."
+    )
+
+    once = normalize_formatting(text)
+
+    assert once == (
+        "Am 1. März 2024 um 14.00 Uhr, zum Beispiel «hier». Tel. 044 123 45 67, "
+        "CHF 20.00 oder 1 250 000 Franken und so weiter. Danke."
+    )
+    assert normalize_formatting(once) == once
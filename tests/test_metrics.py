@@ -0,0 +1,73 @@
+import urllib.request
+
+import pytest
+
+from _streamlit_app.metrics import AppMetrics, MetricsRegistry, start_metrics_server
+
+
+def test_histogram_renders_cumulative_buckets_sum_and_count():
+    registry = MetricsRegistry()
+    latency = registry.histogram(
+        "latency_seconds", "Latency.", ("model",), buckets=(1, 5)
+    )
+
+    latency.observe(0.5, model="a")
+    latency.observe(1, model="a")
+    latency.observe(7.5, model="a")
+
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{model="a",le="1"} 2' in lines
+    assert 'latency_seconds_bucket{model="a",le="5"} 2' in lines
+    assert 'latency_seconds_bucket{model="a",le="+Inf"} 3' in lines
+    assert 'latency_seconds_sum{model="a"} 9' in lines
+    assert 'latency_seconds_count{model="a"} 3' in lines
+    assert "# TYPE latency_seconds histogram" in lines
+
+
+def test_counter_and_gauge_track_values_per_label_set():
+    registry = MetricsRegistry()
+    failures = registry.counter("failures_total", "Failures.", ("model",))
+    in_flight = registry.gauge("in_flight", "In flight.")
+
+    failures.inc(model='provider/"quoted"')
+    failures.inc(model='provider/"quoted"')
+    with in_flight.track_in_progress():
+        assert in_flight.value() == 1
+
+    output = registry.render()
+    assert 'failures_total{model="provider/\\"quoted\\""} 2' in output
+    assert "in_flight 0" in output.splitlines()
+
+    with pytest.raises(ValueError, match="only increase"):
+        failures.inc(-1, model="a")
+    with pytest.raises(ValueError, match="expects labels"):
+        failures.inc(other="a")
+
+
+def test_registry_returns_existing_metric_and_runs_collectors():
+    registry = MetricsRegistry()
+    gauge = registry.gauge("queue_size", "Queue size.")
+    registry.add_collector(lambda: gauge.set(4))
+
+    assert registry.gauge("queue_size", "Queue size.") is gauge
+    assert "queue_size 4" in registry.render().splitlines()
+    with pytest.raises(ValueError, match="already registered"):
+        registry.counter("queue_size", "Queue size.")
+
+
+def test_metrics_server_serves_prometheus_text():
+    registry = MetricsRegistry()
+    metrics = AppMetrics(registry)
+    metrics.model_failures.inc(model="model/a")
+    server = start_metrics_server(registry, host="127.0.0.1", port=0)
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(
+            f"http://127.0.0.1:{port}/metrics", timeout=2
+        ) as response:
+            body = response.read().decode("utf-8")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert 'ssl_model_request_failures_total{model="model/a"} 1' in body
@@ -0,0 +1,69 @@
+import pytest
+
+from _streamlit_app.model_routing import (
+    ModelObservation,
+    ModelRouter,
+    ModelStatsStore,
+    summarize_observations,
+)
+
+
+def _observe(router, name, latency, gain, *, success=True, times=3):
+    for _ in range(times):
+        router.record(ModelObservation(name, latency, success, gain))
+
+
+def test_summarize_observations_weighs_gain_by_success_and_latency():
+    stats = summarize_observations(
+        "A",
+        [
+            ModelObservation("A", 2.0, True, 3.0),
+            ModelObservation("A", 4.0, True, 1.0),
+            ModelObservation("A", 10.0, False),
+            ModelObservation("A", 3.0, True, 2.0),
+        ],
+    )
+
+    assert stats.samples == 4
+    assert stats.failure_rate == 0.25
+    assert stats.mean_gain == 2.0
+    assert stats.latency_p50 == 4.0
+    assert stats.latency_p95 == 10.0
+    assert stats.quality_per_second == pytest.approx(2.0 * 0.75 / 4.0)
+
+
+def test_summarize_observations_ranks_harmful_slow_models_lowest():
+    fast = summarize_observations("A", [ModelObservation("A", 1.0, True, -1.0)])
+    slow = summarize_observations("B", [ModelObservation("B", 9.0, True, -1.0)])
+
+    assert slow.quality_per_second < fast.quality_per_second < 0
+
+
+def test_router_explores_unmeasured_models_in_config_order(tmp_path):
+    router = ModelRouter(ModelStatsStore(tmp_path / "stats.sqlite3"), min_samples=2)
+    _observe(router, "A", 1.0, 2.0, times=2)
+
+    assert router.choose(["A", "B", "C"]) == "B"
+
+
+def test_router_prefers_best_gain_per_second(tmp_path):
+    router = ModelRouter(ModelStatsStore(tmp_path / "stats.sqlite3"), min_samples=3)
+    _observe(router, "Slow but good", 20.0, 4.0)
+    _observe(router, "Fast and good", 4.0, 3.0)
+    _observe(router, "Unreliable", 1.0, 5.0, success=False)
+
+    assert router.choose(["Slow but good", "Fast and good", "Unreliable"]) == (
+        "Fast and good"
+    )
+
+
+def test_stats_persist_and_keep_only_the_sliding_window(tmp_path):
+    path = tmp_path / "stats.sqlite3"
+    router = ModelRouter(ModelStatsStore(path, window=3))
+    _observe(router, "A", 30.0, 1.0, times=3)
+    _observe(router, "A", 2.0, 1.0, times=3)
+
+    (stats,) = ModelRouter(ModelStatsStore(path, window=3)).stats(["A", "B"])
+
+    assert stats.samples == 3
+    assert stats.latency_p95 == 2.0
@@ -0,0 +1,149 @@
+import random
+
+import pytest
+
+from _streamlit_app.app_core import (
+    extract_tagged_response,
+    is_truncated_response,
+    strip_markdown,
+)
+from _streamlit_app.response_parser import (
+    ResultPreview,
+    TaggedResponseParser,
+    parse_tagged_response,
+)
+
+
+def _regex_pipeline(response, tag):
+    try:
+        cleaned = strip_markdown(extract_tagged_response(response.strip(), tag))
+    except ValueError as error:
+        return ("error", str(error))
+    return cleaned.replace("ß", "ss")
+
+
+def _parse_in_chunks(response, tag, sizes):
+    parser = TaggedResponseParser(tag)
+    position = 0
+    while position < len(response):
+        size = next(sizes)
+        parser.feed(response[position : position + size])
+        position += size
+    try:
+        return parser.finish()
+    except ValueError as error:
+        return ("error", str(error))
+
+
+def test_parser_matches_regex_pipeline_for_random_responses_and_chunkings():
+    rng = random.Random(38)
+    pieces = ["<t>", "</t>", "<t", "/t>", "</", "#", "##", " ", "\n", "\t"]
+    pieces += ["*", "**", "_", "ß", "a", "b"]
+    sizes = iter(lambda: rng.randint(0, 6), None)
+
+    for _ in range(20000):
+        response = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 25)))
+        assert _parse_in_chunks(response, "t", sizes) == _regex_pipeline(
+            response, "t"
+        ), response
+
+
+def test_analysis_is_parsed_without_the_formatting_rules():
+    analysis = (
+        "Satz: «Die Gebühr beträgt Fr. 20.-.» Analyse: Schreibe «z.B.» aus und "
+        "ersetze «14:30 Uhr» durch «14.30 Uhr»."
+    )
+    response = f"<einfachesprache>{analysis}</einfachesprache>"
+    expected = analysis.replace("ß", "ss")
+
+    assert (
+        parse_tagged_response(response, "einfachesprache", format_rules=False)
+        == expected
+    )
+    preview = ResultPreview("einfachesprache", format_rules=False)
+    assert preview.feed(response) + preview.flush() == expected
+    assert parse_tagged_response(response, "einfachesprache") != expected
+
+
+def test_parse_tagged_response_cleans_markdown_and_eszett():
+    response = (
+        "Hier ist der Text:\n<einfachesprache>\n## Titel\n"
+        "Das ist **gross** und _wichtig_. Strasse oder Straße.\n</einfachesprache>"
+    )
+
+    assert parse_tagged_response(response, "einfachesprache") == (
+        "Titel\nDas ist gross und wichtig. Strasse oder Strasse."
+    )
+
+
+def test_parser_returns_text_as_tag_pairs_close():
+    parser = TaggedResponseParser("t")
+
+    assert parser.feed("<t>Erster Teil</") == ""
+    # The last word waits for the next one, as a formatting rule may span both.
+    assert parser.feed("t> dazwischen <t>Zwei") == "Erster "
+    assert parser.feed("ter Teil</t>") == "Teil\nZweiter "
+    assert parser.finish() == "Erster Teil\nZweiter Teil"
+
+
+@pytest.mark.parametrize(
+    ("response", "message"),
+    [
+        ("Kein Tag.", "did not contain expected <t> tags"),
+        ("<t>Nur geöffnet.", "did not contain expected <t> tags"),
+        ("<t> \n </t>", "contained empty <t> tags"),
+    ],
+)
+def test_parse_tagged_response_rejects_missing_or_empty_results(response, message):
+    with pytest.raises(ValueError, match=message):
+        parse_tagged_response(response, "t")
+
+
+def test_preview_matches_final_result_for_closed_responses():
+    rng = random.Random(41)
+    pieces = ["<t>", "</t>", "#", "## ", " ", "\n", "**", "_", "ß", "a", "b"]
+
+    for _ in range(5000):
+        response = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 25)))
+        if is_truncated_response(response, "t"):
+            continue
+        try:
+            final = parse_tagged_response(response, "t")
+        except ValueError:
+            continue
+        preview = ResultPreview("t")
+        streamed = "".join(
+            preview.feed(response[i : i + 3]) for i in range(0, len(response), 3)
+        )
+        assert final.startswith(streamed)
+        assert preview.finish() == final
+
+
+def test_preview_shows_text_before_the_closing_tag():
+    preview = ResultPreview("t")
+
+    assert preview.feed("Hier: <t>Der **Bund** ") == "Der "
+    assert preview.feed("macht ein Gesetz.</t>") == "Bund macht ein "
+    assert preview.flush() == "Gesetz."
+
+
+def test_formatting_rules_give_the_same_result_for_any_chunking():
+    rng = random.Random(44)
+    pieces = ["<t>", "</t>", " ", "\n", "**", "a", "Uhr", "14", ":", ".", "-"]
+    pieces += ["z. B.", "usw.", "Die", "„", "“", '"', "%", "044/123 45 67"]
+    pieces += ["1.1.2022", "Jan.", "Fr.", "CHF", "Franken", "'000", ","]
+    sizes = iter(lambda: rng.randint(0, 6), None)
+
+    for _ in range(5000):
+        response = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 25)))
+        try:
+            final = parse_tagged_response(response, "t")
+        except ValueError:
+            continue
+        assert _parse_in_chunks(response, "t", sizes) == final, response
+        if not is_truncated_response(response, "t"):
+            preview = ResultPreview("t")
+            streamed = "".join(
+                preview.feed(response[i : i + 3]) for i in range(0, len(response), 3)
+            )
+            assert streamed + preview.flush() == final, response
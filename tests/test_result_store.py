@@ -0,0 +1,64 @@
+import pytest
+
+from _streamlit_app.result_store import (
+    InMemoryResultStore,
+    SQLiteResultStore,
+    create_result_store,
+)
+
+
+def test_in_memory_result_store_evicts_least_recently_used():
+    store = InMemoryResultStore(max_entries=2)
+    store.put("a", {"response": "A"})
+    store.put("b", {"response": "B"})
+
+    assert store.get("a") == {"response": "A"}
+    store.put("c", {"response": "C"})
+
+    assert store.get("b") is None
+    assert store.get("a") == {"response": "A"}
+    assert store.get("c") == {"response": "C"}
+    assert len(store) == 2
+
+
+def test_sqlite_result_store_persists_across_instances(tmp_path):
+    path = tmp_path / "results.sqlite3"
+    SQLiteResultStore(path).put("a", {"response": "Grüezi", "model_names": ["A"]})
+
+    assert SQLiteResultStore(path).get("a") == {
+        "response": "Grüezi",
+        "model_names": ["A"],
+    }
+    assert SQLiteResultStore(path).get("missing") is None
+
+
+def test_sqlite_result_store_keeps_only_most_recent_entries(tmp_path):
+    store = SQLiteResultStore(tmp_path / "results.sqlite3", max_entries=2)
+    for result_id in ["a", "b", "c"]:
+        store.put(result_id, {"response": result_id})
+
+    assert store.get("a") is None
+    assert len(store) == 2
+
+
+def test_create_result_store_selects_backend_and_resolves_relative_path(tmp_path):
+    memory_store = create_result_store({"backend": "memory"}, base_dir=tmp_path)
+    sqlite_store = create_result_store(
+        {"backend": "sqlite", "sqlite_path": "store.sqlite3"}, base_dir=tmp_path
+    )
+
+    assert isinstance(memory_store, InMemoryResultStore)
+    assert isinstance(sqlite_store, SQLiteResultStore)
+    assert sqlite_store.path == tmp_path / "store.sqlite3"
+
+
+@pytest.mark.parametrize(
+    ("results_config", "message"),
+    [
+        ({"backend": "redis"}, "'memory' or 'sqlite'"),
+        ({"backend": "memory", "max_entries": 0}, "at least 1"),
+    ],
+)
+def test_create_result_store_rejects_invalid_config(tmp_path, results_config, message):
+    with pytest.raises(ValueError, match=message):
+        create_result_store(results_config, base_dir=tmp_path)
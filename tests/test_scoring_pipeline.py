@@ -0,0 +1,62 @@
+import sys
+from types import ModuleType, SimpleNamespace
+
+import pytest
+
+from _streamlit_app.scoring_pipeline import (
+    capped_score,
+    configure_scoring,
+    find_pipelines,
+    slim_pipelines,
+)
+
+
+class FakeLanguage:
+    def __init__(self, *pipe_names):
+        self.pipe_names = list(pipe_names)
+        self.max_length = 1_000_000
+
+    def remove_pipe(self, name):
+        self.pipe_names.remove(name)
+
+
+@pytest.fixture
+def nlp(monkeypatch):
+    nlp = FakeLanguage("tok2vec", "tagger", "parser", "ner")
+    module = ModuleType("zix.understandability")
+    module.nlp = nlp
+    module.alias = nlp
+    monkeypatch.setitem(sys.modules, "zix.understandability", module)
+    other = ModuleType("zixel")
+    other.nlp = FakeLanguage("ner")
+    monkeypatch.setitem(sys.modules, "zixel", other)
+    return nlp
+
+
+def test_find_pipelines_returns_each_zix_pipeline_once(nlp):
+    assert find_pipelines() == [nlp]
+
+
+def test_slim_pipelines_removes_present_components_and_caps_length(nlp):
+    removed = slim_pipelines([nlp], ("ner", "lemmatizer"), max_chars=500)
+
+    assert removed == ["ner"]
+    assert nlp.pipe_names == ["tok2vec", "tagger", "parser"]
+    assert nlp.max_length == 500
+
+
+def test_capped_score_skips_texts_above_the_limit():
+    score = capped_score(lambda text: 1.5, max_chars=5)
+
+    assert score("short") == 1.5
+    assert score("too long") is None
+
+
+def test_configure_scoring_slims_the_loaded_zix_pipeline(nlp):
+    scoring_config = SimpleNamespace(remove_components=("ner",), max_chars=10)
+
+    score = configure_scoring(lambda text: 2.0, scoring_config)
+
+    assert nlp.pipe_names == ["tok2vec", "tagger", "parser"]
+    assert score("a" * 10) == 2.0
+    assert score("a" * 11) is None
@@ -0,0 +1,81 @@
+import multiprocessing
+import sqlite3
+
+import pytest
+
+from _streamlit_app.shared_state import (
+    SQLiteRateLimiter,
+    SQLiteScoreCache,
+    connect_sqlite,
+)
+
+
+def test_connect_sqlite_uses_wal_mode(tmp_path):
+    connection = connect_sqlite(tmp_path / "state.sqlite3")
+
+    assert connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    connection.close()
+
+
+def test_score_cache_computes_each_text_once_and_keeps_recent_entries(tmp_path):
+    cache = SQLiteScoreCache(tmp_path / "state.sqlite3", max_entries=2)
+    computed = []
+
+    def score(text):
+        computed.append(text)
+        return len(text) / 10
+
+    assert cache.get_or_compute("abc", score) == 0.3
+    assert cache.get_or_compute("abc", score) == 0.3
+    cache.get_or_compute("de", score)
+    cache.get_or_compute("f", score)
+    cache.get_or_compute("abc", score)
+
+    assert computed == ["abc", "de", "f", "abc"]
+
+
+def test_rate_limiter_refills_tokens_over_time(tmp_path):
+    now = [1000.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    limiter = SQLiteRateLimiter(
+        tmp_path / "state.sqlite3",
+        requests_per_minute=60,
+        burst=2,
+        clock=lambda: now[0],
+        sleep=sleep,
+    )
+
+    assert limiter.acquire(timeout=0)
+    assert limiter.acquire(timeout=0)
+    assert not limiter.acquire(timeout=0)
+    assert limiter.acquire(timeout=5)
+    assert sleeps == [pytest.approx(1.0)]
+
+
+def _acquire_all(path, results):
+    limiter = SQLiteRateLimiter(path, requests_per_minute=0.001, burst=20)
+    results.put(sum(limiter.acquire(timeout=0) for _ in range(20)))
+
+
+def test_rate_limit_is_shared_between_processes(tmp_path):
+    path = tmp_path / "state.sqlite3"
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = [
+        context.Process(target=_acquire_all, args=(path, results)) for _ in range(4)
+    ]
+    for process in processes:
+        process.start()
+    granted = sum(results.get(timeout=60) for _ in processes)
+    for process in processes:
+        process.join(timeout=60)
+
+    # Four replicas competing for one bucket never hand out more than it holds.
+    assert granted == 20
+    row = sqlite3.connect(path).execute("SELECT tokens FROM rate_limits").fetchone()
+    assert row[0] < 1
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from _streamlit_app.structured_output import (
+    SIMPLIFICATION_SCHEMA,
+    parse_structured_response,
+    response_format,
+)
+
+
+def test_response_format_requests_strict_schema_per_mode():
+    simplification = response_format(analysis=False)
+    analysis = response_format(analysis=True)
+
+    assert simplification["type"] == "json_schema"
+    assert simplification["json_schema"]["strict"] is True
+    assert simplification["json_schema"]["schema"] is SIMPLIFICATION_SCHEMA
+    assert analysis["json_schema"]["name"] == "analysis"
+
+
+def test_parse_structured_simplification_cleans_text_and_terms():
+    content = json.dumps(
+        {
+            "text": "## Titel\nDas ist **gross**. Die Strasse ist gesperrt.",
+            "terms": [{"term": "Vernehmlassung", "explanation": "Eine _Umfrage_."}],
+        }
+    )
+
+    result = parse_structured_response(f"```json\n{content}\n```", analysis=False)
+
+    assert result.text == "Titel\nDas ist gross. Die Strasse ist gesperrt."
+    assert result.terms == (("Vernehmlassung", "Eine Umfrage."),)
+
+
+def test_parse_structured_analysis_renders_one_block_per_sentence():
+    content = json.dumps(
+        {
+            "sentences": [
+                {"sentence": "Satz A.", "analysis": "Zu lang.", "suggestion": "A."},
+                # Quoted sentences and advice keep their formatting.
+                {
+                    "sentence": "Es kostet Fr. 20.-.",
+                    "analysis": "Schreibe «z.B.» aus.",
+                    "suggestion": "Es kostet 20 Franken.",
+                },
+            ]
+        }
+    )
+
+    result = parse_structured_response(content, analysis=True)
+
+    assert result.text == (
+        "Satz 1: Satz A.\nAnalyse: Zu lang.\nVorschlag: A.\n\n"
+        "Satz 2: Es kostet Fr. 20.-.\nAnalyse: Schreibe «z.B.» aus.\n"
+        "Vorschlag: Es kostet 20 Franken."
+    )
+    assert result.terms == ()
+
+
+@pytest.mark.parametrize(
+    ("content", "message"),
+    [
+        ("<einfachesprache>Text</einfachesprache>", "not valid JSON"),
+        ('{"text": 3, "terms": []}', "expected JSON schema"),
+        ('{"text": "Text", "terms": "keine"}', "expected JSON schema"),
+        ('{"text": " ** ", "terms": []}', "empty result"),
+    ],
+)
+def test_parse_structured_response_rejects_invalid_responses(content, message):
+    with pytest.raises(ValueError, match=message):
+        parse_structured_response(content, analysis=False)
@@ -0,0 +1,61 @@
+import pytest
+
+from _streamlit_app.token_budget import (
+    DEFAULT_OUTPUT_RATIOS,
+    OutputRatioTracker,
+    estimate_tokens,
+    max_tokens_for,
+    request_mode,
+)
+
+
+@pytest.mark.parametrize(
+    ("analysis", "leichte_sprache", "condense_text", "mode"),
+    [
+        (False, False, False, "einfache_sprache"),
+        (False, True, False, "leichte_sprache"),
+        (False, True, True, "leichte_sprache_condensed"),
+        (True, True, True, "analysis_leichte_sprache"),
+        (True, False, False, "analysis_einfache_sprache"),
+    ],
+)
+def test_request_mode_names_every_prompt_variant(
+    analysis, leichte_sprache, condense_text, mode
+):
+    assert (
+        request_mode(
+            analysis=analysis,
+            leichte_sprache=leichte_sprache,
+            condense_text=condense_text,
+        )
+        == mode
+    )
+    assert mode in DEFAULT_OUTPUT_RATIOS
+
+
+def test_max_tokens_scales_with_input_within_bounds():
+    bounds = {"headroom": 1.5, "min_tokens": 512, "max_tokens": 8192}
+
+    assert max_tokens_for("Kurzer Satz.", ratio=2.0, **bounds) == 512
+    assert max_tokens_for("x" * 3000, ratio=2.0, **bounds) == 3000 + 64
+    assert max_tokens_for("x" * 30000, ratio=2.0, **bounds) == 8192
+
+
+def test_output_ratio_tracker_uses_defaults_until_enough_history():
+    tracker = OutputRatioTracker(min_samples=3, percentile=0.9)
+    source = "x" * 300
+
+    tracker.record("leichte_sprache", source, "x" * 600)
+    assert tracker.ratio("leichte_sprache") == DEFAULT_OUTPUT_RATIOS["leichte_sprache"]
+
+    tracker.record("leichte_sprache", source, "x" * 900)
+    tracker.record("leichte_sprache", source, "x" * 750)
+    assert tracker.ratio("leichte_sprache") == 3.0
+    assert (
+        tracker.ratio("einfache_sprache") == DEFAULT_OUTPUT_RATIOS["einfache_sprache"]
+    )
+
+
+def test_estimate_tokens_rounds_up():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 2
@@ -0,0 +1,96 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+
+import pytest
+
+from _streamlit_app.tracing import (
+    NULL_SPAN,
+    JSONLinesSpanExporter,
+    Tracer,
+    create_tracer,
+    otlp_payload,
+)
+
+
+class CollectingExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+
+def test_disabled_tracer_hands_out_shared_no_op_span():
+    tracer = Tracer()
+
+    with tracer.span("request", model="a") as span:
+        span.set_attribute("ignored", True)
+
+    assert tracer.enabled is False
+    assert span is NULL_SPAN
+
+
+def test_tracer_nests_spans_across_threads_and_records_errors():
+    exporter = CollectingExporter()
+    tracer = Tracer(exporter, flush_interval_seconds=0.01)
+
+    def work(model):
+        with tracer.span("invoke_model", model=model):
+            pass
+
+    with tracer.span("request") as root:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            for model in ["a", "b"]:
+                executor.submit(copy_context().run, work, model).result()
+        with pytest.raises(ValueError), tracer.span("extract_tagged_response"):
+            raise ValueError("no tags")
+    tracer.shutdown()
+
+    spans = {span.attributes.get("model", span.name): span for span in exporter.spans}
+    assert {spans["a"].parent_id, spans["b"].parent_id} == {root.span_id}
+    assert {span.trace_id for span in exporter.spans} == {root.trace_id}
+    assert spans["extract_tagged_response"].error == "ValueError: no tags"
+    assert root.parent_id is None
+    assert root.duration_ms >= 0
+
+
+def test_otlp_payload_encodes_ids_times_attributes_and_status():
+    exporter = CollectingExporter()
+    tracer = Tracer(exporter, flush_interval_seconds=0.01)
+    with tracer.span("invoke_model", model="a", retries=2, ok=True):
+        pass
+    tracer.shutdown()
+
+    payload = otlp_payload(exporter.spans)
+    span = payload["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+
+    assert span["name"] == "invoke_model"
+    assert len(span["traceId"]) == 32
+    assert len(span["spanId"]) == 16
+    assert "parentSpanId" not in span
+    assert {"key": "retries", "value": {"intValue": "2"}} in span["attributes"]
+    assert {"key": "ok", "value": {"boolValue": True}} in span["attributes"]
+    assert span["status"] == {"code": 1}
+
+
+def test_create_tracer_writes_json_lines_file(tmp_path):
+    tracer = create_tracer(
+        {"enabled": True, "exporter": "file", "filename": "traces.jsonl"},
+        base_dir=tmp_path,
+    )
+    assert isinstance(tracer.exporter, JSONLinesSpanExporter)
+
+    with tracer.span("get_zix", chars=12):
+        pass
+    tracer.shutdown()
+
+    entry = json.loads((tmp_path / "traces.jsonl").read_text(encoding="utf-8"))
+    assert entry["name"] == "get_zix"
+    assert entry["attributes"] == {"chars": 12}
+
+
+def test_create_tracer_disabled_and_invalid_exporter(tmp_path):
+    assert create_tracer({"enabled": False}, base_dir=tmp_path).enabled is False
+    with pytest.raises(ValueError, match="'file' or 'otlp'"):
+        create_tracer({"enabled": True, "exporter": "zipkin"}, base_dir=tmp_path)
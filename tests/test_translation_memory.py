@@ -0,0 +1,140 @@
+import sqlite3
+
+import pytest
+
+from _streamlit_app import shared_state
+from _streamlit_app.shared_state import connect_sqlite
+from _streamlit_app.translation_memory import (
+    MinHasher,
+    Prefill,
+    TranslationMemory,
+    jaccard,
+    normalize_segment,
+    shingles,
+    split_paragraphs,
+)
+
+NOTICE = (
+    "Gegen diesen Entscheid kann innert 30 Tagen seit Zustellung beim "
+    "Bezirksrat schriftlich Rekurs erhoben werden."
+)
+NOTICE_SIMPLE = (
+    "Sie sind nicht einverstanden? Dann können Sie sich wehren. "
+    "Schreiben Sie dem Bezirksrat innerhalb von 30 Tagen."
+)
+CONTACT = "Bei Fragen erreichen Sie uns unter 044 123 45 67 oder per E-Mail."
+CONTACT_SIMPLE = "Haben Sie Fragen? Rufen Sie uns an: 044 123 45 67."
+
+
+@pytest.fixture
+def memory(tmp_path):
+    memory = TranslationMemory(tmp_path / "memory.sqlite3")
+    memory.add(
+        f"Guten Tag\n\nIhr Gesuch wurde bewilligt.\n\n{NOTICE}\n\n{CONTACT}",
+        f"Guten Tag\n\nSie dürfen bauen.\n\n{NOTICE_SIMPLE}\n\n{CONTACT_SIMPLE}",
+        mode="einfache_sprache",
+        model="Modell A",
+    )
+    return memory
+
+
+def test_split_paragraphs_ignores_blank_runs_and_outer_whitespace():
+    assert split_paragraphs("\n A \n\n \n\nB\nC\n\n") == ["A", "B\nC"]
+
+
+def test_lookup_finds_exact_paragraphs_per_mode(memory):
+    assert memory.lookup(NOTICE, "einfache_sprache") == NOTICE_SIMPLE
+    assert memory.lookup(NOTICE, "leichte_sprache") is None
+
+
+def test_lookup_tolerates_spacing_punctuation_and_eszett(memory):
+    variant = NOTICE.replace(" seit", "  seit").replace(".", "") + " "
+
+    assert memory.lookup(variant, "einfache_sprache") == NOTICE_SIMPLE
+
+
+def test_lookup_never_reuses_a_paragraph_with_other_numbers(memory):
+    assert memory.lookup(NOTICE.replace("30", "10"), "einfache_sprache") is None
+    assert memory.lookup(CONTACT.replace("67", "68"), "einfache_sprache") is None
+
+
+def test_lookup_rejects_paragraphs_below_the_similarity_threshold(memory):
+    other = NOTICE.replace("beim Bezirksrat", "beim Statthalteramt")
+
+    assert memory.lookup(other, "einfache_sprache") is None
+
+
+def test_prefill_takes_remembered_paragraphs_from_start_and_end(memory):
+    text = f"Guten Tag\n\nIhr Gesuch für die Garage ist unvollständig.\n\n{NOTICE}"
+
+    prefill = memory.prefill(text, "einfache_sprache")
+
+    assert prefill == Prefill(
+        ("Guten Tag",),
+        "Ihr Gesuch für die Garage ist unvollständig.",
+        (NOTICE_SIMPLE,),
+    )
+    assert prefill.matched == 2
+    assert prefill.unmatched == 1
+    assert prefill.join("Es fehlt ein Plan.") == (
+        f"Guten Tag\n\nEs fehlt ein Plan.\n\n{NOTICE_SIMPLE}"
+    )
+
+
+def test_prefill_looks_up_all_paragraphs_on_one_closed_connection(memory, monkeypatch):
+    connections = []
+
+    def connect(path):
+        connections.append(connect_sqlite(path))
+        return connections[-1]
+
+    monkeypatch.setattr(shared_state, "connect_sqlite", connect)
+
+    prefill = memory.prefill(f"{NOTICE}\n\nNeu.\n\n{CONTACT}", "einfache_sprache")
+
+    assert prefill.matched == 2
+    assert len(connections) == 1
+    with pytest.raises(sqlite3.ProgrammingError, match="closed"):
+        connections[0].execute("SELECT 1")
+
+
+def test_prefill_of_a_fully_remembered_text_leaves_no_remainder(memory):
+    prefill = memory.prefill(f"{NOTICE}\n\n{CONTACT}", "einfache_sprache")
+
+    assert prefill.remainder == ""
+    assert prefill.join("") == f"{NOTICE_SIMPLE}\n\n{CONTACT_SIMPLE}"
+
+
+def test_add_skips_results_whose_paragraphs_do_not_line_up(tmp_path):
+    memory = TranslationMemory(tmp_path / "memory.sqlite3")
+
+    stored = memory.add("Eins.\n\nZwei.", "Eins und zwei.", mode="m", model="x")
+
+    assert stored == 0
+    assert memory.lookup("Eins.", "m") is None
+
+
+def test_add_keeps_only_the_most_recent_paragraphs(tmp_path):
+    memory = TranslationMemory(tmp_path / "memory.sqlite3", max_entries=2)
+
+    for number in range(4):
+        memory.add(f"Absatz {number}.", f"Einfach {number}.", mode="m", model="x")
+
+    assert memory.lookup("Absatz 0.", "m") is None
+    assert memory.lookup("Absatz 3.", "m") == "Einfach 3."
+
+
+def test_similar_segments_share_a_band_and_different_ones_do_not():
+    hasher = MinHasher()
+    first = shingles(normalize_segment(NOTICE))
+    similar = shingles(normalize_segment(NOTICE + " Die Frist ist nicht erstreckbar."))
+    different = shingles(normalize_segment(CONTACT))
+
+    assert jaccard(first, similar) > 0.7
+    assert set(hasher.band_keys(first, "m")) & set(hasher.band_keys(similar, "m"))
+    assert not set(hasher.band_keys(first, "m")) & set(hasher.band_keys(different, "m"))
+
+
+def test_min_similarity_must_be_a_fraction(tmp_path):
+    with pytest.raises(ValueError, match="between 0 and 1"):
+        TranslationMemory(tmp_path / "memory.sqlite3", min_similarity=0)